@@ -1 +1,4 @@
-__all__ = ["core", "models", "vehicles", "units", "system"]
\ No newline at end of file
+from ._lazy import lazy_exports
+
+__all__ = ["core", "models", "vehicles", "units", "system"]
+__getattr__, __dir__ = lazy_exports(__name__, {name: name for name in __all__})
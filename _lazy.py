@@ -0,0 +1,33 @@
+"""
+PEP 562 lazy exports for the package __init__ files: a public name's submodule
+is imported on first attribute access (or `from pkg import name`), so a worker
+that only needs Environment does not pay for every unit, vehicle and model.
+"""
+from __future__ import annotations
+import importlib
+import sys
+from typing import Any, Callable, Dict, List, Tuple
+
+
+def lazy_exports(package: str, exports: Dict[str, str]) -> Tuple[Callable[[str], Any], Callable[[], List[str]]]:
+    """
+    Module-level `__getattr__` and `__dir__` for `package`. `exports` maps each
+    public name to the submodule defining it (relative to the package); a name
+    mapped to itself is the submodule. Resolved values are cached in the package
+    namespace, so later lookups never reach __getattr__.
+    """
+    ns = sys.modules[package].__dict__
+
+    def __getattr__(name: str) -> Any:
+        sub = exports.get(name)
+        if sub is None:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        mod = importlib.import_module(f"{package}.{sub}")
+        value = mod if sub == name else getattr(mod, name)
+        ns[name] = value
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted(set(ns) | set(exports))
+
+    return __getattr__, __dir__
@@ -0,0 +1 @@
+"""Performance benchmarks. Run a module directly, e.g. `python -m luna_facilities.benchmarks.fork`."""
@@ -0,0 +1,53 @@
+"""
+Cost of branching world state as the fleet grows: copy.deepcopy vs
+Environment.fork / checkpoint / restore.
+
+    python -m luna_facilities.benchmarks.fork [--sizes 4 16 64 256] [--repeat 200]
+"""
+from __future__ import annotations
+import argparse
+import copy
+import time
+from typing import Callable, Dict, List
+
+from luna_facilities.benchmarks.scenarios import build_environment
+
+
+def _per_call_us(fn: Callable[[], object], repeat: int) -> float:
+    fn()
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return 1e6 * (time.perf_counter() - t0) / repeat
+
+
+def run(sizes: List[int], repeat: int) -> List[Dict[str, float]]:
+    rows = []
+    for n in sizes:
+        env = build_environment(n_vehicles=n)
+        token = env.checkpoint()
+        rows.append({
+            "vehicles": n,
+            "deepcopy_us": _per_call_us(lambda: copy.deepcopy(env), repeat),
+            "fork_us": _per_call_us(env.fork, repeat),
+            "checkpoint_us": _per_call_us(env.checkpoint, repeat),
+            "restore_us": _per_call_us(lambda: env.restore(token), repeat),
+            "checkpoint_kb": token.nbytes / 1024.0,
+        })
+    return rows
+
+
+def main(argv: List[str] = None) -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", type=int, nargs="+", default=[4, 16, 64, 256])
+    ap.add_argument("--repeat", type=int, default=200)
+    args = ap.parse_args(argv)
+    rows = run(args.sizes, args.repeat)
+    cols = list(rows[0].keys())
+    print("  ".join(f"{c:>14}" for c in cols))
+    for r in rows:
+        print("  ".join(f"{r[c]:>14.1f}" if isinstance(r[c], float) else f"{r[c]:>14}" for c in cols))
+
+
+if __name__ == "__main__":
+    main()
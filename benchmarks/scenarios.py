@@ -0,0 +1,183 @@
+from __future__ import annotations
+from dataclasses import asdict, dataclass
+from typing import Any, Dict
+import random
+
+from luna_facilities.system.actor_actions import Action, ActorActions
+from luna_facilities.system.config import SimConfig
+from luna_facilities.system.counter import SystemCounter
+from luna_facilities.system.environment import Environment
+from luna_facilities.units import (
+    DemandModel, ISRUPlant, InspectionAndCheckout, LandingSiteManager, LaunchSchedule, LogisticsPipeline,
+    MissionClock, OrbitCatalog, PartsInventory, PropellantDepot, RangeAndComms, RefurbFacility, RiskModel,
+    SurfacePowerSystem, SurfaceTransportNetwork, VehicleFleet,
+)
+from luna_facilities.vehicles import BlueMoonMK2, CislunarTransporter, VehicleCommonState
+
+PROPS = ("LOX", "LH2", "CH4")
+
+
+@dataclass(frozen=True)
+class ScenarioParams:
+    """Knobs for a synthetic campaign; every generated quantity is drawn from `seed`."""
+    vehicles: int = 4             # MK2 landers (plus one transporter)
+    manifest: int = 8             # planned launches
+    depots: int = 2
+    blackouts: int = 1            # comm blackout windows
+    transport_nodes: int = 0      # surface graph nodes (about 3 outgoing edges each)
+    refurb_queue: int = 0         # vehicles already waiting for a bay
+    refurb_bays: int = 2
+    horizon: int = 24 * 30
+    seed: int = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+# Named presets for the benchmark suite
+SCENARIOS: Dict[str, ScenarioParams] = {
+    "small": ScenarioParams(),
+    "medium": ScenarioParams(vehicles=32, manifest=200, depots=8, blackouts=20, transport_nodes=30, refurb_queue=16),
+    "large": ScenarioParams(vehicles=256, manifest=5000, depots=32, blackouts=500, transport_nodes=120,
+                            refurb_queue=128, refurb_bays=8),
+}
+
+
+def _vid(i: int) -> str:
+    return f"MK2-{i:02d}"
+
+
+def build_scenario(p: ScenarioParams) -> Environment:
+    """All sixteen units sized by `p`."""
+    r = random.Random(p.seed)
+    horizon_h = float(p.horizon)
+
+    manifest = LaunchSchedule()
+    for i in range(p.manifest):
+        manifest.add_launch(f"M{i:05d}", r.uniform(0.0, horizon_h), _vid(r.randrange(max(1, p.vehicles))), f"P{r.randrange(4)}")
+
+    blackouts = []
+    for _ in range(p.blackouts):
+        t0 = r.uniform(0.0, horizon_h)
+        blackouts.append((t0, t0 + r.uniform(0.5, 6.0)))
+
+    tanks = {f"DEP-{i:02d}": {prop: r.uniform(1e4, 5e4) for prop in PROPS[:1 + i % len(PROPS)]} for i in range(p.depots)}
+
+    transport = SurfaceTransportNetwork()
+    n = p.transport_nodes
+    for a in range(n):
+        for b in r.sample(range(n), min(3, n)):
+            if a != b:
+                transport.edges[(f"N{a}", f"N{b}")] = {"time": r.uniform(0.5, 8.0), "fuel": r.uniform(1, 50), "power": r.uniform(0, 20)}
+
+    refurb = RefurbFacility(bays=p.refurb_bays)
+    for i in range(p.refurb_queue):
+        refurb.start(_vid(i % max(1, p.vehicles)), r.uniform(4.0, 48.0), priority=float(r.randrange(3)))
+
+    units = {
+        "MissionClock": MissionClock(),
+        "LaunchSchedule": manifest,
+        "RangeAndComms": RangeAndComms(blackout_periods=blackouts),
+        "OrbitCatalog": OrbitCatalog(),
+        "LandingSiteManager": LandingSiteManager(),
+        "PropellantDepot": PropellantDepot(tanks=tanks),
+        "ISRUPlant": ISRUPlant(),
+        "SurfacePowerSystem": SurfacePowerSystem(),
+        "SurfaceTransportNetwork": transport,
+        "RefurbFacility": refurb,
+        "InspectionAndCheckout": InspectionAndCheckout(),
+        "PartsInventory": PartsInventory(stock={"seal_kit": 5}),
+        "LogisticsPipeline": LogisticsPipeline(shipments=[{"eta_hours": 10.0, "part_id": "seal_kit", "qty": 3}]),
+        "DemandModel": DemandModel(),
+        "RiskModel": RiskModel(),
+        "VehicleFleet": VehicleFleet(),
+    }
+    fleet = units["VehicleFleet"].vehicles
+    for i in range(p.vehicles):
+        fleet[_vid(i)] = BlueMoonMK2(common=VehicleCommonState(_vid(i), "mk2", "lander", "nrho", "loiter", True, 1.0, 0))
+    fleet["TUG-01"] = CislunarTransporter(common=VehicleCommonState("TUG-01", "transporter", "tug", "leo", "loiter", True, 1.0, 0))
+    return Environment(config=SimConfig(episode_horizon_steps=p.horizon), units=units,
+                       counter=SystemCounter(), rng=random.Random(p.seed))
+
+
+def scenario_spec(p: ScenarioParams) -> Dict[str, Any]:
+    """build_scenario(p) as a declarative tree for system.scenario: the same draws, so the same campaign."""
+    r = random.Random(p.seed)
+    horizon_h = float(p.horizon)
+
+    manifest = [{"mission_id": f"M{i:05d}", "planned_time": r.uniform(0.0, horizon_h),
+                 "vehicle_id": _vid(r.randrange(max(1, p.vehicles))), "pad_id": f"P{r.randrange(4)}", "status": "planned"}
+                for i in range(p.manifest)]
+
+    blackouts = []
+    for _ in range(p.blackouts):
+        t0 = r.uniform(0.0, horizon_h)
+        blackouts.append([t0, t0 + r.uniform(0.5, 6.0)])
+
+    tanks = {f"DEP-{i:02d}": {prop: r.uniform(1e4, 5e4) for prop in PROPS[:1 + i % len(PROPS)]} for i in range(p.depots)}
+
+    edges = []
+    n = p.transport_nodes
+    for a in range(n):
+        for b in r.sample(range(n), min(3, n)):
+            if a != b:
+                edges.append({"src": f"N{a}", "dst": f"N{b}", "time": r.uniform(0.5, 8.0), "fuel": r.uniform(1, 50), "power": r.uniform(0, 20)})
+
+    # RefurbFacility.start at t=0: bays fill first, the rest wait by priority
+    in_service: Dict[str, float] = {}
+    queue = []
+    for i in range(p.refurb_queue):
+        vid, duration, priority = _vid(i % max(1, p.vehicles)), r.uniform(4.0, 48.0), float(r.randrange(3))
+        if len(in_service) >= p.refurb_bays:
+            queue.append([-priority, 0, vid, duration])
+        else:
+            in_service[vid] = duration
+
+    return {
+        "config": {"episode_horizon_steps": p.horizon},
+        "seed": p.seed,
+        "units": {
+            "MissionClock": {},
+            "LaunchSchedule": {"manifest": manifest},
+            "RangeAndComms": {"blackout_periods": blackouts},
+            "OrbitCatalog": {},
+            "LandingSiteManager": {},
+            "PropellantDepot": {"tanks": tanks},
+            "ISRUPlant": {},
+            "SurfacePowerSystem": {},
+            "SurfaceTransportNetwork": {"edges": edges},
+            "RefurbFacility": {"bays": p.refurb_bays, "in_service": in_service, "queue": queue},
+            "InspectionAndCheckout": {},
+            "PartsInventory": {"stock": {"seal_kit": 5}},
+            "LogisticsPipeline": {"shipments": [{"eta_hours": 10.0, "part_id": "seal_kit", "qty": 3}]},
+            "DemandModel": {},
+            "RiskModel": {},
+            "VehicleFleet": {},
+        },
+        "vehicles": [
+            {"type": "BlueMoonMK2", "id": "MK2-{i:02d}", "count": p.vehicles},
+            {"type": "CislunarTransporter", "id": "TUG-01"},
+        ],
+    }
+
+
+def build_environment(n_vehicles: int = 4, seed: int = 0, horizon: int = 24 * 30) -> Environment:
+    return build_scenario(ScenarioParams(vehicles=n_vehicles, seed=seed, horizon=horizon))
+
+
+def scripted_action(env: Environment, r: random.Random) -> Action:
+    """A cheap, reproducible mix of every action type, valid for any generated scenario."""
+    vids = list(env.units["VehicleFleet"].vehicles)
+    vid = r.choice(vids)
+    k = r.random()
+    if k < 0.3:
+        depots = env.units["PropellantDepot"].depot_ids
+        if depots:
+            return ActorActions.transfer_propellant(r.choice(depots), r.choice(PROPS[:2]), vid, r.uniform(0, 3000))
+    if k < 0.5:
+        return ActorActions.start_refurb(vid, r.uniform(1, 30), priority=float(r.randrange(3)))
+    if k < 0.65:
+        return ActorActions.run_check(vid, r.choice(("completeness", "functional", "post_refurb")))
+    if k < 0.75:
+        return ActorActions.schedule_launch(f"X{r.randrange(10 ** 6)}", r.uniform(0, env.config.episode_horizon_steps), vid, "P1")
+    return ActorActions.command_maneuver(vid, r.uniform(0, 10))
@@ -0,0 +1,105 @@
+"""
+Worker startup cost: imports plus scenario construction, each run in a fresh Python process.
+
+    python -m luna_facilities.benchmarks.startup [--scenarios small medium large] [--repeat 10] [--out startup.json]
+
+Modes (the child times itself from before its first luna_facilities import):
+
+    import       from luna_facilities.system import Environment (lazy package imports)
+    import_all   every public name of every subpackage, as the old eager __init__ files loaded
+    build        build_scenario() by hand in Python
+    load         load_scenario() of the scenario as JSON, parsed and validated (cache off)
+    load_cached  load_scenario() from a warm compiled cache
+
+`process_ms` adds interpreter start-up, which every worker pays regardless.
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+from luna_facilities.benchmarks.scenarios import SCENARIOS, scenario_spec
+from luna_facilities.system.scenario import load_compiled
+
+_IMPORT_ALL = """
+import importlib, luna_facilities
+for pkg in luna_facilities.__all__:
+    mod = importlib.import_module("luna_facilities." + pkg)
+    for name in mod.__all__:
+        getattr(mod, name)
+"""
+
+# Child bodies: imports only, then per scenario ({path} / {scenario} / {cache} are filled in per run)
+IMPORT_MODES: Dict[str, str] = {
+    "import": "from luna_facilities.system import Environment",
+    "import_all": _IMPORT_ALL,
+}
+SCENARIO_MODES: Dict[str, str] = {
+    "build": "from luna_facilities.benchmarks.scenarios import SCENARIOS, build_scenario\n"
+             "env = build_scenario(SCENARIOS[{scenario!r}])",
+    "load": "from luna_facilities.system.scenario import load_scenario\n"
+            "env = load_scenario({path!r}, cache=False)",
+    "load_cached": "from luna_facilities.system.scenario import load_scenario\n"
+                   "env = load_scenario({path!r}, cache_dir={cache!r})",
+}
+
+_CHILD = "import time\nt0 = time.perf_counter()\n{body}\nprint(1e3 * (time.perf_counter() - t0))\n"
+
+
+def _child(body: str) -> Dict[str, float]:
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(p for p in sys.path if p))
+    t0 = time.perf_counter()
+    out = subprocess.run([sys.executable, "-c", _CHILD.format(body=body)], env=env, check=True,
+                         capture_output=True, text=True).stdout
+    return {"process_ms": 1e3 * (time.perf_counter() - t0), "startup_ms": float(out.strip().splitlines()[-1])}
+
+
+def _median(body: str, repeat: int) -> Dict[str, float]:
+    runs = [_child(body) for _ in range(repeat)]
+    return {k: statistics.median(r[k] for r in runs) for k in ("startup_ms", "process_ms")}
+
+
+def run(scenarios: List[str], repeat: int) -> Dict[str, Any]:
+    imports = {mode: _median(body, repeat) for mode, body in IMPORT_MODES.items()}
+    results: Dict[str, Any] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = os.path.join(tmp, "cache")
+        for scen in scenarios:
+            path = os.path.join(tmp, f"{scen}.json")
+            with open(path, "w") as f:
+                json.dump(scenario_spec(SCENARIOS[scen]), f)
+            load_compiled(path, cache_dir=cache)   # warm the cache for load_cached
+            modes = {mode: _median(body.format(path=path, scenario=scen, cache=cache), repeat)
+                     for mode, body in SCENARIO_MODES.items()}
+            results[scen] = {"file_kb": os.path.getsize(path) / 1024.0, "modes": modes}
+    return {"python": sys.version.split()[0], "repeat": repeat, "imports": imports, "results": results}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--scenarios", nargs="+", default=list(SCENARIOS), choices=list(SCENARIOS))
+    ap.add_argument("--repeat", type=int, default=10)
+    ap.add_argument("--out", default=None)
+    args = ap.parse_args(argv)
+    out = run(args.scenarios, args.repeat)
+    print(f"median of {args.repeat} processes: in-process ms / ms with interpreter start-up")
+    for mode, m in out["imports"].items():
+        print(f"  {mode:>12}: {m['startup_ms']:9.1f} {m['process_ms']:9.1f}")
+    for scen, res in out["results"].items():
+        print(f"{scen} ({res['file_kb']:.1f} KB scenario)")
+        for mode, m in res["modes"].items():
+            print(f"  {mode:>12}: {m['startup_ms']:9.1f} {m['process_ms']:9.1f}")
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(out, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,201 @@
+"""
+Environment throughput and scaling benchmarks over the presets in scenarios.SCENARIOS.
+
+    python -m luna_facilities.benchmarks.suite run [--scenarios small medium] [--steps 300] [--out results.json]
+    python -m luna_facilities.benchmarks.suite compare baseline.json results.json [--threshold 0.15] [--floor 1.0]
+    python -m luna_facilities.benchmarks.suite profile [--scenario medium] [--steps 300] [--trace trace.json]
+
+`compare` exits with status 1 when any metric regressed by more than the threshold.
+"""
+from __future__ import annotations
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from luna_facilities.benchmarks.scenarios import SCENARIOS, ScenarioParams, build_scenario, scripted_action
+from luna_facilities.system.profiler import StepProfiler
+
+# Metrics where larger is better; everything else (times, memory) is smaller-is-better
+HIGHER_IS_BETTER = frozenset({"steps_per_sec"})
+
+
+def _timed(fn, reps: int) -> float:
+    """Mean microseconds per call."""
+    t0 = time.perf_counter()
+    for _ in range(reps):
+        fn()
+    return 1e6 * (time.perf_counter() - t0) / max(1, reps)
+
+
+def measure(params: ScenarioParams, steps: int = 300, reps: int = 50) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    env = build_scenario(params)
+    build_ms = 1e3 * (time.perf_counter() - t0)
+    branch = env.fork()  # untouched copy for the per-unit timings
+    r = random.Random(params.seed)
+    steps = min(steps, params.horizon)
+
+    t0 = time.perf_counter()
+    for _ in range(steps):
+        env.step(scripted_action(env, r))
+    elapsed = time.perf_counter() - t0
+
+    dt = env.config.dt_hours
+    unit_us = {}
+    for name, u in branch.units.items():
+        unit_us[name] = _timed(lambda: u.step_exogenous(dt, branch.rng), reps)
+
+    def cold_observe() -> None:
+        env._snap_cache.clear()
+        env.observe()
+
+    bound = env.compile_observation()
+
+    def cold_fill() -> None:
+        bound.invalidate()
+        bound.fill()
+
+    metrics: Dict[str, Any] = {
+        "build_ms": build_ms,
+        "steps_per_sec": steps / elapsed,
+        "step_us": 1e6 * elapsed / steps,
+        "observe_cold_us": _timed(cold_observe, reps),
+        "observe_warm_us": _timed(env.observe, reps),
+        "obs_fill_cold_us": _timed(cold_fill, reps),
+        "obs_fill_warm_us": _timed(bound.fill, reps),
+        "unit_step_us": unit_us,
+    }
+
+    # Peak Python heap for building the scenario and running the same steps (separate pass; tracemalloc is slow)
+    tracemalloc.start()
+    env = build_scenario(params)
+    r = random.Random(params.seed)
+    for _ in range(steps):
+        env.step(scripted_action(env, r))
+    metrics["peak_mem_kb"] = tracemalloc.get_traced_memory()[1] / 1024.0
+    tracemalloc.stop()
+    return metrics
+
+
+def run(names: List[str], steps: int, reps: int) -> Dict[str, Any]:
+    results = {}
+    for name in names:
+        params = SCENARIOS[name]
+        results[name] = {"params": params.as_dict(), "metrics": measure(params, steps, reps)}
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "steps": steps,
+            "reps": reps,
+        },
+        "results": results,
+    }
+
+
+def profile(params: ScenarioParams, steps: int = 300, trace: bool = False) -> StepProfiler:
+    """Run one scenario with a StepProfiler attached and return it."""
+    env = build_scenario(params)
+    env.profiler = StepProfiler(trace=trace)
+    r = random.Random(params.seed)
+    for _ in range(min(steps, params.horizon)):
+        env.step(scripted_action(env, r))
+    return env.profiler
+
+
+def _flatten(metrics: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    out = {}
+    for k, v in metrics.items():
+        if isinstance(v, dict):
+            out.update(_flatten(v, f"{prefix}{k}."))
+        else:
+            out[prefix + k] = float(v)
+    return out
+
+
+def compare(base: Dict[str, Any], new: Dict[str, Any], threshold: float,
+            floor: float = 1.0) -> List[Tuple[str, str, float, float, float, bool]]:
+    """
+    Rows of (scenario, metric, baseline, new, relative change, regressed) for metrics
+    present in both. Values below `floor` on both sides are timer noise and never regress.
+    """
+    rows = []
+    for scen, b in base["results"].items():
+        n = new["results"].get(scen)
+        if n is None:
+            continue
+        if b["params"] != n["params"]:
+            print(f"warning: scenario {scen!r} parameters differ between files", file=sys.stderr)
+        bm, nm = _flatten(b["metrics"]), _flatten(n["metrics"])
+        for key in bm.keys() & nm.keys():
+            old, cur = bm[key], nm[key]
+            change = (cur - old) / old if old else 0.0
+            worse = -change if key.rsplit(".", 1)[-1] in HIGHER_IS_BETTER else change
+            rows.append((scen, key, old, cur, change, worse > threshold and max(old, cur) >= floor))
+    rows.sort(key=lambda r: (r[0], r[1]))
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    pr = sub.add_parser("run")
+    pr.add_argument("--scenarios", nargs="+", default=list(SCENARIOS), choices=list(SCENARIOS))
+    pr.add_argument("--steps", type=int, default=300)
+    pr.add_argument("--reps", type=int, default=50)
+    pr.add_argument("--out", default=None)
+    pc = sub.add_parser("compare")
+    pc.add_argument("baseline")
+    pc.add_argument("current")
+    pc.add_argument("--threshold", type=float, default=0.15)
+    pc.add_argument("--floor", type=float, default=1.0, help="ignore metrics below this on both sides")
+    pp = sub.add_parser("profile")
+    pp.add_argument("--scenario", default="medium", choices=list(SCENARIOS))
+    pp.add_argument("--steps", type=int, default=300)
+    pp.add_argument("--trace", default=None, help="write a Chrome trace timeline here")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "profile":
+        prof = profile(SCENARIOS[args.scenario], args.steps, trace=args.trace is not None)
+        print(prof.report())
+        if args.trace:
+            prof.write_chrome_trace(args.trace)
+        return 0
+
+    if args.cmd == "run":
+        out = run(args.scenarios, args.steps, args.reps)
+        for scen, res in out["results"].items():
+            m = res["metrics"]
+            print(f"{scen:>8}: {m['steps_per_sec']:10.1f} steps/s  observe(cold) {m['observe_cold_us']:9.1f} us  "
+                  f"fill(cold) {m['obs_fill_cold_us']:9.1f} us  peak {m['peak_mem_kb']:10.1f} KiB")
+            slowest = sorted(m["unit_step_us"].items(), key=lambda kv: -kv[1])[:3]
+            print("          slowest units: " + ", ".join(f"{k} {v:.1f} us" for k, v in slowest))
+        if args.out:
+            with open(args.out, "w") as f:
+                json.dump(out, f, indent=2)
+        return 0
+
+    with open(args.baseline) as f:
+        base = json.load(f)
+    with open(args.current) as f:
+        new = json.load(f)
+    rows = compare(base, new, args.threshold, args.floor)
+    bad = [r for r in rows if r[5]]
+    for scen, key, old, cur, change, regressed in rows:
+        flag = "REGRESSION" if regressed else ""
+        print(f"{scen:>8} {key:<45} {old:12.2f} -> {cur:12.2f}  {100 * change:+7.1f}%  {flag}")
+    print(f"{len(bad)} regression(s) over {100 * args.threshold:.0f}%")
+    return 1 if bad else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
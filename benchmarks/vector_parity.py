@@ -0,0 +1,106 @@
+"""
+VectorEnvironment against N scalar Environments stepped with the same actions,
+including action batches and actions that validation rejects (unknown names,
+and with --strict unstocked depots or unknown vehicles).
+
+    python -m luna_facilities.benchmarks.vector_parity [--scenario small] [--envs 4] [--steps 200] [--strict]
+
+Costs, terminated/truncated flags, every metric, action_ok and the action
+result values must match exactly at every step; exits 1 on the first mismatch.
+"""
+from __future__ import annotations
+import argparse
+import dataclasses
+import random
+import sys
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+
+from luna_facilities.benchmarks.scenarios import PROPS, SCENARIOS, build_scenario, scripted_action
+from luna_facilities.system.actor_actions import Action, ActorActions
+from luna_facilities.system.environment import Environment
+from luna_facilities.system.vector_env import VectorEnvironment
+
+
+def _action(env: Environment, r: random.Random) -> Optional[Action]:
+    k = r.random()
+    if k < 0.05:
+        return None
+    if k < 0.1:
+        return Action("launch_rocket", {"vehicle_id": "MK2-00"})
+    if k < 0.15:
+        # The first depot stocks only PROPS[0]: rejected under strict_actions
+        depot = env.units["PropellantDepot"].depot_ids[0]
+        return ActorActions.transfer_propellant(depot, PROPS[1], r.choice(list(env.units["VehicleFleet"].vehicles)), 100.0)
+    if k < 0.2:
+        return ActorActions.start_refurb("NO-SUCH-VEHICLE", 5.0)
+    return scripted_action(env, r)
+
+
+def _batch(env: Environment, r: random.Random) -> Union[Action, List[Action], None]:
+    # One action, or now and then several in the same step (same-tank transfers, double refurb starts, ...)
+    if r.random() < 0.25:
+        return [a for a in (_action(env, r) for _ in range(r.randint(2, 4))) if a is not None]
+    return _action(env, r)
+
+
+def _build(scenario: str, n: int, strict: bool) -> List[Environment]:
+    envs = []
+    for i in range(n):
+        env = build_scenario(dataclasses.replace(SCENARIOS[scenario], seed=i))
+        env.config = dataclasses.replace(env.config, strict_actions=strict)
+        envs.append(env)
+    return envs
+
+
+def run(scenario: str, n: int, steps: int, strict: bool, seed: int = 0) -> Dict[str, Any]:
+    """Step both paths; returns the step count compared and the first mismatch (None if all matched)."""
+    scalar, vector = _build(scenario, n, strict), _build(scenario, n, strict)
+    venv = VectorEnvironment.from_envs(vector)
+    r = random.Random(seed)
+    rejected = 0
+    for step in range(steps):
+        acts = [_batch(e, r) for e in scalar]
+        out = [e.step(a if a is not None else []) for e, a in zip(scalar, acts)]
+        _, cost, term, trunc, info = venv.step(acts)
+        ok = [o[4]["action_ok"] for o in out]
+        rejected += ok.count(False)
+        checks = {
+            "cost": (cost, [o[1] for o in out]),
+            "terminated": (term, [o[2] for o in out]),
+            "truncated": (trunc, [o[3] for o in out]),
+            "action_ok": (info["action_ok"], ok),
+            "action_results": ([[(x.ok, x.value) for x in res] for res in info["action_results"]],
+                               [[(x.ok, x.value) for x in o[4]["action_results"]] for o in out]),
+        }
+        for k in info["metrics"].keys() | out[0][4]["metrics"].keys():
+            checks["metrics." + k] = (info["metrics"].get(k, np.zeros(n)), [o[4]["metrics"].get(k, 0.0) for o in out])
+        for name, (got, want) in checks.items():
+            # Result values are ragged per-campaign lists; everything else compares as arrays
+            if name != "action_results":
+                got = np.asarray(got).tolist()
+            if got != list(want):
+                return {"steps": step + 1, "rejected": rejected,
+                        "mismatch": {"step": step, "field": name, "vector": got, "scalar": list(want)}}
+    return {"steps": steps, "rejected": rejected, "mismatch": None}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--scenario", default="small", choices=list(SCENARIOS))
+    ap.add_argument("--envs", type=int, default=4)
+    ap.add_argument("--steps", type=int, default=200)
+    ap.add_argument("--strict", action="store_true", help="run with SimConfig.strict_actions")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args(argv)
+    out = run(args.scenario, args.envs, args.steps, args.strict, args.seed)
+    if out["mismatch"] is not None:
+        print(f"MISMATCH after {out['steps']} steps: {out['mismatch']}")
+        return 1
+    print(f"parity ok: {out['steps']} steps x {args.envs} campaigns, {out['rejected']} rejected actions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
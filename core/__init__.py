@@ -1,3 +1,17 @@
-from .snapshot import Snapshot
-from .types import Time, VehicleID, DepotID, MissionID
-from .unit import Unit
+from typing import TYPE_CHECKING
+from .._lazy import lazy_exports
+
+_EXPORTS = {
+    "Snapshot": "snapshot",
+    "Time": "types", "VehicleID": "types", "DepotID": "types", "MissionID": "types",
+    "Unit": "unit",
+    "ObservationSpec": "observation", "UnitLayout": "observation",
+}
+__all__ = list(_EXPORTS)
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
+
+if TYPE_CHECKING:
+    from .snapshot import Snapshot
+    from .types import Time, VehicleID, DepotID, MissionID
+    from .unit import Unit
+    from .observation import ObservationSpec, UnitLayout
@@ -0,0 +1,191 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+import numpy as np
+
+# Default padding for variable-length unit state (override per scenario in ObservationSpec.compile)
+DEFAULT_CAPACITIES: Dict[str, int] = {
+    "manifest": 32,
+    "tasks": 32,
+    "shipments": 16,
+    "queue": 16,
+    "on_order": 16,
+    "reservations": 16,
+    "blackouts": 8,
+    "engines": 4,
+}
+
+
+@dataclass
+class UnitLayout:
+    """
+    Where one unit's fields live inside the flat observation vector.
+    `index` holds whatever the unit compiled for fast writes (key orders, offsets).
+    """
+    name: str
+    offset: int
+    columns: Tuple[str, ...]
+    spec: "ObservationSpec"
+    index: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def size(self) -> int:
+        return len(self.columns)
+
+
+# ---- helpers used by Unit.obs_layout / Unit.observe_into ----
+
+def list_columns(prefix: str, capacity: int, fields: Sequence[str]) -> List[str]:
+    """`prefix.count` followed by `capacity` padded rows of `fields` plus a mask column."""
+    cols = [f"{prefix}.count"]
+    for i in range(capacity):
+        cols.extend(f"{prefix}[{i}].{f}" for f in fields)
+        cols.append(f"{prefix}[{i}].mask")
+    return cols
+
+
+def write_rows(buf: np.ndarray, start: int, capacity: int, width: int, items: Iterable[Any],
+               row: Callable[[np.ndarray, int, Any, Any], None], code: Any = None) -> int:
+    """
+    Fill a block laid out by `list_columns`. `width` counts the fields (mask excluded);
+    `row(buf, pos, item, code)` writes one item's fields at `pos`, using `code`
+    (usually ObservationSpec.code) for categorical values. Returns the item count.
+    """
+    stride = width + 1
+    pos = start + 1
+    n = 0
+    for item in items:
+        if n < capacity:
+            row(buf, pos, item, code)
+            buf[pos + width] = 1.0
+            pos += stride
+        n += 1
+    end = start + 1 + capacity * stride
+    if pos < end:
+        buf[pos:end] = 0.0
+    buf[start] = n
+    return n
+
+
+def _flatten(prefix: str, value: Any, out: List[Tuple[str, Tuple[Any, ...]]], path: Tuple[Any, ...]) -> None:
+    if isinstance(value, bool) or isinstance(value, (int, float)):
+        out.append((prefix, path))
+    elif isinstance(value, Mapping):
+        for k in value:
+            _flatten(f"{prefix}.{k}" if prefix else str(k), value[k], out, path + (k,))
+
+
+def generic_layout(unit: Any) -> Tuple[List[str], Dict[str, Any]]:
+    """Fallback: every numeric leaf of the current snapshot's nested dicts, in snapshot order."""
+    leaves: List[Tuple[str, Tuple[Any, ...]]] = []
+    _flatten("", unit.observe().data, leaves, ())
+    return [name for name, _ in leaves], {"paths": [p for _, p in leaves]}
+
+
+def generic_fill(unit: Any, buf: np.ndarray, layout: UnitLayout) -> None:
+    data = unit.observe().data
+    for i, path in enumerate(layout.index["paths"]):
+        v: Any = data
+        for k in path:
+            v = v.get(k) if isinstance(v, Mapping) else None
+            if v is None:
+                break
+        buf[i] = float(v) if isinstance(v, (int, float)) else 0.0
+
+
+@dataclass
+class ObservationSpec:
+    """
+    Fixed flat float32 layout for a set of units, compiled once per scenario.
+
+    Every unit gets a contiguous slice; categorical strings (vehicle ids, pads,
+    statuses, ...) are encoded through `code()` as 1-based floats with 0 meaning
+    "none". Variable-length lists are padded to `capacities` with a mask column.
+    """
+    capacities: Dict[str, int] = field(default_factory=lambda: dict(DEFAULT_CAPACITIES))
+    layouts: Dict[str, UnitLayout] = field(default_factory=dict)
+    vocab: Dict[str, Dict[str, int]] = field(default_factory=dict)
+    vehicle_ids: Tuple[str, ...] = ()
+    size: int = 0
+
+    @classmethod
+    def compile(cls, units: Mapping[str, Any], capacities: Optional[Mapping[str, int]] = None) -> "ObservationSpec":
+        spec = cls()
+        if capacities:
+            spec.capacities.update(capacities)
+        fleet = units.get("VehicleFleet")
+        if fleet is not None:
+            # Fleet ids get the first vehicle codes and key per-vehicle layouts in other units
+            spec.vehicle_ids = tuple(fleet.vehicles.keys())
+            for vid in spec.vehicle_ids:
+                spec.code("vehicle", vid)
+        offset = 0
+        for name, unit in units.items():
+            layout = UnitLayout(name=name, offset=offset, columns=(), spec=spec)
+            cols, index = unit.obs_layout(spec)
+            layout.columns = tuple(f"{name}.{c}" for c in cols)
+            layout.index = index
+            spec.layouts[name] = layout
+            offset += layout.size
+        spec.size = offset
+        return spec
+
+    def capacity(self, key: str) -> int:
+        return int(self.capacities.get(key, DEFAULT_CAPACITIES.get(key, 0)))
+
+    def code(self, vocab: str, value: Any) -> float:
+        if value is None:
+            return 0.0
+        table = self.vocab.setdefault(vocab, {})
+        c = table.get(value)
+        if c is None:
+            c = len(table) + 1
+            table[value] = c
+        return float(c)
+
+    @property
+    def columns(self) -> Tuple[str, ...]:
+        return tuple(c for layout in self.layouts.values() for c in layout.columns)
+
+    def slice(self, unit_name: str) -> slice:
+        layout = self.layouts[unit_name]
+        return slice(layout.offset, layout.offset + layout.size)
+
+    def allocate(self) -> np.ndarray:
+        return np.zeros(self.size, dtype=np.float32)
+
+    def bind(self, units: Mapping[str, Any], buf: Optional[np.ndarray] = None) -> "BoundObservation":
+        if buf is None:
+            buf = self.allocate()
+        if buf.shape != (self.size,):
+            raise ValueError(f"buffer shape {buf.shape} does not match spec size {self.size}")
+        writers = []
+        for name, layout in self.layouts.items():
+            view = buf[layout.offset:layout.offset + layout.size]
+            writers.append((units[name], view, layout))
+        return BoundObservation(spec=self, buf=buf, writers=writers, versions=[-1] * len(writers))
+
+
+@dataclass
+class BoundObservation:
+    """
+    A spec bound to live units and a reusable buffer. `fill()` allocates nothing
+    and only rewrites slices of units whose version moved since the last fill.
+    """
+    spec: ObservationSpec
+    buf: np.ndarray
+    writers: List[Tuple[Any, np.ndarray, UnitLayout]]
+    versions: List[int]
+
+    def fill(self) -> np.ndarray:
+        versions = self.versions
+        for i, (unit, view, layout) in enumerate(self.writers):
+            v = unit.version
+            if versions[i] != v:
+                unit.observe_into(view, layout)
+                versions[i] = v
+        return self.buf
+
+    def invalidate(self) -> None:
+        """Force a full rewrite on the next fill (e.g. after editing unit fields without touch())."""
+        self.versions = [-1] * len(self.writers)
@@ -1,8 +1,10 @@
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 import random
 
+from luna_facilities.core.observation import generic_fill, generic_layout
+
 @dataclass(frozen=True)
 class Snapshot:
     data: Dict[str, Any]
@@ -10,12 +12,72 @@ class Snapshot:
 class Unit:
     name: str
 
+    # Bumped by mutators (see touch); Environment.observe reuses a unit's cached Snapshot while it is unchanged.
+    # Code that edits unit fields directly must call touch() itself.
+    version: int = 0
+
+    # Scalar attributes written by the default observe_into; empty means fall back to flattening observe()
+    obs_scalars: Tuple[str, ...] = ()
+
+    # Action names this unit applies; Environment sends each step's actions of a name, in order, to
+    # on_<name>(env, actions), which returns one result per action (see system.dispatch.ActionRegistry)
+    handles_actions: Tuple[str, ...] = ()
+
     def observe(self) -> Snapshot:
         raise NotImplementedError
 
+    def touch(self) -> None:
+        """Mark state as changed so cached snapshots and observations are rebuilt."""
+        self.version += 1
+
+    def emit(self, metric: str, amount: float) -> None:
+        """
+        Report a metric delta for the current step (kg moved, kWh drawn, hours late, ...).
+        SystemCounter drains these once per step instead of rescanning unit state.
+        """
+        d = self.__dict__.setdefault("_deltas", {})
+        d[metric] = d.get(metric, 0.0) + amount
+
+    def drain_deltas(self) -> Dict[str, float]:
+        """Metric deltas emitted since the last drain (cleared)."""
+        return self.__dict__.pop("_deltas", None) or {}
+
+    def bind(self, units: Dict[str, "Unit"]) -> None:
+        """
+        Resolve references to other units by name. Environment calls this on
+        construction and after restore, so held references never go stale.
+        """
+        pass
+
     def validate(self) -> List[str]:
         return []
 
     def step_exogenous(self, dt: float, rng: random.Random) -> None:
         """Uncontrolled stochastic evolution."""
         pass
+
+    def next_event_time(self, t: float) -> Optional[float]:
+        """Mission time of this unit's next discrete event strictly after t, or None if it has none."""
+        return None
+
+    def step_exogenous_span(self, dt: float, steps: int, rng: random.Random) -> None:
+        """
+        Advance `steps` consecutive steps with no discrete event in between.
+        Units with a closed form override this; the default just loops.
+        """
+        for _ in range(steps):
+            self.step_exogenous(dt, rng)
+
+    def obs_layout(self, spec: Any) -> Tuple[List[str], Dict[str, Any]]:
+        """Column names (relative to this unit) and compiled lookup data for ObservationSpec."""
+        if self.obs_scalars:
+            return list(self.obs_scalars), {}
+        return generic_layout(self)
+
+    def observe_into(self, buf: Any, layout: Any) -> None:
+        """Write this unit's fields into its slice of a flat observation buffer."""
+        if self.obs_scalars:
+            for i, k in enumerate(self.obs_scalars):
+                buf[i] = getattr(self, k)
+        else:
+            generic_fill(self, buf, layout)
@@ -1,3 +1,21 @@
-from .reliability import BetaBernoulli, EngineFailureModel
-from .cryo import CryoTank
-from .parts_catalog import PartSpec, default_part_catalog
+from typing import TYPE_CHECKING
+from .._lazy import lazy_exports
+
+_EXPORTS = {
+    "BetaBernoulli": "reliability", "EngineBatch": "reliability", "EngineFailureModel": "reliability",
+    "FAILURE_MODES": "reliability", "sample_failure_modes": "reliability",
+    "CryoTank": "cryo",
+    "PartSpec": "parts_catalog", "default_part_catalog": "parts_catalog",
+    "BaseStockPolicy": "inventory_policy", "SsPolicy": "inventory_policy", "WhatIfResult": "inventory_policy",
+    "policies_from_catalog": "inventory_policy", "simulate_inventory": "inventory_policy",
+    "PoissonDemand": "demand_stream", "ScheduledDemand": "demand_stream",
+}
+__all__ = list(_EXPORTS)
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
+
+if TYPE_CHECKING:
+    from .reliability import BetaBernoulli, EngineBatch, EngineFailureModel, FAILURE_MODES, sample_failure_modes
+    from .cryo import CryoTank
+    from .parts_catalog import PartSpec, default_part_catalog
+    from .inventory_policy import BaseStockPolicy, SsPolicy, WhatIfResult, policies_from_catalog, simulate_inventory
+    from .demand_stream import PoissonDemand, ScheduledDemand
@@ -1,17 +1,23 @@
 from __future__ import annotations
 from dataclasses import dataclass
+from typing import Sequence
+import numpy as np
 
-@dataclass
-class CryoTank:
+
+def decay_factors(fracs: Sequence[float], days: float) -> np.ndarray:
     """
-    Simple cryogenic tank model with optional "zero boiloff" mode.
-    Fractions are per-day; convert dt to days at the call site.
+    (1 - frac) ** days per boiloff fraction. Uses Python's pow, once per distinct
+    fraction: NumPy's SIMD power can differ in the last ulp.
     """
-    prop_name: str
-    mass_kg: float
-    capacity_kg: float
-    boiloff_frac_per_day: float
-    zero_boiloff_enabled: bool = True
+    days = max(0.0, days)
+    fracs = np.asarray(fracs, dtype=np.float64)
+    uniq, inv = np.unique(fracs, return_inverse=True)
+    return np.array([(1.0 - f) ** days for f in uniq.tolist()])[inv].reshape(fracs.shape)
+
+
+class TankOps:
+    """add / remove / step_boiloff over mass_kg, capacity_kg, boiloff_frac_per_day, zero_boiloff_enabled."""
+    __slots__ = ()
 
     def add(self, amount_kg: float) -> float:
         accepted = min(amount_kg, self.capacity_kg - self.mass_kg)
@@ -29,3 +35,16 @@ class CryoTank:
         before = self.mass_kg
         self.mass_kg = max(0.0, self.mass_kg * (1.0 - self.boiloff_frac_per_day) ** max(0.0, days))
         return before - self.mass_kg
+
+
+@dataclass
+class CryoTank(TankOps):
+    """
+    Simple cryogenic tank model with optional "zero boiloff" mode.
+    Fractions are per-day; convert dt to days at the call site.
+    """
+    prop_name: str
+    mass_kg: float
+    capacity_kg: float
+    boiloff_frac_per_day: float
+    zero_boiloff_enabled: bool = True
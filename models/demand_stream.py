@@ -0,0 +1,78 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import math
+import random
+
+
+@dataclass
+class PoissonDemand:
+    """
+    Poisson task arrivals, generated lazily from a seeded stream: nothing is
+    drawn until take_until() reaches the arrival. Each task gets a priority, a
+    payload and a due time `slack_hours` after arrival. The stream carries its
+    own Random, so it pickles (checkpoint / fork) and never shifts the
+    environment's RNG draws.
+    """
+    rate_per_hour: float
+    priorities: Tuple[int, ...] = (0, 1, 2)
+    priority_weights: Tuple[float, ...] = (0.6, 0.3, 0.1)
+    payload_kg: Tuple[float, float] = (1000.0, 10000.0)
+    slack_hours: Tuple[float, float] = (24.0, 24.0 * 14)
+    seed: int = 0
+    start_time: float = 0.0
+    id_prefix: str = "task"
+
+    _rng: random.Random = field(init=False, repr=False, compare=False)
+    _next: float = field(default=math.inf, init=False, repr=False, compare=False)
+    _n: int = field(default=0, init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self._rng = random.Random(self.seed)
+        self._next = self._after(self.start_time)
+
+    def _after(self, t: float) -> float:
+        return t + self._rng.expovariate(self.rate_per_hour) if self.rate_per_hour > 0.0 else math.inf
+
+    def next_time(self) -> Optional[float]:
+        return self._next if self._next < math.inf else None
+
+    def take_until(self, t: float) -> List[Dict[str, Any]]:
+        """Tasks arriving at or before t, in arrival order."""
+        out = []
+        r = self._rng
+        while self._next <= t:
+            a = self._next
+            self._n += 1
+            out.append({
+                "id": f"{self.id_prefix}-{self._n}",
+                "arrival_time": a,
+                "due_time": a + r.uniform(*self.slack_hours),
+                "priority": r.choices(self.priorities, self.priority_weights)[0],
+                "payload_kg": r.uniform(*self.payload_kg),
+            })
+            self._next = self._after(a)
+        return out
+
+
+@dataclass
+class ScheduledDemand:
+    """Fixed tasks released at their `arrival_time` (the tasks are released as given, not copied)."""
+    tasks: Sequence[Dict[str, Any]]
+
+    _order: List[Dict[str, Any]] = field(default_factory=list, init=False, repr=False, compare=False)
+    _i: int = field(default=0, init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self._order = sorted(self.tasks, key=lambda t: t.get("arrival_time", 0.0))
+
+    def next_time(self) -> Optional[float]:
+        return self._order[self._i].get("arrival_time", 0.0) if self._i < len(self._order) else None
+
+    def take_until(self, t: float) -> List[Dict[str, Any]]:
+        i = j = self._i
+        order = self._order
+        while j < len(order) and order[j].get("arrival_time", 0.0) <= t:
+            j += 1
+        self._i = j
+        return order[i:j]
@@ -0,0 +1,182 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Dict, Mapping, Optional, Sequence, Tuple, Union
+import math
+import numpy as np
+
+from .parts_catalog import PartSpec, default_part_catalog
+
+HOURS_PER_YEAR = 24.0 * 365.0
+
+
+@dataclass(frozen=True)
+class SsPolicy:
+    """(s, S): when the inventory position (stock + on order) is at or below s, order up to S."""
+    s: int
+    S: int
+
+    @property
+    def levels(self) -> Tuple[int, int]:
+        return self.s, self.S
+
+    def order_qty(self, position: int) -> int:
+        return self.S - position if position <= self.s else 0
+
+
+@dataclass(frozen=True)
+class BaseStockPolicy:
+    """Order up to `level` whenever the position is below it (one-for-one replenishment); (s, S) = (level - 1, level)."""
+    level: int
+
+    @property
+    def levels(self) -> Tuple[int, int]:
+        return self.level - 1, self.level
+
+    def order_qty(self, position: int) -> int:
+        return max(0, self.level - position)
+
+
+ReorderPolicy = Union[SsPolicy, BaseStockPolicy]
+
+
+def part_price(part_id: str, unit_cost: Optional[Mapping[str, float]] = None,
+               catalog: Optional[Mapping[str, PartSpec]] = None) -> float:
+    """Unit price from `unit_cost`, else the catalog, else 0."""
+    if unit_cost and part_id in unit_cost:
+        return float(unit_cost[part_id])
+    spec = (catalog if catalog is not None else default_part_catalog()).get(part_id)
+    return spec.unit_cost if spec is not None else 0.0
+
+
+def policies_from_catalog(demand_per_hour: Mapping[str, float], lead_time_hours: Union[float, Mapping[str, float]],
+                          kind: str = "sS", service_z: float = 1.65, order_cost: float = 1000.0,
+                          holding_rate_per_year: float = 0.25,
+                          catalog: Optional[Mapping[str, PartSpec]] = None) -> Dict[str, ReorderPolicy]:
+    """
+    Reorder policies from demand rates and catalog prices. The reorder point
+    covers lead-time demand plus `service_z` Poisson standard deviations; for
+    kind="sS" the order size is the economic order quantity
+    sqrt(2 * annual demand * order_cost / (price * holding_rate_per_year)), so
+    expensive parts are ordered a few at a time and cheap ones in bulk.
+    kind="base_stock" orders one-for-one up to the reorder point.
+    """
+    if kind not in ("sS", "base_stock"):
+        raise ValueError(f"unknown policy kind {kind!r}")
+    catalog = catalog if catalog is not None else default_part_catalog()
+    out: Dict[str, ReorderPolicy] = {}
+    for part, rate in demand_per_hour.items():
+        lead = lead_time_hours[part] if isinstance(lead_time_hours, Mapping) else lead_time_hours
+        mu = max(0.0, rate) * max(0.0, lead)
+        reorder = max(1, math.ceil(mu + service_z * math.sqrt(mu)))
+        if kind == "base_stock":
+            out[part] = BaseStockPolicy(reorder)
+            continue
+        annual = max(0.0, rate) * HOURS_PER_YEAR
+        holding = part_price(part, catalog=catalog) * holding_rate_per_year
+        q = math.sqrt(2.0 * annual * order_cost / holding) if holding > 0.0 else annual
+        out[part] = SsPolicy(reorder, reorder + max(1, round(q)))
+    return out
+
+
+@dataclass
+class WhatIfResult:
+    """Per (candidate, replica, part) totals of an inventory what-if run."""
+    parts: Tuple[str, ...]
+    demand: np.ndarray          # units requested
+    unmet: np.ndarray           # units short (lost sales)
+    orders: np.ndarray          # orders placed
+    ordered: np.ndarray         # units ordered
+    holding_cost: np.ndarray
+    ordering_cost: np.ndarray   # fixed order cost plus purchase price
+    final_stock: np.ndarray
+    stockout_cost_per_unit: float
+
+    def fill_rate(self) -> np.ndarray:
+        """(candidates, parts) fraction of demand served from stock, pooled over replicas."""
+        d = self.demand.sum(axis=1)
+        return np.where(d > 0, 1.0 - self.unmet.sum(axis=1) / np.maximum(d, 1), 1.0)
+
+    def cost(self) -> np.ndarray:
+        """(candidates, replicas) holding + ordering + stockout cost summed over parts."""
+        return (self.holding_cost + self.ordering_cost + self.stockout_cost_per_unit * self.unmet).sum(axis=2)
+
+    def mean_cost(self) -> np.ndarray:
+        return self.cost().mean(axis=1)
+
+
+def simulate_inventory(levels: np.ndarray, demand_per_hour: Sequence[float], lead_time_hours: Sequence[float],
+                       price: Sequence[float], horizon_hours: float, dt_hours: float = 24.0, replicas: int = 200,
+                       initial_stock: Optional[Sequence[int]] = None,
+                       in_transit: Sequence[Tuple[int, int, float]] = (),
+                       order_cost: float = 1000.0, holding_rate_per_year: float = 0.25,
+                       stockout_cost_per_unit: float = 50000.0, parts: Sequence[str] = (),
+                       rng: Union[int, np.random.Generator, None] = None) -> WhatIfResult:
+    """
+    Lost-sales periodic-review inventory, vectorized over (candidates, replicas, parts).
+
+    `levels` is (candidates, parts, 2) of (s, S) (s = -1 never reorders). Each
+    step receives arrivals, draws Poisson demand (the same draws for every
+    candidate: common random numbers), then reviews: at a position
+    (stock + on order) <= s it orders S - position, arriving ceil(lead / dt)
+    steps later. `in_transit` holds (part index, qty, eta_hours) already on order.
+    """
+    rng = rng if isinstance(rng, np.random.Generator) else np.random.default_rng(rng)
+    levels = np.asarray(levels, dtype=np.int64)
+    if levels.ndim == 2:
+        levels = levels[None]
+    C, P = levels.shape[:2]
+    R = replicas
+    s, S = levels[..., 0][:, None, :], levels[..., 1][:, None, :]
+    rate = np.asarray(demand_per_hour, dtype=np.float64) * dt_hours
+    price = np.asarray(price, dtype=np.float64)
+    lead = np.maximum(1, np.ceil(np.asarray(lead_time_hours, dtype=np.float64) / dt_hours - 1e-9).astype(np.int64))
+    T = int(math.ceil(horizon_hours / dt_hours))
+
+    stock = np.zeros((C, R, P), dtype=np.int64)
+    if initial_stock is not None:
+        stock += np.asarray(initial_stock, dtype=np.int64)
+    on_order = np.zeros((C, R, P), dtype=np.int64)
+    init_slots = [(p, q, max(0, int(math.ceil(eta / dt_hours - 1e-9)))) for p, q, eta in in_transit]
+    W = int(max([lead.max(initial=1)] + [k for _, _, k in init_slots])) + 1
+    arrivals = np.zeros((W, P, C, R), dtype=np.int64)  # ring buffer of deliveries by step, part-major for per-part slots
+    for p, q, k in init_slots:
+        arrivals[k % W, p] += q
+        on_order[..., p] += q
+
+    demand = np.zeros((C, R, P), dtype=np.int64)
+    unmet = np.zeros((C, R, P), dtype=np.int64)
+    orders = np.zeros((C, R, P), dtype=np.int64)
+    ordered = np.zeros((C, R, P), dtype=np.int64)
+    stock_steps = np.zeros((C, R, P), dtype=np.int64)
+    pidx = np.arange(P)
+    for t in range(T):
+        slot = t % W
+        got = arrivals[slot].transpose(1, 2, 0)
+        stock += got
+        on_order -= got
+        arrivals[slot] = 0
+
+        d = rng.poisson(rate, size=(R, P))[None]
+        served = np.minimum(stock, d)
+        stock -= served
+        demand += d
+        unmet += d - served
+
+        position = stock + on_order
+        q = np.where(position <= s, S - position, 0)
+        if q.any():
+            arrivals[(t + lead) % W, pidx] += q.transpose(2, 0, 1)
+            on_order += q
+            orders += q > 0
+            ordered += q
+        stock_steps += stock
+
+    hold_rate = price * holding_rate_per_year * dt_hours / HOURS_PER_YEAR
+    return WhatIfResult(
+        parts=tuple(parts) or tuple(str(p) for p in range(P)),
+        demand=demand, unmet=unmet, orders=orders, ordered=ordered,
+        holding_cost=stock_steps * hold_rate,
+        ordering_cost=orders * order_cost + ordered * price,
+        final_stock=stock,
+        stockout_cost_per_unit=stockout_cost_per_unit,
+    )
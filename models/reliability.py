@@ -1,7 +1,9 @@
 from __future__ import annotations
 from dataclasses import dataclass
 import random
-from typing import Tuple
+from typing import Any, Dict, Optional, Sequence, Tuple, Union
+import numpy as np
+from numpy.typing import ArrayLike
 
 @dataclass
 class BetaBernoulli:
@@ -24,6 +26,11 @@ class BetaBernoulli:
         else:
             self.alpha += 1.0
 
+    def update_counts(self, successes: float, failures: float) -> None:
+        """Bulk form of update() for aggregated outcomes."""
+        self.beta += successes
+        self.alpha += failures
+
 
 @dataclass
 class EngineFailureModel:
@@ -53,3 +60,144 @@ class EngineFailureModel:
             return False, "burn_fail"
 
         return True, "none"
+
+
+# ---- batched sampling ----
+# Failure modes as int8 codes; "inoperable" marks engines that could not be started at all.
+FAILURE_MODES = ("none", "start_fail", "burn_fail", "inoperable")
+MODE_NONE, MODE_START_FAIL, MODE_BURN_FAIL, MODE_INOPERABLE = range(4)
+
+
+def as_generator(seed: Union[int, np.random.Generator, None]) -> np.random.Generator:
+    """A NumPy Generator from a seed (bit-reproducible) or an existing Generator (shared stream)."""
+    return seed if isinstance(seed, np.random.Generator) else np.random.default_rng(seed)
+
+
+def failure_probabilities(health: ArrayLike, burn_minutes: ArrayLike, start_mean: ArrayLike,
+                          burn_mean: ArrayLike) -> Tuple[np.ndarray, np.ndarray]:
+    """Elementwise (p_start, p_burn) with EngineFailureModel.draw_outcome's health scaling."""
+    health_factor = 1.0 + 2.0 * np.maximum(0.0, 1.0 - np.asarray(health, dtype=np.float64))
+    p_start = np.minimum(1.0, np.asarray(start_mean) * health_factor)
+    p_min = np.minimum(1.0, np.asarray(burn_mean) * health_factor)
+    p_burn = 1.0 - (1.0 - p_min) ** np.maximum(0.0, burn_minutes)
+    return p_start, p_burn
+
+
+def sample_failure_modes(health: ArrayLike, burn_minutes: ArrayLike,
+                         start_alpha: ArrayLike, start_beta: ArrayLike,
+                         burn_alpha: ArrayLike, burn_beta: ArrayLike,
+                         rng: Union[int, np.random.Generator, None] = None,
+                         replicas: Optional[int] = None, sample_params: bool = False,
+                         operable: Optional[ArrayLike] = None) -> np.ndarray:
+    """
+    Failure mode codes for many burns at once; inputs broadcast together to shape S.
+
+    Returns int8 codes of shape S, or (replicas,) + S. With sample_params the
+    failure rates are drawn from the Beta posteriors per replica (parameter
+    uncertainty); otherwise the posterior means are used, as in draw_outcome.
+    Matches draw_outcome in distribution, not draw for draw: both uniforms are
+    always drawn, so a given seed and shape always give the same result.
+    """
+    gen = as_generator(rng)
+    arrays = np.broadcast_arrays(*(np.asarray(x, dtype=np.float64) for x in
+                                   (health, burn_minutes, start_alpha, start_beta, burn_alpha, burn_beta)))
+    health, burn_minutes, sa, sb, ba, bb = arrays
+    shape = health.shape if replicas is None else (replicas,) + health.shape
+
+    if sample_params:
+        start_p = gen.beta(sa, sb, size=shape)
+        burn_p = gen.beta(ba, bb, size=shape)
+    else:
+        start_p, burn_p = sa / (sa + sb), ba / (ba + bb)
+    p_start, p_burn = failure_probabilities(health, burn_minutes, start_p, burn_p)
+
+    u = gen.random((2,) + shape)
+    modes = np.where(u[0] < p_start, MODE_START_FAIL, np.where(u[1] < p_burn, MODE_BURN_FAIL, MODE_NONE)).astype(np.int8)
+    if operable is not None:
+        modes[..., ~np.broadcast_to(np.asarray(operable, dtype=bool), health.shape)] = MODE_INOPERABLE
+    return modes
+
+
+def posterior_counts(modes: np.ndarray, axis: Union[int, Tuple[int, ...], None] = 0,
+                     mask: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+    """
+    Outcome counts for bulk posterior updates, reduced over `axis` (e.g. replicas).
+
+    An attempted burn is any code but inoperable; mask drops padding. Mirrors
+    BE7Engine.attempt_burn: a start failure is also a burn-model success.
+    """
+    attempted = modes != MODE_INOPERABLE
+    if mask is not None:
+        attempted &= mask
+    return {
+        "attempts": attempted.sum(axis=axis),
+        "start_fail": ((modes == MODE_START_FAIL) & attempted).sum(axis=axis),
+        "burn_fail": ((modes == MODE_BURN_FAIL) & attempted).sum(axis=axis),
+    }
+
+
+def update_beta_bernoulli(alpha: ArrayLike, beta: ArrayLike, failures: ArrayLike,
+                          trials: ArrayLike) -> Tuple[np.ndarray, np.ndarray]:
+    """Array form of BetaBernoulli.update_counts: alpha counts failures, beta successes."""
+    failures = np.asarray(failures, dtype=np.float64)
+    return np.asarray(alpha) + failures, np.asarray(beta) + (np.asarray(trials, dtype=np.float64) - failures)
+
+
+@dataclass
+class EngineBatch:
+    """
+    Engine health, operability and posteriors for a fleet, padded to (vehicles, max engines).
+    Build it with from_engines, sample descents in bulk, then apply_to the engines.
+    """
+    health: np.ndarray
+    operable: np.ndarray
+    mask: np.ndarray         # False on padding
+    start_alpha: np.ndarray
+    start_beta: np.ndarray
+    burn_alpha: np.ndarray
+    burn_beta: np.ndarray
+
+    @classmethod
+    def from_engines(cls, fleets: Sequence[Sequence[Any]]) -> "EngineBatch":
+        """One row per vehicle from objects with health, operable and failure_model (e.g. BE7Engine)."""
+        V, E = len(fleets), max((len(r) for r in fleets), default=0)
+        f = np.ones((5, V, E))  # health, start alpha/beta, burn alpha/beta; padding stays finite
+        operable = np.zeros((V, E), dtype=bool)
+        mask = np.zeros((V, E), dtype=bool)
+        for i, row in enumerate(fleets):
+            for j, e in enumerate(row):
+                m = e.failure_model
+                f[:, i, j] = (e.health, m.start_fail.alpha, m.start_fail.beta, m.burn_fail_per_min.alpha, m.burn_fail_per_min.beta)
+                operable[i, j] = e.operable
+                mask[i, j] = True
+        return cls(f[0], operable, mask, f[1], f[2], f[3], f[4])
+
+    def sample(self, burn_minutes: ArrayLike, rng: Union[int, np.random.Generator, None] = None,
+               replicas: Optional[int] = None, sample_params: bool = False) -> np.ndarray:
+        """Mode codes, (vehicles, engines) or (replicas, vehicles, engines); padding reads as MODE_NONE."""
+        bm = np.asarray(burn_minutes, dtype=np.float64)
+        if bm.ndim == 1:
+            bm = bm[:, None]  # per-vehicle burn time
+        modes = sample_failure_modes(self.health, bm, self.start_alpha, self.start_beta,
+                                     self.burn_alpha, self.burn_beta, rng, replicas, sample_params,
+                                     self.operable | ~self.mask)
+        modes[..., ~self.mask] = MODE_NONE
+        return modes
+
+    def descent_ok(self, modes: np.ndarray) -> np.ndarray:
+        """Per-vehicle (and per-replica) success: every engine burned without failure."""
+        return (modes == MODE_NONE).all(axis=-1)
+
+    def update(self, modes: np.ndarray) -> None:
+        """Fold sampled outcomes (any number of leading replica axes) into the posteriors."""
+        c = posterior_counts(modes, axis=tuple(range(modes.ndim - 2)), mask=self.mask)
+        self.start_alpha, self.start_beta = update_beta_bernoulli(self.start_alpha, self.start_beta, c["start_fail"], c["attempts"])
+        self.burn_alpha, self.burn_beta = update_beta_bernoulli(self.burn_alpha, self.burn_beta, c["burn_fail"], c["attempts"])
+
+    def apply_to(self, fleets: Sequence[Sequence[Any]]) -> None:
+        """Copy the posteriors back onto the engines' BetaBernoulli models."""
+        for i, row in enumerate(fleets):
+            for j, e in enumerate(row):
+                m = e.failure_model
+                m.start_fail.alpha, m.start_fail.beta = float(self.start_alpha[i, j]), float(self.start_beta[i, j])
+                m.burn_fail_per_min.alpha, m.burn_fail_per_min.beta = float(self.burn_alpha[i, j]), float(self.burn_beta[i, j])
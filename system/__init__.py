@@ -1,5 +1,39 @@
-from .config import SimConfig
-from .actor_actions import Action, ActorActions
-from .counter import SystemCounter
-from .cost import CostModel
-from .environment import Environment
+from typing import TYPE_CHECKING
+from .._lazy import lazy_exports
+
+_EXPORTS = {
+    "SimConfig": "config",
+    "Action": "actor_actions", "ActorActions": "actor_actions",
+    "ActionMasker": "action_mask", "ActionSpace": "action_mask",
+    "SystemCounter": "counter",
+    "CostModel": "cost",
+    "ActionHandler": "dispatch", "ActionRegistry": "dispatch", "ActionResult": "dispatch",
+    "EnvCheckpoint": "environment", "Environment": "environment",
+    "LatencyHistogram": "profiler", "StepProfiler": "profiler",
+    "VectorEnvironment": "vector_env",
+    "RolloutRunner": "rollout", "RolloutResult": "rollout",
+    "MCEstimate": "monte_carlo", "MCRandom": "monte_carlo", "MonteCarloEstimator": "monte_carlo",
+    "TrajectoryReader": "recorder", "TrajectoryRecorder": "recorder",
+    "EpisodeTotals": "rescore", "episode_totals": "rescore", "recording_totals": "rescore",
+    "rollout_totals": "rescore", "weight_grid": "rescore",
+    "CompiledScenario": "scenario", "compile_scenario": "scenario", "load_scenario": "scenario",
+    "read_scenario": "scenario",
+}
+__all__ = list(_EXPORTS)
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
+
+if TYPE_CHECKING:
+    from .config import SimConfig
+    from .actor_actions import Action, ActorActions
+    from .action_mask import ActionMasker, ActionSpace
+    from .counter import SystemCounter
+    from .cost import CostModel
+    from .dispatch import ActionHandler, ActionRegistry, ActionResult
+    from .environment import EnvCheckpoint, Environment
+    from .profiler import LatencyHistogram, StepProfiler
+    from .vector_env import VectorEnvironment
+    from .rollout import RolloutRunner, RolloutResult
+    from .monte_carlo import MCEstimate, MCRandom, MonteCarloEstimator
+    from .recorder import TrajectoryReader, TrajectoryRecorder
+    from .rescore import EpisodeTotals, episode_totals, recording_totals, rollout_totals, weight_grid
+    from .scenario import CompiledScenario, compile_scenario, load_scenario, read_scenario
@@ -0,0 +1,261 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+import math
+import numpy as np
+
+from luna_facilities.system.actor_actions import Action
+
+CHECK_TYPES = ("completeness", "functional", "post_refurb")
+
+# action name -> components its mask is built from
+_DEPENDS = {
+    "transfer_propellant": ("depot", "fleet"),
+    "start_refurb": ("fleet", "refurb"),
+    "run_check": ("fleet", "refurb"),
+    "schedule_launch": ("fleet", "comms", "pads"),
+    "command_maneuver": ("fleet", "comms", "orbit"),
+}
+
+# component -> units it reads
+_SOURCES = {
+    "depot": ("PropellantDepot",),
+    "fleet": ("VehicleFleet",),
+    "refurb": ("RefurbFacility",),
+    "comms": ("RangeAndComms",),
+    "pads": ("LandingSiteManager", "LaunchSchedule"),
+    "orbit": ("OrbitCatalog",),
+}
+
+
+@dataclass(frozen=True)
+class ActionSpace:
+    """
+    Discrete parameter axes of the masked action space. Continuous parameters
+    (amounts, durations, planned times) are left to the policy.
+
+    Mask shapes: transfer_propellant (depots, props, vehicles), start_refurb
+    (vehicles,), run_check (vehicles, check_types), schedule_launch (vehicles, pads)
+    for a launch window starting now, command_maneuver (vehicles,).
+    """
+    depots: Tuple[str, ...] = ()
+    props: Tuple[str, ...] = ()
+    vehicles: Tuple[str, ...] = ()
+    pads: Tuple[str, ...] = ()
+    check_types: Tuple[str, ...] = CHECK_TYPES
+    launch_window_hours: Optional[float] = None  # None: LaunchSchedule.pad_turnaround_hours
+
+    @classmethod
+    def from_env(cls, env: Any) -> "ActionSpace":
+        u = env.units
+        dep = u.get("PropellantDepot")
+        depots = tuple(d for d in dep.depot_ids if d in dep.tanks) if dep is not None else ()
+        props = tuple(dep.props) if dep is not None else ()
+        fleet = u.get("VehicleFleet")
+        vehicles = tuple(fleet.vehicles) if fleet is not None else ()
+        pads: Dict[str, None] = {}
+        if "LandingSiteManager" in u:
+            pads.update(dict.fromkeys(u["LandingSiteManager"].pads))
+        if "LaunchSchedule" in u:
+            pads.update(dict.fromkeys(m["pad_id"] for m in u["LaunchSchedule"].manifest))
+        return cls(depots=depots, props=props, vehicles=vehicles, pads=tuple(pads))
+
+    def shapes(self) -> Dict[str, Tuple[int, ...]]:
+        V = len(self.vehicles)
+        return {
+            "transfer_propellant": (len(self.depots), len(self.props), V),
+            "start_refurb": (V,),
+            "run_check": (V, len(self.check_types)),
+            "schedule_launch": (V, len(self.pads)),
+            "command_maneuver": (V,),
+        }
+
+
+class ActionMasker:
+    """
+    Legality masks over an ActionSpace, maintained incrementally.
+
+    The masks are assembled from per-unit components (depot levels, vehicle
+    readiness, refurb occupancy, comm blackout, pad availability, orbit dv).
+    A component is recomputed only when a unit it reads has a new version (or
+    was replaced) or the clock passes the time until which its time-dependent
+    value is known to hold; an action's mask is rebuilt only when one of its
+    components changed. Returned arrays are shared with the cache: treat them
+    as read-only.
+
+    Rules (a missing unit leaves its component permissive):
+      transfer_propellant  depot stocks the prop (> 0 kg) and the vehicle is ready
+      start_refurb         vehicle ready, a bay is free and it is not already in or queued for a bay
+      run_check            vehicle exists and is not in a refurb bay
+      schedule_launch      vehicle ready, no comm blackout, pad has no reservation or active launch in the window
+      command_maneuver     vehicle ready, no comm blackout, dv remaining > 0 (if tracked)
+    """
+
+    def __init__(self, space: ActionSpace) -> None:
+        self.space = space
+        self._vix = {v: i for i, v in enumerate(space.vehicles)}
+        self._comp: Dict[str, Any] = {}
+        self._stamp: Dict[str, Tuple[Tuple[int, int], ...]] = {}
+        self._until: Dict[str, float] = {}
+        self._gen: Dict[str, int] = {k: 0 for k in _SOURCES}
+        self._masks: Dict[str, np.ndarray] = {}
+        self._mask_gen: Dict[str, Tuple[int, ...]] = {}
+        self._compute: Dict[str, Callable[[Dict[str, Any], float], Tuple[Any, float]]] = {
+            "depot": self._depot, "fleet": self._fleet, "refurb": self._refurb,
+            "comms": self._comms, "pads": self._pads, "orbit": self._orbit,
+        }
+        self.recomputed = 0  # component recomputations so far (for tuning / tests)
+
+    # ---- components ----
+
+    def _refresh(self, units: Dict[str, Any], t: float) -> None:
+        for key, names in _SOURCES.items():
+            stamp = tuple((id(units.get(n)), getattr(units.get(n), "version", 0)) for n in names)
+            if self._stamp.get(key) == stamp and t < self._until[key]:
+                continue
+            self._comp[key], self._until[key] = self._compute[key](units, t)
+            self._stamp[key] = stamp
+            self._gen[key] += 1
+            self.recomputed += 1
+
+    def _depot(self, units: Dict[str, Any], t: float) -> Tuple[np.ndarray, float]:
+        sp, dep = self.space, units.get("PropellantDepot")
+        out = np.zeros((len(sp.depots), len(sp.props)), dtype=bool)
+        if dep is None:
+            return out, math.inf
+        rows = {d: i for i, d in enumerate(dep.depot_ids)}
+        cols = {p: j for j, p in enumerate(dep.props)}
+        di = np.array([rows.get(d, -1) for d in sp.depots], dtype=np.int64)
+        pj = np.array([cols.get(p, -1) for p in sp.props], dtype=np.int64)
+        ok = np.ix_(di >= 0, pj >= 0)
+        cells = np.ix_(di[di >= 0], pj[pj >= 0])
+        out[ok] = dep.present[cells] & (dep.mass[cells] > 0.0)
+        return out, math.inf
+
+    def _fleet(self, units: Dict[str, Any], t: float) -> Tuple[Tuple[np.ndarray, np.ndarray], float]:
+        fleet = units.get("VehicleFleet")
+        vids = self.space.vehicles
+        if fleet is None:
+            return (np.zeros(len(vids), dtype=bool), np.zeros(len(vids), dtype=bool)), math.inf
+        exists = fleet.vehicles.rows(vids) >= 0
+        return (exists, fleet.vehicles.column("ready", vids) & exists), math.inf
+
+    def _refurb(self, units: Dict[str, Any], t: float) -> Tuple[Tuple[bool, np.ndarray, np.ndarray], float]:
+        rf = units.get("RefurbFacility")
+        V = len(self.space.vehicles)
+        if rf is None:
+            return (True, np.zeros(V, dtype=bool), np.zeros(V, dtype=bool)), math.inf
+        in_bay = np.zeros(V, dtype=bool)
+        waiting = np.zeros(V, dtype=bool)
+        for v in rf.in_service:
+            if v in self._vix:
+                in_bay[self._vix[v]] = True
+        for e in rf.queue:
+            if e[2] in self._vix:
+                waiting[self._vix[e[2]]] = True
+        return (len(rf.in_service) < rf.bays, in_bay, waiting), math.inf
+
+    def _comms(self, units: Dict[str, Any], t: float) -> Tuple[bool, float]:
+        rc = units.get("RangeAndComms")
+        if rc is None:
+            return False, math.inf
+        if rc.is_blackout(t):
+            return True, rc.next_clear_time(t)
+        nxt = rc.next_event_time(t)
+        return False, nxt if nxt is not None else math.inf
+
+    def _window(self, units: Dict[str, Any]) -> float:
+        if self.space.launch_window_hours is not None:
+            return self.space.launch_window_hours
+        ls = units.get("LaunchSchedule")
+        return ls.pad_turnaround_hours if ls is not None else 0.0
+
+    def pad_free(self, units: Dict[str, Any], pad_id: str, t: float) -> bool:
+        """No landing-site reservation in [t, t + window) and no active launch within turnaround of t."""
+        lsm, ls = units.get("LandingSiteManager"), units.get("LaunchSchedule")
+        w = self._window(units)
+        if lsm is not None and not lsm.is_free(pad_id, t, t + w):
+            return False
+        return ls is None or not ls.pad_conflicts(pad_id, t)
+
+    def _pads(self, units: Dict[str, Any], t: float) -> Tuple[np.ndarray, float]:
+        lsm, ls = units.get("LandingSiteManager"), units.get("LaunchSchedule")
+        w = self._window(units)
+        until = math.inf
+        out = np.empty(len(self.space.pads), dtype=bool)
+        for k, p in enumerate(self.space.pads):
+            out[k] = self.pad_free(units, p, t)
+            if lsm is not None:
+                until = min(until, lsm.next_pad_change(p, t, w))
+            if ls is not None:
+                until = min(until, ls.next_conflict_change(p, t))
+        return out, until
+
+    def _orbit(self, units: Dict[str, Any], t: float) -> Tuple[np.ndarray, float]:
+        oc = units.get("OrbitCatalog")
+        dv = oc.dv_remaining if oc is not None else {}
+        return np.array([dv.get(v, math.inf) > 0.0 for v in self.space.vehicles], dtype=bool), math.inf
+
+    # ---- masks ----
+
+    def _build(self, name: str) -> np.ndarray:
+        c = self._comp
+        exists, ready = c["fleet"]
+        if name == "transfer_propellant":
+            return c["depot"][:, :, None] & ready[None, None, :]
+        if name == "start_refurb":
+            bay_free, in_bay, waiting = c["refurb"]
+            return ready & bay_free & ~in_bay & ~waiting
+        if name == "run_check":
+            ok = exists & ~c["refurb"][1]
+            return np.repeat(ok[:, None], len(self.space.check_types), axis=1)
+        if name == "schedule_launch":
+            return (ready & (not c["comms"]))[:, None] & c["pads"][None, :]
+        return ready & (not c["comms"]) & c["orbit"]
+
+    def masks(self, units: Dict[str, Any], t: float) -> Dict[str, np.ndarray]:
+        self._refresh(units, t)
+        for name, deps in _DEPENDS.items():
+            gen = tuple(self._gen[k] for k in deps)
+            if self._mask_gen.get(name) != gen:
+                m = self._build(name)
+                m.flags.writeable = False
+                self._masks[name] = m
+                self._mask_gen[name] = gen
+        return dict(self._masks)
+
+    def check(self, units: Dict[str, Any], t: float, action: Action) -> Tuple[bool, str]:
+        """Scalar form of the mask rules for one action (schedule_launch is checked at its planned_time)."""
+        if action.name not in _DEPENDS:
+            return True, "ok"
+        self._refresh(units, t)
+        p, sp, c = action.params, self.space, self._comp
+        exists, ready = c["fleet"]
+        vid = p.get("vehicle_id", p.get("asset_id"))
+        v = self._vix.get(vid)
+        if v is None or not exists[v]:
+            return False, f"unknown vehicle {vid!r}"
+        if action.name == "run_check":
+            return (False, "vehicle is in a refurb bay") if c["refurb"][1][v] else (True, "ok")
+        if not ready[v]:
+            return False, "vehicle not ready"
+        if action.name == "transfer_propellant":
+            if p["depot_id"] not in sp.depots or p["prop"] not in sp.props:
+                return False, f"depot {p['depot_id']!r} does not stock {p['prop']!r}"
+            if not c["depot"][sp.depots.index(p["depot_id"]), sp.props.index(p["prop"])]:
+                return False, "depot tank empty"
+            return True, "ok"
+        if action.name == "start_refurb":
+            bay_free, in_bay, waiting = c["refurb"]
+            if in_bay[v] or waiting[v]:
+                return False, "vehicle already in refurb"
+            return (True, "ok") if bay_free else (False, "no free refurb bay")
+        if action.name == "schedule_launch":
+            tl = float(p["planned_time"])
+            rc = units.get("RangeAndComms")
+            if rc is not None and rc.is_blackout(tl):
+                return False, "comm blackout at launch time"
+            return (True, "ok") if self.pad_free(units, p["pad_id"], tl) else (False, f"pad {p['pad_id']!r} reserved")
+        if c["comms"]:
+            return False, "comm blackout"
+        return (True, "ok") if c["orbit"][v] else (False, "no dv remaining")
@@ -25,8 +25,8 @@ class ActorActions:
 
     # Refurb & checks
     @staticmethod
-    def start_refurb(vehicle_id: str, duration_hours: float) -> Action:
-        return Action("start_refurb", {"vehicle_id": vehicle_id, "duration_hours": duration_hours})
+    def start_refurb(vehicle_id: str, duration_hours: float, priority: float = 0.0) -> Action:
+        return Action("start_refurb", {"vehicle_id": vehicle_id, "duration_hours": duration_hours, "priority": priority})
 
     @staticmethod
     def run_check(vehicle_id: str, check_type: str) -> Action:
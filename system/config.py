@@ -8,3 +8,9 @@ class SimConfig:
 
     # Hard constraint penalty (treat as termination or huge cost)
     violation_penalty: float = 1e6
+    # Reject actions that fail the action-mask rules (empty tank, full bays, reserved pad, blackout, ...)
+    strict_actions: bool = False
+
+    # Per-phase / per-unit timing in Environment (see system.profiler); off costs one branch per step
+    profile: bool = False
+    profile_trace: bool = False   # also keep spans for a Chrome trace timeline
@@ -1,6 +1,9 @@
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import Dict
+from typing import Dict, Mapping, Sequence, Union
+import numpy as np
+
+from luna_facilities.system.counter import METRIC_NAMES
 
 @dataclass
 class CostModel:
@@ -9,3 +12,29 @@ class CostModel:
     """
     def total_cost(self, metrics: Dict[str, float], weights: Dict[str, float]) -> float:
         return sum(weights.get(k, 0.0) * metrics.get(k, 0.0) for k in weights.keys())
+
+    @staticmethod
+    def weight_vector(weights: Mapping[str, float], metric_names: Sequence[str] = METRIC_NAMES) -> np.ndarray:
+        """
+        Compile a weights dict into a vector aligned with `metric_names`. Weighted
+        metrics missing from `metric_names` raise ValueError (they cannot be scored).
+        """
+        missing = [k for k, w in weights.items() if w and k not in metric_names]
+        if missing:
+            raise ValueError(f"weighted metrics not in metric_names: {missing}")
+        return np.array([float(weights.get(k, 0.0)) for k in metric_names])
+
+    @classmethod
+    def weight_matrix(cls, candidates: Sequence[Mapping[str, float]], metric_names: Sequence[str] = METRIC_NAMES) -> np.ndarray:
+        """(candidates, metrics) matrix of compiled weight vectors."""
+        return np.stack([cls.weight_vector(w, metric_names) for w in candidates]) if candidates else np.zeros((0, len(metric_names)))
+
+    def batch_cost(self, metrics: np.ndarray, weights: Union[Mapping[str, float], np.ndarray],
+                   metric_names: Sequence[str] = METRIC_NAMES) -> np.ndarray:
+        """
+        Cost of every row of a (steps, metrics) array in one product. `weights` is a
+        dict, a compiled (metrics,) vector, or a (candidates, metrics) matrix, which
+        gives a (steps, candidates) result.
+        """
+        w = self.weight_vector(weights, metric_names) if isinstance(weights, Mapping) else np.asarray(weights, dtype=np.float64)
+        return np.asarray(metrics, dtype=np.float64) @ w.T
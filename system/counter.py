@@ -1,13 +1,27 @@
 from __future__ import annotations
 from dataclasses import dataclass, field
-from typing import Dict
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+import math
+import numpy as np
 from luna_facilities.core.unit import Unit
 from luna_facilities.core.snapshot import Snapshot
+from luna_facilities.core.observation import ObservationSpec, UnitLayout
+
+# Column order for per-step metric arrays (rollouts, recordings, CostModel.batch_cost)
+METRIC_NAMES = ("lateness", "propellant_used", "energy_used", "refurb_hours", "risk", "violations", "parts_cost")
+
+# Metrics read from the current state each step; all others are flows summed from unit deltas
+LEVEL_METRICS = frozenset({"refurb_hours"})
 
 @dataclass
 class SystemCounter(Unit):
     """
     Read-only aggregator: computes metrics and exposes them to CostModel.
+
+    Flow metrics (lateness, propellant_used, energy_used, risk, violations,
+    parts_cost) come from the deltas units emit as things happen (Unit.emit);
+    each step drains them, so the cost is O(units), not O(state). Totals use
+    math.fsum and do not depend on unit order.
     """
     name: str = "SystemCounter"
     weights: Dict[str, float] = field(default_factory=lambda: {
@@ -17,13 +31,24 @@ class SystemCounter(Unit):
         "refurb_hours": 0.2,
         "risk": 10.0,
         "violations": 1e6,
+        "parts_cost": 0.0,   # spares spend (PartsInventory orders); unweighted by default
     })
 
     def observe(self) -> Snapshot:
-        return Snapshot({"weights": self.weights})
+        return Snapshot({"weights": self.weights.copy()})
 
-    def compute_metrics(self, snaps: Dict[str, Snapshot]) -> Dict[str, float]:
-        # Keep this deterministic and read-only
+    def obs_layout(self, spec: ObservationSpec) -> Tuple[List[str], Dict[str, Any]]:
+        keys = tuple(self.weights.keys())
+        return [f"weights.{k}" for k in keys], {"keys": keys}
+
+    def observe_into(self, buf: np.ndarray, layout: UnitLayout) -> None:
+        for i, k in enumerate(layout.index["keys"]):
+            buf[i] = self.weights.get(k, 0.0)
+
+    def compute_metrics(self, snaps: Dict[str, Snapshot], units: Optional[Dict[str, Unit]] = None,
+                        extra: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+        """Level metrics from `snaps`, plus flows drained from `units` and any environment-level `extra` deltas."""
+        # Keep this deterministic (draining deltas is the only side effect)
         m = {
             "lateness": 0.0,
             "propellant_used": 0.0,
@@ -31,6 +56,7 @@ class SystemCounter(Unit):
             "refurb_hours": 0.0,
             "risk": 0.0,
             "violations": 0.0,
+            "parts_cost": 0.0,
         }
 
         # Example: refurb queue pressure as a proxy
@@ -39,4 +65,17 @@ class SystemCounter(Unit):
             in_service = refurb.data.get("in_service", {})
             m["refurb_hours"] = float(sum(max(0.0, v) for v in in_service.values()))
 
+        if units is not None:
+            deltas = [u.drain_deltas() for u in units.values()]
+            if extra:
+                deltas.append(extra)
+            m.update(self.sum_deltas(deltas))
         return m
+
+    @staticmethod
+    def sum_deltas(deltas: Iterable[Dict[str, float]]) -> Dict[str, float]:
+        parts: Dict[str, List[float]] = {}
+        for d in deltas:
+            for k, v in d.items():
+                parts.setdefault(k, []).append(v)
+        return {k: math.fsum(v) for k, v in parts.items()}
@@ -0,0 +1,90 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional, Sequence
+
+from luna_facilities.system.actor_actions import Action
+
+# handler(env, actions) -> one result per action; receives every action of its name submitted in a step, in order
+ActionHandler = Callable[[Any, List[Action]], Sequence[Any]]
+
+
+@dataclass(frozen=True)
+class ActionResult:
+    name: str
+    ok: bool
+    reason: str = "ok"
+    value: Any = None
+
+
+def _unit_handler(unit_name: str, method: str) -> ActionHandler:
+    # Resolve the unit on every call so restore()/unit replacement never leaves a stale bound method
+    def handler(env: Any, actions: List[Action]) -> Sequence[Any]:
+        return getattr(env.units[unit_name], method)(env, actions)
+    handler.__qualname__ = f"{unit_name}.{method}"
+    return handler
+
+
+class ActionRegistry:
+    """
+    Action name -> batch handler.
+
+    Units list the action names they apply in `handles_actions` and implement
+    `on_<name>(env, actions)`; `for_units` registers those. Other handlers can be
+    added with `register` (also usable as a decorator).
+    """
+
+    def __init__(self, handlers: Optional[Mapping[str, ActionHandler]] = None) -> None:
+        self.handlers: Dict[str, ActionHandler] = dict(handlers or {})
+
+    @classmethod
+    def for_units(cls, units: Mapping[str, Any]) -> "ActionRegistry":
+        reg = cls()
+        for unit_name, u in units.items():
+            for name in getattr(u, "handles_actions", ()):
+                if name in reg.handlers:
+                    raise ValueError(f"action {name!r} is handled by more than one unit ({unit_name!r} and {reg.handlers[name].__qualname__})")
+                reg.handlers[name] = _unit_handler(unit_name, "on_" + name)
+        return reg
+
+    def register(self, name: str, handler: Optional[Callable[..., Any]] = None, *, batched: bool = True):
+        """
+        Register `handler` for `name`, replacing any existing one. With batched=False
+        the handler takes (env, action) and returns a single result.
+        """
+        def deco(fn: Callable[..., Any]) -> Callable[..., Any]:
+            if batched:
+                self.handlers[name] = fn
+            else:
+                self.handlers[name] = lambda env, actions: [fn(env, a) for a in actions]
+            return fn
+        return deco if handler is None else deco(handler)
+
+    def unregister(self, name: str) -> None:
+        self.handlers.pop(name, None)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self.handlers
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.handlers)
+
+    def dispatch(self, env: Any, actions: Sequence[Action]) -> List[Any]:
+        """
+        Apply `actions` and return their results in submission order. Actions are
+        grouped by name (groups run in order of first appearance, each in submission
+        order) and each group goes to its handler in one call.
+        """
+        groups: Dict[str, List[int]] = {}
+        for i, a in enumerate(actions):
+            groups.setdefault(a.name, []).append(i)
+        out: List[Any] = [None] * len(actions)
+        for name, rows in groups.items():
+            handler = self.handlers.get(name)
+            if handler is None:
+                raise KeyError(f"no handler registered for action {name!r}")
+            values = handler(env, [actions[i] for i in rows])
+            if len(values) != len(rows):
+                raise ValueError(f"handler for {name!r} returned {len(values)} results for {len(rows)} actions")
+            for i, v in zip(rows, values):
+                out[i] = v
+        return out
@@ -1,13 +1,32 @@
 from __future__ import annotations
 from dataclasses import dataclass, field
-from typing import Dict, Any, Tuple
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+import math
+import pickle
 import random
+import numpy as np
 
+from luna_facilities.core.observation import BoundObservation, ObservationSpec
 from luna_facilities.core.snapshot import Snapshot
+from luna_facilities.system.action_mask import ActionMasker, ActionSpace
 from luna_facilities.system.actor_actions import Action
 from luna_facilities.system.config import SimConfig
-from luna_facilities.system.counter import SystemCounter
+from luna_facilities.system.counter import LEVEL_METRICS, SystemCounter
 from luna_facilities.system.cost import CostModel
+from luna_facilities.system.dispatch import ActionRegistry, ActionResult
+from luna_facilities.system.profiler import StepProfiler
+
+@dataclass(frozen=True)
+class EnvCheckpoint:
+    """Compact world state: the pickled unit dict plus RNG state and step count."""
+    units: bytes
+    rng_state: Any
+    step_count: int
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.units)
+
 
 @dataclass
 class Environment:
@@ -18,84 +37,310 @@ class Environment:
     rng: random.Random = field(default_factory=lambda: random.Random(0))
     step_count: int = 0
 
+    # name -> (unit, version, snapshot); a snapshot is reused until the unit's version moves
+    _snap_cache: Dict[str, Tuple[Any, int, Snapshot]] = field(default_factory=dict, init=False, repr=False, compare=False)
+    # Set when config.profile is on; None keeps step() on the untimed path
+    profiler: Optional[StepProfiler] = field(default=None, init=False, repr=False, compare=False)
+    # Action name -> handler; built from the units' handles_actions, extend with actions.register(...)
+    actions: ActionRegistry = field(default=None, init=False, repr=False, compare=False)
+    # Masker over the default ActionSpace.from_env, with the key counts it was built for (see _space_keys)
+    _masker: Optional[ActionMasker] = field(default=None, init=False, repr=False, compare=False)
+    _masker_keys: Tuple[Any, ...] = field(default=(), init=False, repr=False, compare=False)
+    _custom_masker: Optional[ActionMasker] = field(default=None, init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.actions = ActionRegistry.for_units(self.units)
+        self.bind_units()
+        if self.config.profile:
+            self.profiler = StepProfiler(trace=self.config.profile_trace)
+
+    def bind_units(self) -> None:
+        """Let units resolve references to each other (see Unit.bind); call again after swapping units."""
+        for u in self.units.values():
+            u.bind(self.units)
+
     def observe(self) -> Dict[str, Snapshot]:
-        return {name: u.observe() for name, u in self.units.items()}
+        cache = self._snap_cache
+        snaps = {}
+        for name, u in self.units.items():
+            hit = cache.get(name)
+            if hit is not None and hit[0] is u and hit[1] == u.version:
+                snaps[name] = hit[2]
+                continue
+            snap = u.observe()
+            cache[name] = (u, u.version, snap)
+            snaps[name] = snap
+        return snaps
+
+    def compile_observation(self, capacities: Optional[Dict[str, int]] = None) -> BoundObservation:
+        """Compile a flat ObservationSpec for the current units and bind it to a reusable buffer."""
+        return ObservationSpec.compile(self.units, capacities).bind(self.units)
 
     def validate_action(self, action: Action) -> Tuple[bool, str]:
-        # Central legality checks. Keep it strict later.
+        # Central legality checks; the unit-level rules only apply with config.strict_actions
+        if action.name not in self.actions:
+            return False, f"no handler for action {action.name!r}"
+        if self.config.strict_actions:
+            return self.masker().check(self.units, self.now(), action)
         return True, "ok"
 
-    def apply_action(self, action: Action) -> None:
-        # Route actions to the correct units
-        if action.name == "schedule_launch":
-            self.units["LaunchSchedule"].add_launch(
-                mission_id=action.params["mission_id"],
-                planned_time=float(action.params["planned_time"]),
-                vehicle_id=action.params["vehicle_id"],
-                pad_id=action.params["pad_id"],
-            )
-
-        elif action.name == "command_maneuver":
-            self.units["OrbitCatalog"].apply_maneuver(
-                asset_id=action.params["asset_id"],
-                dv=float(action.params["dv"]),
-            )
-
-        elif action.name == "transfer_propellant":
-            moved = self.units["PropellantDepot"].transfer(
-                depot_id=action.params["depot_id"],
-                prop=action.params["prop"],
-                amount_kg=float(action.params["amount_kg"]),
-            )
-            # If you want to actually put propellant into the vehicle:
-            fleet = self.units["VehicleFleet"].vehicles
-            vid = action.params["vehicle_id"]
-            if vid in fleet:
-                vobs = fleet[vid].observe()
-                # handle MK2 cryo tanks if present
-                if "propellant" in vobs:
-                    # NOTE: this is a minimalist patch—replace with explicit vehicle APIs if desired.
-                    if action.params["prop"] == "LOX":
-                        fleet[vid].lox.add(moved)
-                    elif action.params["prop"] == "LH2":
-                        fleet[vid].lh2.add(moved)
-
-        elif action.name == "start_refurb":
-            self.units["RefurbFacility"].start(
-                vehicle_id=action.params["vehicle_id"],
-                duration_hours=float(action.params["duration_hours"]),
-            )
-
-        elif action.name == "run_check":
-            # Delegate to inspection unit
-            insp = self.units["InspectionAndCheckout"]
-            vid = action.params["vehicle_id"]
-            ctype = action.params["check_type"]
-            if ctype == "completeness":
-                insp.run_completeness(vid, self.rng)
-            elif ctype == "functional":
-                insp.run_functional(vid, self.rng)
-            elif ctype == "post_refurb":
-                insp.run_post_refurb(vid, self.rng)
-
-    def step(self, action: Action) -> Tuple[Dict[str, Snapshot], float, bool, bool, Dict[str, Any]]:
+    def masker(self, space: Optional[ActionSpace] = None) -> ActionMasker:
+        """
+        The ActionMasker for `space`. Without one it is built over ActionSpace.from_env
+        and rebuilt when vehicles, depots, props or pads are added or removed, so
+        validate_action never sees a stale axis.
+        """
+        if space is not None:
+            if self._custom_masker is None or space != self._custom_masker.space:
+                self._custom_masker = ActionMasker(space)
+            return self._custom_masker
+        keys = self._space_keys()
+        if self._masker is None or keys != self._masker_keys:
+            default = ActionSpace.from_env(self)
+            if self._masker is None or default != self._masker.space:
+                self._masker = ActionMasker(default)
+            self._masker_keys = keys
+        return self._masker
+
+    def _space_keys(self) -> Tuple[Any, ...]:
+        # Cheap stand-in for ActionSpace.from_env: moves whenever one of its axes may have changed
+        u = self.units
+        fleet, dep = u.get("VehicleFleet"), u.get("PropellantDepot")
+        lsm, ls = u.get("LandingSiteManager"), u.get("LaunchSchedule")
+        return (
+            (id(fleet.vehicles), fleet.vehicles.generation) if fleet is not None else None,
+            (id(dep), len(dep.tanks), len(dep.props)) if dep is not None else None,
+            (id(lsm), len(lsm.pads)) if lsm is not None else None,
+            (id(ls), len(ls.manifest)) if ls is not None else None,
+        )
+
+    def action_mask(self, space: Optional[ActionSpace] = None) -> Dict[str, np.ndarray]:
+        """
+        Legality masks (action name -> read-only bool array over the ActionSpace axes)
+        for the current state. Only components whose units changed since the last call
+        are recomputed.
+        """
+        return self.masker(space).masks(self.units, self.now())
+
+    def apply_action(self, action: Action) -> Any:
+        """Route one action to its registered handler and return the handler's result."""
+        return self.actions.dispatch(self, [action])[0]
+
+    def apply_actions(self, actions: Union[Action, Sequence[Action], None]) -> List[ActionResult]:
+        """
+        Validate and apply a batch of actions within one step. Same-name actions
+        go to their handler together (see ActionRegistry.dispatch); rejected
+        actions are skipped. Results follow submission order.
+        """
+        if actions is None:
+            return []
+        if isinstance(actions, Action):
+            actions = [actions]
+        checks = [self.validate_action(a) for a in actions]
+        accepted = [a for a, (ok, _) in zip(actions, checks) if ok]
+        values = iter(self.actions.dispatch(self, accepted) if accepted else ())
+        return [ActionResult(a.name, ok, reason, next(values) if ok else None)
+                for a, (ok, reason) in zip(actions, checks)]
+
+    @staticmethod
+    def _action_info(results: List[ActionResult]) -> Dict[str, Any]:
+        # action_ok / action_reason summarize the batch (first rejection wins); per-action detail is in action_results
+        bad = next((r for r in results if not r.ok), None)
+        return {"action_ok": bad is None, "action_reason": "ok" if bad is None else bad.reason, "action_results": results}
+
+    @staticmethod
+    def _violations(results: List[ActionResult]) -> Optional[Dict[str, float]]:
+        # Every rejected action is a constraint violation for the step's metrics
+        bad = sum(1 for r in results if not r.ok)
+        return {"violations": float(bad)} if bad else None
+
+    def step(self, action: Union[Action, Sequence[Action]]) -> Tuple[Dict[str, Snapshot], float, bool, bool, Dict[str, Any]]:
+        """Apply one action or a list of actions (all within this step), then advance one step."""
+        if self.profiler is not None:
+            return self._step_profiled(action, self.profiler)
         dt = self.config.dt_hours
 
-        ok, reason = self.validate_action(action)
-        if ok:
-            self.apply_action(action)
+        results = self.apply_actions(action)
 
         # Exogenous evolution
         for u in self.units.values():
             u.step_exogenous(dt, self.rng)
 
         snaps = self.observe()
-        metrics = self.counter.compute_metrics(snaps)
+        metrics = self.counter.compute_metrics(snaps, self.units, self._violations(results))
+        cost = self.cost_model.total_cost(metrics, self.counter.weights)
+
+        self.step_count += 1
+        terminated = metrics.get("violations", 0.0) > 0.0
+        truncated = self.step_count >= self.config.episode_horizon_steps
+
+        info = {"metrics": metrics, **self._action_info(results)}
+        return snaps, cost, terminated, truncated, info
+
+    def _step_profiled(self, action: Union[Action, Sequence[Action]], prof: StepProfiler) -> Tuple[Dict[str, Snapshot], float, bool, bool, Dict[str, Any]]:
+        """step() with every phase and each unit's step_exogenous timed into `prof`."""
+        now, rec = prof.now, prof.record
+        dt = self.config.dt_hours
+        t_step = t0 = now()
+
+        results = self.apply_actions(action)
+        t1 = now()
+        rec("phase:apply_action", t0, t1, {"actions": [r.name for r in results]})
+
+        t_exo = t1
+        for name, u in self.units.items():
+            t0 = now()
+            u.step_exogenous(dt, self.rng)
+            t1 = now()
+            rec("unit:" + name, t0, t1)
+        rec("phase:step_exogenous", t_exo, t1)
+
+        snaps = self.observe()
+        t0, t1 = t1, now()
+        rec("phase:observe", t0, t1)
+        metrics = self.counter.compute_metrics(snaps, self.units, self._violations(results))
+        t0, t1 = t1, now()
+        rec("phase:compute_metrics", t0, t1)
         cost = self.cost_model.total_cost(metrics, self.counter.weights)
+        t0, t1 = t1, now()
+        rec("phase:cost", t0, t1)
 
         self.step_count += 1
         terminated = metrics.get("violations", 0.0) > 0.0
         truncated = self.step_count >= self.config.episode_horizon_steps
+        rec("phase:step", t_step, now(), {"step": self.step_count - 1})
+
+        info = {"metrics": metrics, **self._action_info(results)}
+        return snaps, cost, terminated, truncated, info
+
+    # ---- event-driven fast-forward ----
+
+    def now(self) -> float:
+        clock = self.units.get("MissionClock")
+        return clock.t if clock is not None else self.step_count * self.config.dt_hours
+
+    def next_event_time(self) -> Optional[float]:
+        """Earliest discrete event reported by any unit (refurb finish, shipment arrival, launch, blackout edge)."""
+        t = self.now()
+        times = [x for x in (u.next_event_time(t) for u in self.units.values()) if x is not None and x > t]
+        return min(times) if times else None
+
+    def step_until(self, t_stop: float, action: Union[Action, Sequence[Action], None] = None) -> Tuple[Dict[str, Snapshot], float, bool, bool, Dict[str, Any]]:
+        """
+        Apply `action` (one or a list, if any), then advance whole steps until `t_stop`, the next
+        unit event or the episode horizon, whichever comes first (at least one step).
+
+        The first and the last step run normally; the idle steps between them use each unit's
+        `step_exogenous_span`, and the event itself falls in the last step. Flow metrics are the
+        deltas units emitted over the span; level metrics (counter.LEVEL_METRICS) over steps
+        1..n-1 are summed with the trapezoid rule, which is exact because no event happens
+        before step n, and the last step adds its own levels. `info["steps"]` is the number of
+        steps taken.
+        """
+        prof = self.profiler
+        t_start = prof.now() if prof is not None else 0
+        dt = self.config.dt_hours
+        results = self.apply_actions(action)
+
+        # Events are read after the action, which may create new ones (e.g. a refurb start)
+        t = self.now()
+        stop = t_stop
+        event = self.next_event_time()
+        if event is not None:
+            stop = min(stop, event)
+        steps = max(1, math.ceil((stop - t) / dt - 1e-9)) if math.isfinite(stop) else 1 << 62
+        steps = max(1, min(steps, self.config.episode_horizon_steps - self.step_count))
+
+        self._step_units(dt, prof)
+        snaps = self.observe()
+        metrics = self.counter.compute_metrics(snaps, self.units, self._violations(results))
+
+        if steps > 1:
+            if steps > 2:
+                self._step_units(dt, prof, steps - 2)
+                idle = self.counter.compute_metrics(self.observe(), self.units)
+                # Flows drained after the span cover steps 2..n-1; levels are linear up to step n-1
+                metrics = {k: 0.5 * (steps - 1) * (metrics.get(k, 0.0) + idle.get(k, 0.0)) if k in LEVEL_METRICS
+                           else metrics.get(k, 0.0) + idle.get(k, 0.0) for k in metrics.keys() | idle.keys()}
+            self._step_units(dt, prof)
+            snaps = self.observe()
+            last = self.counter.compute_metrics(snaps, self.units)
+            metrics = {k: metrics.get(k, 0.0) + last.get(k, 0.0) for k in metrics.keys() | last.keys()}
+        cost = self.cost_model.total_cost(metrics, self.counter.weights)
+
+        self.step_count += steps
+        terminated = metrics.get("violations", 0.0) > 0.0
+        truncated = self.step_count >= self.config.episode_horizon_steps
+
+        if prof is not None:
+            prof.record("phase:step_until", t_start, prof.now(), {"step": self.step_count - steps, "steps": steps})
 
-        info = {"metrics": metrics, "action_ok": ok, "action_reason": reason}
+        info = {"metrics": metrics, "steps": steps, **self._action_info(results)}
         return snaps, cost, terminated, truncated, info
+
+    def _step_units(self, dt: float, prof: Optional[StepProfiler], span: int = 0) -> None:
+        """step_exogenous on every unit (or step_exogenous_span when `span` > 0), timed when profiling."""
+        if prof is None:
+            for u in self.units.values():
+                if span:
+                    u.step_exogenous_span(dt, span, self.rng)
+                else:
+                    u.step_exogenous(dt, self.rng)
+            return
+        for name, u in self.units.items():
+            t0 = prof.now()
+            if span:
+                u.step_exogenous_span(dt, span, self.rng)
+            else:
+                u.step_exogenous(dt, self.rng)
+            prof.record("unit:" + name, t0, prof.now(), {"span": span} if span else None)
+
+    def advance_to_next_event(self, action: Union[Action, Sequence[Action], None] = None) -> Tuple[Dict[str, Snapshot], float, bool, bool, Dict[str, Any]]:
+        """Fast-forward to the next unit event (or the horizon) and return the aggregated cost."""
+        return self.step_until(math.inf, action)
+
+    # ---- checkpoint / fork ----
+
+    def checkpoint(self) -> EnvCheckpoint:
+        """
+        Capture unit state, the RNG state and the step count. Config, counter and
+        cost model are treated as immutable and are not captured.
+        """
+        return EnvCheckpoint(pickle.dumps(self.units, pickle.HIGHEST_PROTOCOL), self.rng.getstate(), self.step_count)
+
+    def restore(self, token: EnvCheckpoint) -> None:
+        """
+        Roll back to `token`. Unit objects keep their identity (bound observations
+        and other holders stay valid); their versions move past anything cached.
+        """
+        units = pickle.loads(token.units)
+        for name, new in units.items():
+            cur = self.units.get(name)
+            if cur is None or type(cur) is not type(new):
+                self.units[name] = new
+                continue
+            version = cur.version + 1
+            # object.__getstate__ only exists from Python 3.11
+            getstate = getattr(new, "__getstate__", None)
+            state = getstate() if getstate is not None else new.__dict__
+            if hasattr(cur, "__setstate__"):
+                cur.__setstate__(state)
+            else:
+                cur.__dict__.clear()
+                cur.__dict__.update(state)
+            cur.version = version
+        for name in [n for n in self.units if n not in units]:
+            del self.units[name]
+        self.rng.setstate(token.rng_state)
+        self.step_count = token.step_count
+        self._snap_cache.clear()
+        self.bind_units()
+
+    def fork(self) -> "Environment":
+        """Independent copy for lookahead: one pickle round trip of units and RNG, sharing only immutable parts."""
+        units, rng = pickle.loads(pickle.dumps((self.units, self.rng), pickle.HIGHEST_PROTOCOL))
+        # A profiled parent yields profiled forks, each with its own (empty) profiler; handlers are copied over
+        child = Environment(config=self.config, units=units, counter=self.counter,
+                            cost_model=self.cost_model, rng=rng, step_count=self.step_count)
+        child.actions = ActionRegistry(self.actions.handlers)
+        return child
@@ -0,0 +1,270 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from statistics import NormalDist
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import math
+import multiprocessing as mp
+import random
+import numpy as np
+
+from luna_facilities.system.environment import Environment
+from luna_facilities.system.rollout import EnvFactory, Policy
+
+# success_fn(env, terminated) -> bool, evaluated once the episode stops (deadline, horizon or termination)
+SuccessFn = Callable[[Environment, bool], bool]
+
+
+class MCRandom(random.Random):
+    """
+    random.Random with variance-reduction hooks on random():
+
+    * strata: (k, n) per leading draw; draw i becomes (k_i + u) / n (Latin hypercube
+      when a block of replicas uses permutations of k),
+    * antithetic: every draw is mirrored to 1 - u.
+
+    Since random() is overridden, randrange/choice/shuffle also go through it
+    (CPython falls back to random()-based rejection sampling), so the whole
+    stream is mirrored consistently.
+    """
+
+    def __init__(self, seed: Any = None, antithetic: bool = False, strata: Sequence[Tuple[int, int]] = ()) -> None:
+        self._antithetic = antithetic
+        self._strata = tuple(strata)
+        self._i = 0
+        super().__init__(seed)
+
+    def random(self) -> float:
+        u = super().random()
+        if self._i < len(self._strata):
+            k, n = self._strata[self._i]
+            u = (k + u) / n
+            self._i += 1
+        if self._antithetic and u > 0.0:
+            u = 1.0 - u  # u == 0 stays 0 so the result remains in [0, 1)
+        return u
+
+    def getstate(self) -> Tuple[Any, ...]:
+        return super().getstate(), self._antithetic, self._strata, self._i
+
+    def setstate(self, state: Tuple[Any, ...]) -> None:
+        base, self._antithetic, self._strata, self._i = state
+        super().setstate(base)
+
+
+def not_terminated(env: Environment, terminated: bool) -> bool:
+    """Default success: the episode ran to its deadline without a violation."""
+    return not terminated
+
+
+@dataclass
+class MCEstimate:
+    costs: np.ndarray                    # (replicas,) episode cost
+    success: np.ndarray                  # (replicas,) bool
+    group_size: int                      # replicas averaged into one i.i.d. group
+    p_success: float
+    p_success_ci: Tuple[float, float]
+    cost_mean: float
+    cost_ci: Tuple[float, float]
+    cost_percentiles: Dict[float, float]
+    stopped_early: bool
+    # Paired against the baseline policy under common random numbers (compare() only)
+    delta_cost_ci: Optional[Tuple[float, float]] = None
+    delta_success_ci: Optional[Tuple[float, float]] = None
+
+    @property
+    def replicas(self) -> int:
+        return len(self.costs)
+
+
+# ---- worker side ----
+
+_MC: Dict[str, Any] = {}
+
+
+def _init_mc_worker(env_factory: EnvFactory, policies: Sequence[Policy], success_fn: SuccessFn,
+                    horizon: Optional[int], deadline_hours: Optional[float]) -> None:
+    _MC.clear()
+    _MC.update(env_factory=env_factory, policies=list(policies), success_fn=success_fn,
+               horizon=horizon, deadline_hours=deadline_hours)
+
+
+def _run_replica(policy: Policy, seed: int, antithetic: bool, strata: Tuple[Tuple[int, int], ...]) -> Tuple[float, bool]:
+    env = _MC["env_factory"](seed)
+    env.rng = MCRandom(seed, antithetic, strata)
+    rng = MCRandom(f"{seed}:policy", antithetic)  # same policy stream for every policy and both twins
+    horizon = _MC["horizon"] or env.config.episode_horizon_steps
+    if _MC["deadline_hours"] is not None:
+        horizon = min(horizon, math.ceil(_MC["deadline_hours"] / env.config.dt_hours - 1e-9))
+
+    obs = env.observe()
+    total, steps, terminated = 0.0, 0, False
+    while steps < horizon:
+        obs, cost, terminated, truncated, _ = env.step(policy(obs, rng))
+        total += cost
+        steps += 1
+        if terminated or truncated:
+            break
+    return total, bool(_MC["success_fn"](env, terminated))
+
+
+def _run_group(task: Tuple[int, int, int, int, bool, int]) -> Tuple[int, int, List[Tuple[float, bool]]]:
+    """One i.i.d. group: a Latin-hypercube block of `block` replicas, each with an optional antithetic twin."""
+    pi, g, base_seed, block, antithetic, stratify_draws = task
+    policy = _MC["policies"][pi]
+    perms = []
+    if block > 1 and stratify_draws > 0:
+        prng = random.Random(f"{base_seed}:{g}:strata")
+        perms = [prng.sample(range(block), block) for _ in range(stratify_draws)]
+    out = []
+    for j in range(block):
+        seed = base_seed + g * block + j
+        strata = tuple((p[j], block) for p in perms)
+        out.append(_run_replica(policy, seed, False, strata))
+        if antithetic:
+            out.append(_run_replica(policy, seed, True, strata))
+    return pi, g, out
+
+
+def _close_mc_worker() -> None:
+    _MC.clear()
+
+
+# ---- driver ----
+
+@dataclass
+class MonteCarloEstimator:
+    """
+    Campaign-level Monte Carlo over whole Environment episodes.
+
+    Replica randomness comes from env.rng, which feeds every stochastic unit
+    (ISRU uptime, inspection pass rates, logistics, and engine burns drawn
+    through it). It is replaced by an MCRandom keyed on the replica seed, so
+    different policies see identical draws (common random numbers). Replicas
+    are grouped into i.i.d. groups (a block of `stratify_block` replicas whose
+    first `stratify_draws` uniforms form a Latin hypercube, each with an
+    antithetic twin if enabled); confidence intervals are normal intervals
+    over group means. Groups run in rounds and estimation stops once the CI
+    of `stop_on` ("success" or "cost") is narrower than `target_ci_width`.
+    """
+    env_factory: EnvFactory
+    success_fn: SuccessFn = not_terminated
+    horizon: Optional[int] = None
+    deadline_hours: Optional[float] = None
+    antithetic: bool = False
+    stratify_block: int = 1
+    stratify_draws: int = 1
+    confidence: float = 0.95
+    target_ci_width: Optional[float] = None
+    stop_on: str = "success"
+    min_groups: int = 10
+    max_replicas: int = 10000
+    round_groups: int = 16
+    num_workers: int = 0                 # 0 runs in-process
+    mp_context: Optional[str] = None
+    percentiles: Tuple[float, ...] = (5.0, 50.0, 95.0)
+
+    _z: float = field(default=0.0, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        if self.stop_on not in ("success", "cost"):
+            raise ValueError(f"stop_on must be 'success' or 'cost', got {self.stop_on!r}")
+        self._z = NormalDist().inv_cdf(0.5 + self.confidence / 2.0)
+
+    @property
+    def group_size(self) -> int:
+        return max(1, self.stratify_block) * (2 if self.antithetic else 1)
+
+    def estimate(self, policy: Policy, base_seed: int = 0) -> MCEstimate:
+        return self.compare([policy], base_seed)[0]
+
+    def compare(self, policies: Sequence[Policy], base_seed: int = 0) -> List[MCEstimate]:
+        """Estimate each policy on the same replica seeds; later policies get paired deltas against the first."""
+        block = max(1, self.stratify_block)
+        max_groups = max(1, self.max_replicas // self.group_size)
+        results: List[Dict[int, List[Tuple[float, bool]]]] = [{} for _ in policies]
+        initargs = (self.env_factory, list(policies), self.success_fn, self.horizon, self.deadline_hours)
+
+        def tasks(g0: int, g1: int):
+            return [(pi, g, base_seed, block, self.antithetic, self.stratify_draws)
+                    for g in range(g0, g1) for pi in range(len(policies))]
+
+        pool = None
+        if self.num_workers > 0:
+            pool = mp.get_context(self.mp_context).Pool(self.num_workers, initializer=_init_mc_worker, initargs=initargs)
+            run = lambda ts: pool.map(_run_group, ts)
+        else:
+            _init_mc_worker(*initargs)
+            run = lambda ts: [_run_group(t) for t in ts]
+
+        done, stopped = 0, False
+        try:
+            while done < max_groups:
+                nxt = min(max_groups, done + max(1, self.round_groups))
+                for pi, g, out in run(tasks(done, nxt)):
+                    results[pi][g] = out
+                done = nxt
+                if self._converged(results, done):
+                    stopped = done < max_groups
+                    break
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+            else:
+                _close_mc_worker()
+
+        return self._summarize(results, done, stopped)
+
+    # ---- statistics ----
+
+    def _arrays(self, groups: Dict[int, List[Tuple[float, bool]]], n: int) -> Tuple[np.ndarray, np.ndarray]:
+        rows = [r for g in range(n) for r in groups[g]]
+        costs = np.array([c for c, _ in rows], dtype=np.float64)
+        success = np.array([s for _, s in rows], dtype=bool)
+        return costs, success
+
+    def _group_means(self, x: np.ndarray) -> np.ndarray:
+        return x.reshape(-1, self.group_size).mean(axis=1)
+
+    def _ci(self, group_means: np.ndarray) -> Tuple[float, float]:
+        m = float(group_means.mean())
+        if len(group_means) < 2:
+            return -math.inf, math.inf
+        half = self._z * float(group_means.std(ddof=1)) / math.sqrt(len(group_means))
+        return m - half, m + half
+
+    def _converged(self, results: List[Dict[int, List[Tuple[float, bool]]]], n: int) -> bool:
+        if self.target_ci_width is None or n < self.min_groups:
+            return False
+        for groups in results:
+            costs, success = self._arrays(groups, n)
+            x = success.astype(np.float64) if self.stop_on == "success" else costs
+            lo, hi = self._ci(self._group_means(x))
+            if hi - lo > self.target_ci_width:
+                return False
+        return True
+
+    def _summarize(self, results: List[Dict[int, List[Tuple[float, bool]]]], n: int, stopped: bool) -> List[MCEstimate]:
+        out: List[MCEstimate] = []
+        base: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        for groups in results:
+            costs, success = self._arrays(groups, n)
+            sf = success.astype(np.float64)
+            est = MCEstimate(
+                costs=costs,
+                success=success,
+                group_size=self.group_size,
+                p_success=float(sf.mean()),
+                p_success_ci=self._ci(self._group_means(sf)),
+                cost_mean=float(costs.mean()),
+                cost_ci=self._ci(self._group_means(costs)),
+                cost_percentiles={q: float(v) for q, v in zip(self.percentiles, np.percentile(costs, self.percentiles))},
+                stopped_early=stopped,
+            )
+            if base is None:
+                base = (costs, sf)
+            else:
+                est.delta_cost_ci = self._ci(self._group_means(costs - base[0]))
+                est.delta_success_ci = self._ci(self._group_means(sf - base[1]))
+            out.append(est)
+        return out
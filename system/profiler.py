@@ -0,0 +1,129 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+import json
+import time
+
+# Histogram buckets: exact below 4 ns, then 4 linear sub-buckets per power of two (<= 12.5% relative error)
+_SUB = 4
+_NBUCKETS = (64 - 2) * _SUB
+
+
+def _bucket(ns: int) -> int:
+    b = ns.bit_length()
+    if b <= 2:
+        return ns
+    return (b - 2) * _SUB + ((ns >> (b - 3)) & (_SUB - 1))
+
+
+def _bucket_mid(i: int) -> float:
+    if i < _SUB:
+        return float(i)
+    b, sub = i // _SUB + 2, i % _SUB
+    low = (_SUB + sub) << (b - 3)
+    return low + ((1 << (b - 3)) - 1) / 2.0
+
+
+class LatencyHistogram:
+    """Log-linear nanosecond histogram with count, total and max."""
+    __slots__ = ("counts", "count", "total_ns", "max_ns")
+
+    def __init__(self) -> None:
+        self.counts = [0] * _NBUCKETS
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def add(self, ns: int) -> None:
+        self.counts[_bucket(ns)] += 1
+        self.count += 1
+        self.total_ns += ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+
+    def percentile(self, q: float) -> float:
+        """Approximate q-th percentile (0-100) in nanoseconds."""
+        if not self.count:
+            return 0.0
+        rank = q / 100.0 * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if c and seen >= rank:
+                return min(_bucket_mid(i), float(self.max_ns))
+        return float(self.max_ns)
+
+
+@dataclass
+class StepProfiler:
+    """
+    Per-phase and per-unit timing for Environment, enabled by SimConfig.profile.
+
+    Keys are "phase:<name>" (step, apply_action, step_exogenous,
+    observe, compute_metrics, cost, step_until) and "unit:<name>" for each unit's
+    step_exogenous. With `trace`, spans are also kept (up to `max_trace_events`)
+    for a Chrome trace timeline (chrome://tracing or Perfetto).
+    """
+    trace: bool = False
+    max_trace_events: int = 1_000_000
+    hist: Dict[str, LatencyHistogram] = field(default_factory=dict)
+    events: List[Tuple[str, int, int, Optional[Dict[str, Any]]]] = field(default_factory=list, repr=False)
+    dropped_events: int = 0
+    _origin_ns: int = field(default_factory=time.perf_counter_ns, repr=False)
+
+    now = staticmethod(time.perf_counter_ns)
+
+    def record(self, key: str, t0: int, t1: int, args: Optional[Dict[str, Any]] = None) -> None:
+        h = self.hist.get(key)
+        if h is None:
+            h = self.hist[key] = LatencyHistogram()
+        h.add(t1 - t0)
+        if self.trace:
+            if len(self.events) < self.max_trace_events:
+                self.events.append((key, t0, t1, args))
+            else:
+                self.dropped_events += 1
+
+    def reset(self) -> None:
+        self.hist.clear()
+        self.events.clear()
+        self.dropped_events = 0
+        self._origin_ns = time.perf_counter_ns()
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """key -> count, total_ms, mean_us, p50_us, p95_us, p99_us, max_us (sorted by total time)."""
+        rows = {}
+        for key, h in sorted(self.hist.items(), key=lambda kv: -kv[1].total_ns):
+            rows[key] = {
+                "count": h.count,
+                "total_ms": h.total_ns / 1e6,
+                "mean_us": h.total_ns / h.count / 1e3 if h.count else 0.0,
+                "p50_us": h.percentile(50) / 1e3,
+                "p95_us": h.percentile(95) / 1e3,
+                "p99_us": h.percentile(99) / 1e3,
+                "max_us": h.max_ns / 1e3,
+            }
+        return rows
+
+    def report(self) -> str:
+        lines = [f"{'key':<40} {'count':>8} {'total ms':>10} {'mean us':>9} {'p50 us':>9} {'p95 us':>9} {'p99 us':>9} {'max us':>9}"]
+        for key, r in self.summary().items():
+            lines.append(f"{key:<40} {r['count']:>8} {r['total_ms']:>10.2f} {r['mean_us']:>9.2f} {r['p50_us']:>9.2f} "
+                         f"{r['p95_us']:>9.2f} {r['p99_us']:>9.2f} {r['max_us']:>9.2f}")
+        return "\n".join(lines)
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        events = []
+        for key, t0, t1, args in self.events:
+            cat, _, name = key.partition(":")
+            ev = {"name": name, "cat": cat, "ph": "X", "pid": 0, "tid": 0,
+                  "ts": (t0 - self._origin_ns) / 1e3, "dur": (t1 - t0) / 1e3}
+            if args:
+                ev["args"] = args
+            events.append(ev)
+        return {"traceEvents": events, "displayTimeUnit": "ms",
+                "otherData": {"dropped_events": self.dropped_events}}
+
+    def write_chrome_trace(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump(self.chrome_trace(), f)
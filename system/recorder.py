@@ -0,0 +1,334 @@
+from __future__ import annotations
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple, Union
+import json
+import os
+import numpy as np
+
+from luna_facilities.core.observation import BoundObservation, ObservationSpec
+from luna_facilities.system.actor_actions import Action
+from luna_facilities.system.counter import METRIC_NAMES
+
+SCHEMA_FILE = "schema.json"
+FORMAT_VERSION = 2   # 2: action / action_params gained a per-step action slot axis
+
+# Action parameter columns: numeric ones are stored as-is, categorical ones through an ObservationSpec vocab
+# (vehicle ids share the "vehicle" vocab with observations). Absent parameters are NaN.
+ACTION_PARAMS: Dict[str, Optional[str]] = {
+    "mission_id": "mission",
+    "planned_time": None,
+    "vehicle_id": "vehicle",
+    "pad_id": "pad",
+    "asset_id": "asset",
+    "dv": None,
+    "purpose": "purpose",
+    "depot_id": "depot",
+    "prop": "prop",
+    "amount_kg": None,
+    "duration_hours": None,
+    "priority": None,
+    "check_type": "check_type",
+}
+
+
+def _chunk_name(k: int) -> str:
+    return f"chunk_{k:05d}"
+
+
+@dataclass
+class TrajectoryRecorder:
+    """
+    Streams steps to `path` as fixed-schema columnar chunks of `chunk_steps` rows.
+
+    Columns: one observation block per unit (its ObservationSpec slice), action
+    name codes and parameters (`max_actions` slots per step, for the action
+    batches Environment.step takes; unused slots are code 0), cost, metrics,
+    episode, step, terminated and truncated. Uncompressed chunks are one .npy
+    per column (memory-mappable); with `compress` each chunk is a single
+    compressed .npz that readers load a chunk at a time. Only the current
+    chunk is held in memory.
+
+        with TrajectoryRecorder(path, spec) as rec:
+            rec.start_episode(env.units)
+            obs, cost, term, trunc, info = env.step(action)
+            rec.record(action, cost, term, trunc, info)
+    """
+    path: str
+    spec: ObservationSpec
+    chunk_steps: int = 4096
+    compress: bool = False
+    metric_names: Tuple[str, ...] = METRIC_NAMES
+    action_params: Tuple[str, ...] = tuple(ACTION_PARAMS)
+    max_actions: int = 1
+
+    chunks: List[Dict[str, Any]] = field(default_factory=list, init=False)
+    _bound: Optional[BoundObservation] = field(default=None, init=False, repr=False)
+    _cols: Dict[str, np.ndarray] = field(default_factory=dict, init=False, repr=False)
+    _n: int = field(default=0, init=False, repr=False)
+    _episode: int = field(default=-1, init=False, repr=False)
+    _step: int = field(default=0, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        os.makedirs(self.path, exist_ok=True)
+        T = self.chunk_steps
+        self._cols = {f"obs.{name}": np.zeros((T, layout.size), dtype=np.float32) for name, layout in self.spec.layouts.items()}
+        self._cols.update(
+            action=np.zeros((T, self.max_actions), dtype=np.int32),
+            action_params=np.zeros((T, self.max_actions, len(self.action_params)), dtype=np.float64),
+            cost=np.zeros(T, dtype=np.float64),
+            metrics=np.zeros((T, len(self.metric_names)), dtype=np.float64),
+            episode=np.zeros(T, dtype=np.int64),
+            step=np.zeros(T, dtype=np.int64),
+            terminated=np.zeros(T, dtype=bool),
+            truncated=np.zeros(T, dtype=bool),
+        )
+
+    def __enter__(self) -> "TrajectoryRecorder":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def start_episode(self, units: Mapping[str, Any], episode: Optional[int] = None) -> int:
+        """Bind the spec to this episode's units; episode ids default to a running counter."""
+        self._episode = self._episode + 1 if episode is None else episode
+        self._step = 0
+        self._bound = self.spec.bind(units)
+        return self._episode
+
+    def record(self, action: Union[Action, Sequence[Action], None], cost: float, terminated: bool, truncated: bool,
+               info: Mapping[str, Any]) -> None:
+        """
+        Append one step; `action` is what was passed to env.step (one action, a
+        list of up to `max_actions`, or None). The observation is read from the
+        bound units (post-step state).
+        """
+        if self._bound is None:
+            raise RuntimeError("call start_episode() before record()")
+        actions = [] if action is None else [action] if isinstance(action, Action) else list(action)
+        if len(actions) > self.max_actions:
+            raise ValueError(f"step has {len(actions)} actions but the recorder was created with "
+                             f"max_actions={self.max_actions}")
+        i, c, spec = self._n, self._cols, self.spec
+        buf = self._bound.fill()
+        for name, layout in spec.layouts.items():
+            c[f"obs.{name}"][i] = buf[layout.offset:layout.offset + layout.size]
+
+        codes, params = c["action"][i], c["action_params"][i]
+        codes.fill(0)
+        params.fill(np.nan)
+        for a, (act, row) in enumerate(zip(actions, params)):
+            codes[a] = int(spec.code("action", act.name))
+            for j, k in enumerate(self.action_params):
+                v = act.params.get(k)
+                if v is not None:
+                    vocab = ACTION_PARAMS.get(k)
+                    row[j] = spec.code(vocab, v) if vocab is not None else float(v)
+
+        m = info.get("metrics", {})
+        c["metrics"][i] = [m.get(k, 0.0) for k in self.metric_names]
+        c["cost"][i] = cost
+        c["episode"][i] = self._episode
+        c["step"][i] = self._step
+        c["terminated"][i] = terminated
+        c["truncated"][i] = truncated
+        self._step += 1
+        self._n += 1
+        if self._n == self.chunk_steps:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write the buffered rows as a new chunk and refresh the schema."""
+        n = self._n
+        if n == 0:
+            return
+        name = _chunk_name(len(self.chunks))
+        if self.compress:
+            np.savez_compressed(os.path.join(self.path, name + ".npz"), **{k: v[:n] for k, v in self._cols.items()})
+        else:
+            d = os.path.join(self.path, name)
+            os.makedirs(d, exist_ok=True)
+            for k, v in self._cols.items():
+                np.save(os.path.join(d, k + ".npy"), v[:n])
+        ep = self._cols["episode"][:n]
+        self.chunks.append({"name": name, "rows": n, "compressed": self.compress,
+                            "first_episode": int(ep[0]), "last_episode": int(ep[-1])})
+        self._n = 0
+        self._write_schema()
+
+    def close(self) -> None:
+        self.flush()
+        self._write_schema()
+        self._bound = None
+
+    def _write_schema(self) -> None:
+        spec = self.spec
+        schema = {
+            "format": FORMAT_VERSION,
+            "units": {name: {"offset": l.offset, "columns": list(l.columns)} for name, l in spec.layouts.items()},
+            "obs_size": spec.size,
+            "metric_names": list(self.metric_names),
+            "action_params": list(self.action_params),
+            "max_actions": self.max_actions,
+            "vocab": {k: dict(v) for k, v in spec.vocab.items()},
+            "chunks": self.chunks,
+        }
+        tmp = os.path.join(self.path, SCHEMA_FILE + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(schema, f)
+        os.replace(tmp, os.path.join(self.path, SCHEMA_FILE))
+
+
+class TrajectoryReader:
+    """
+    Random access over a recorded directory. Uncompressed chunks are opened with
+    np.load(mmap_mode="r"), so only touched pages are read; compressed chunks
+    are decompressed one at a time and kept in a small LRU (`cache_chunks`).
+    """
+
+    def __init__(self, path: str, cache_chunks: int = 4) -> None:
+        self.path = path
+        with open(os.path.join(path, SCHEMA_FILE)) as f:
+            self.schema = json.load(f)
+        self.units: Tuple[str, ...] = tuple(self.schema["units"])
+        self.metric_names: Tuple[str, ...] = tuple(self.schema["metric_names"])
+        self.action_params: Tuple[str, ...] = tuple(self.schema["action_params"])
+        self.max_actions: int = self.schema.get("max_actions", 1)
+        self.vocab: Dict[str, Dict[str, int]] = self.schema["vocab"]
+        self._decode = {k: {c: v for v, c in table.items()} for k, table in self.vocab.items()}
+        chunks = self.schema["chunks"]
+        self._bounds = np.cumsum([0] + [c["rows"] for c in chunks])
+        self._mmaps: Dict[int, Dict[str, np.ndarray]] = {}
+        self._lru: "OrderedDict[int, Dict[str, np.ndarray]]" = OrderedDict()
+        self._cache_chunks = max(1, cache_chunks)
+        self._episodes: Optional[Dict[int, Tuple[int, int]]] = None
+
+    def __len__(self) -> int:
+        return int(self._bounds[-1])
+
+    @property
+    def num_chunks(self) -> int:
+        return len(self._bounds) - 1
+
+    def decode(self, vocab: str, code: float) -> Any:
+        """Inverse of ObservationSpec.code for a recorded vocab (None for 0/NaN)."""
+        if not code == code or code == 0:
+            return None
+        return self._decode.get(vocab, {}).get(int(code))
+
+    def _chunk(self, k: int) -> Dict[str, np.ndarray]:
+        meta = self.schema["chunks"][k]
+        if not meta["compressed"]:
+            cols = self._mmaps.get(k)
+            if cols is None:
+                d = os.path.join(self.path, meta["name"])
+                cols = self._mmaps[k] = _LazyColumns(d)
+            return cols
+        cols = self._lru.get(k)
+        if cols is None:
+            with np.load(os.path.join(self.path, meta["name"] + ".npz")) as z:
+                cols = {name: z[name] for name in z.files}
+            self._lru[k] = cols
+            if len(self._lru) > self._cache_chunks:
+                self._lru.popitem(last=False)
+        else:
+            self._lru.move_to_end(k)
+        return cols
+
+    def _columns(self, units: Optional[Sequence[str]]) -> List[str]:
+        units = self.units if units is None else units
+        return [f"obs.{u}" for u in units] + ["action", "action_params", "cost", "metrics",
+                                              "episode", "step", "terminated", "truncated"]
+
+    def rows(self, idx: Sequence[int], units: Optional[Sequence[str]] = None) -> Dict[str, np.ndarray]:
+        """Gather global rows `idx` (any order); `obs` concatenates the requested units' blocks."""
+        idx = np.asarray(idx, dtype=np.int64)
+        chunk = np.searchsorted(self._bounds, idx, side="right") - 1
+        names = self._columns(units)
+        out: Dict[str, np.ndarray] = {}
+        for k in np.unique(chunk):
+            sel = np.flatnonzero(chunk == k)
+            local = idx[sel] - self._bounds[k]
+            cols = self._chunk(int(k))
+            for name in names:
+                src = cols[name]
+                dst = out.get(name)
+                if dst is None:
+                    dst = out[name] = np.empty((len(idx),) + src.shape[1:], dtype=src.dtype)
+                dst[sel] = src[local]
+        obs_names = [n for n in names if n.startswith("obs.")]
+        out["obs"] = np.concatenate([out.pop(n) for n in obs_names], axis=1) if obs_names else np.zeros((len(idx), 0), np.float32)
+        return out
+
+    def iter_columns(self, names: Sequence[str]) -> Iterator[Dict[str, np.ndarray]]:
+        """Stream the named columns chunk by chunk, in row order."""
+        for k in range(self.num_chunks):
+            cols = self._chunk(k)
+            yield {name: cols[name] for name in names}
+
+    def sample(self, batch_size: int, rng: Optional[np.random.Generator] = None,
+               units: Optional[Sequence[str]] = None) -> Dict[str, np.ndarray]:
+        """Uniform minibatch of steps across all episodes."""
+        rng = rng if rng is not None else np.random.default_rng()
+        return self.rows(rng.integers(0, len(self), size=batch_size), units)
+
+    def episodes(self) -> Dict[int, Tuple[int, int]]:
+        """episode id -> (first row, end row); episodes are recorded contiguously."""
+        if self._episodes is None:
+            eps: Dict[int, Tuple[int, int]] = {}
+            for k in range(self.num_chunks):
+                col = np.asarray(self._chunk(k)["episode"])
+                if len(col) == 0:
+                    continue
+                starts = np.flatnonzero(np.r_[True, col[1:] != col[:-1]])
+                ends = np.r_[starts[1:], len(col)]
+                base = int(self._bounds[k])
+                for s, e in zip(starts, ends):
+                    ep = int(col[s])
+                    first, _ = eps.get(ep, (base + int(s), 0))
+                    eps[ep] = (first, base + int(e))
+            self._episodes = eps
+        return self._episodes
+
+    def episode(self, episode: int, units: Optional[Sequence[str]] = None) -> Dict[str, np.ndarray]:
+        """All steps of one episode in order, for replay."""
+        first, end = self.episodes()[episode]
+        return self.rows(np.arange(first, end), units)
+
+    def actions(self, rows: Mapping[str, np.ndarray]) -> List[Union[Optional[Action], List[Action]]]:
+        """
+        Rebuild each row's actions from gathered `action` / `action_params` columns:
+        an Action (or None) per row for recordings with max_actions=1, otherwise the
+        row's list of Actions in submission order.
+        """
+        codes, params = np.asarray(rows["action"]), np.asarray(rows["action_params"])
+        if codes.ndim == 1:  # format 1: one action per step
+            codes, params = codes[:, None], params[:, None, :]
+        out: List[Union[Optional[Action], List[Action]]] = []
+        for row_codes, row_params in zip(codes, params):
+            acts = []
+            for code, values in zip(row_codes, row_params):
+                name = self.decode("action", code)
+                if name is None:
+                    continue
+                p = {}
+                for k, v in zip(self.action_params, values):
+                    if v == v:
+                        vocab = ACTION_PARAMS.get(k)
+                        p[k] = self.decode(vocab, v) if vocab is not None else float(v)
+                acts.append(Action(name, p))
+            out.append(acts if self.max_actions > 1 else (acts[0] if acts else None))
+        return out
+
+
+class _LazyColumns(dict):
+    """Column name -> memory-mapped .npy, opened on first access."""
+
+    def __init__(self, directory: str) -> None:
+        super().__init__()
+        self._dir = directory
+
+    def __missing__(self, name: str) -> np.ndarray:
+        arr = self[name] = np.load(os.path.join(self._dir, name + ".npy"), mmap_mode="r")
+        return arr
@@ -0,0 +1,154 @@
+"""
+Offline re-scoring: returns of recorded episodes under new SystemCounter weights, without re-simulating.
+
+    python -m luna_facilities.system.rescore RECORDING [--weights sweep.json] [--grid risk=0,10,50 lateness=0.5,1,2]
+                                             [--gamma 1.0] [--top 10] [--out returns.npz]
+
+Cost is linear in the metrics, so an episode's (discounted) cost under any
+weighting is its discounted metric totals dotted with the weight vector: one
+pass over the recorded metrics gives (episodes, metrics) totals, and any number
+of candidate weightings is then a single (episodes x metrics) @ (metrics x
+candidates) product. Dynamics do not depend on the weights, but terminations
+(violations) and policy behaviour recorded under the old weights are kept as-is.
+"""
+from __future__ import annotations
+import argparse
+import itertools
+import json
+import sys
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from luna_facilities.system.cost import CostModel
+from luna_facilities.system.counter import METRIC_NAMES, SystemCounter
+
+
+@dataclass
+class EpisodeTotals:
+    episodes: np.ndarray        # (E,) episode ids, ascending
+    totals: np.ndarray          # (E, metrics) discounted metric sums
+    steps: np.ndarray           # (E,) recorded steps per episode
+    metric_names: Tuple[str, ...]
+    gamma: float
+
+    def returns(self, candidates: Sequence[Mapping[str, float]]) -> np.ndarray:
+        """(E, candidates) discounted episode cost for each candidate weighting."""
+        return self.totals @ CostModel.weight_matrix(candidates, self.metric_names).T
+
+
+def episode_totals(metrics: np.ndarray, episode: np.ndarray, step: np.ndarray, gamma: float = 1.0,
+                   metric_names: Sequence[str] = METRIC_NAMES) -> EpisodeTotals:
+    """Per-episode sums of gamma**step * metrics over (rows, metrics) arrays."""
+    return _accumulate([(metrics, episode, step)], gamma, tuple(metric_names))
+
+
+def _accumulate(chunks: Iterable[Tuple[np.ndarray, np.ndarray, np.ndarray]], gamma: float,
+                names: Tuple[str, ...]) -> EpisodeTotals:
+    sums: Dict[int, np.ndarray] = {}
+    counts: Dict[int, int] = {}
+    for metrics, episode, step in chunks:
+        metrics = np.asarray(metrics, dtype=np.float64)
+        episode = np.asarray(episode, dtype=np.int64)
+        if len(episode) == 0:
+            continue
+        weighted = metrics if gamma == 1.0 else metrics * np.power(gamma, np.asarray(step, dtype=np.float64))[:, None]
+        ids, inv = np.unique(episode, return_inverse=True)
+        # bincount per metric column: a sum per episode without a Python loop over rows
+        part = np.stack([np.bincount(inv, weights=weighted[:, j], minlength=len(ids)) for j in range(metrics.shape[1])], axis=1) \
+            if metrics.shape[1] else np.zeros((len(ids), 0))
+        n = np.bincount(inv, minlength=len(ids))
+        for e, row, c in zip(ids.tolist(), part, n.tolist()):
+            if e in sums:
+                sums[e] += row
+                counts[e] += c
+            else:
+                sums[e], counts[e] = row.copy(), c
+    eps = np.array(sorted(sums), dtype=np.int64)
+    totals = np.stack([sums[e] for e in eps.tolist()]) if len(eps) else np.zeros((0, len(names)))
+    return EpisodeTotals(eps, totals, np.array([counts[e] for e in eps.tolist()], dtype=np.int64), names, gamma)
+
+
+def recording_totals(reader, gamma: float = 1.0) -> EpisodeTotals:
+    """One streaming pass over a TrajectoryReader (or recording directory)."""
+    if isinstance(reader, str):
+        from luna_facilities.system.recorder import TrajectoryReader
+        reader = TrajectoryReader(reader)
+    chunks = ((c["metrics"], c["episode"], c["step"]) for c in reader.iter_columns(("metrics", "episode", "step")))
+    return _accumulate(chunks, gamma, reader.metric_names)
+
+
+def rollout_totals(result, gamma: float = 1.0) -> EpisodeTotals:
+    """Totals from a RolloutResult; gamma != 1 needs per-step metrics (record_steps=True)."""
+    E = len(result.episode_steps)
+    if gamma == 1.0:
+        return EpisodeTotals(np.arange(E), np.asarray(result.episode_metrics, dtype=np.float64),
+                             np.asarray(result.episode_steps), tuple(result.metric_names), gamma)
+    if result.step_metrics is None:
+        raise ValueError("discounted re-scoring of a rollout needs record_steps=True")
+    H = result.step_metrics.shape[1]
+    live = np.arange(H)[None, :] < result.episode_steps[:, None]
+    disc = np.where(live, np.power(gamma, np.arange(H, dtype=np.float64))[None, :], 0.0)
+    totals = np.einsum("eh,ehm->em", disc, result.step_metrics)
+    return EpisodeTotals(np.arange(E), totals, np.asarray(result.episode_steps), tuple(result.metric_names), gamma)
+
+
+def weight_grid(axes: Mapping[str, Sequence[float]], base: Optional[Mapping[str, float]] = None) -> List[Dict[str, float]]:
+    """Cartesian product of per-metric weight values on top of `base` (default: SystemCounter weights)."""
+    base = dict(SystemCounter().weights if base is None else base)
+    keys = list(axes)
+    return [{**base, **dict(zip(keys, combo))} for combo in itertools.product(*(axes[k] for k in keys))]
+
+
+def _parse_grid(items: Sequence[str]) -> Dict[str, List[float]]:
+    axes = {}
+    for item in items:
+        key, _, values = item.partition("=")
+        if not values:
+            raise SystemExit(f"bad --grid entry {item!r}; expected metric=v1,v2,...")
+        axes[key] = [float(v) for v in values.split(",")]
+    return axes
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("recording")
+    ap.add_argument("--weights", default=None, help="JSON list of weight dicts (or name -> weights)")
+    ap.add_argument("--grid", nargs="*", default=[], help="metric=v1,v2,... axes over the default weights")
+    ap.add_argument("--gamma", type=float, default=1.0)
+    ap.add_argument("--top", type=int, default=10)
+    ap.add_argument("--out", default=None, help="save episodes, returns and weight matrix to this .npz")
+    args = ap.parse_args(argv)
+
+    labels: List[str] = []
+    candidates: List[Dict[str, float]] = []
+    if args.weights:
+        with open(args.weights) as f:
+            spec = json.load(f)
+        items = spec.items() if isinstance(spec, dict) else ((str(i), w) for i, w in enumerate(spec))
+        for name, w in items:
+            labels.append(name)
+            candidates.append(w)
+    for w in weight_grid(_parse_grid(args.grid)) if args.grid else []:
+        labels.append(",".join(f"{k}={w[k]:g}" for k in _parse_grid(args.grid)))
+        candidates.append(w)
+    if not candidates:
+        candidates, labels = [SystemCounter().weights], ["default"]
+
+    totals = recording_totals(args.recording, args.gamma)
+    returns = totals.returns(candidates)
+    mean = returns.mean(axis=0) if len(returns) else np.zeros(len(candidates))
+    order = np.argsort(mean)
+    print(f"{len(totals.episodes)} episodes, {int(totals.steps.sum())} steps, {len(candidates)} weightings (lowest mean cost first)")
+    for i in order[:args.top]:
+        print(f"  {mean[i]:14.3f}  +- {returns[:, i].std() if len(returns) else 0.0:12.3f}  {labels[i]}")
+    if args.out:
+        np.savez(args.out, episodes=totals.episodes, returns=returns,
+                 weights=CostModel.weight_matrix(candidates, totals.metric_names),
+                 metric_names=np.array(totals.metric_names), labels=np.array(labels))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,190 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, Optional, Tuple
+import multiprocessing as mp
+import random
+import numpy as np
+
+from luna_facilities.core.snapshot import Snapshot
+from luna_facilities.system.actor_actions import Action
+from luna_facilities.system.counter import METRIC_NAMES
+from luna_facilities.system.environment import Environment
+
+
+# Factories and policies must be picklable (module-level callables) when num_workers > 0.
+EnvFactory = Callable[[int], Environment]
+Policy = Callable[[Dict[str, Snapshot], random.Random], Action]
+ObsFn = Callable[[Dict[str, Snapshot]], np.ndarray]
+
+
+@dataclass
+class RolloutResult:
+    episode_cost: np.ndarray            # (episodes,)
+    episode_metrics: np.ndarray         # (episodes, metrics) summed info["metrics"]
+    episode_steps: np.ndarray           # (episodes,)
+    terminated: np.ndarray              # (episodes,) bool
+    step_cost: Optional[np.ndarray] = None     # (episodes, horizon)
+    step_metrics: Optional[np.ndarray] = None  # (episodes, horizon, metrics)
+    observations: Optional[np.ndarray] = None  # (episodes, horizon, obs_dim)
+    metric_names: Tuple[str, ...] = METRIC_NAMES
+
+    def metrics_dict(self, episode: int) -> Dict[str, float]:
+        return {k: float(v) for k, v in zip(self.metric_names, self.episode_metrics[episode])}
+
+
+# ---- shared buffers ----
+
+def _alloc(shape: Tuple[int, ...], dtype: Any) -> Tuple[shared_memory.SharedMemory, np.ndarray]:
+    nbytes = max(1, int(np.prod(shape)) * np.dtype(dtype).itemsize)
+    shm = shared_memory.SharedMemory(create=True, size=nbytes)
+    arr = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    arr.fill(0)
+    return shm, arr
+
+
+# Worker-side state, set once per process by _init_worker
+_W: Dict[str, Any] = {}
+
+
+def _init_worker(specs: Dict[str, Tuple[str, Tuple[int, ...], str]], env_factory: EnvFactory, policy: Policy,
+                 obs_fn: Optional[ObsFn], metric_names: Tuple[str, ...], horizon: int, base_seed: int) -> None:
+    _W.clear()
+    _W["shm"] = {}
+    _W["buf"] = {}
+    for key, (name, shape, dtype) in specs.items():
+        shm = shared_memory.SharedMemory(name=name)
+        _W["shm"][key] = shm
+        _W["buf"][key] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+    _W.update(env_factory=env_factory, policy=policy, obs_fn=obs_fn,
+              metric_names=metric_names, horizon=horizon, base_seed=base_seed)
+
+
+def _run_episode(ep: int) -> int:
+    buf = _W["buf"]
+    seed = _W["base_seed"] + ep
+    env = _W["env_factory"](seed)
+    rng = random.Random(f"{seed}:policy")  # distinct from the stream an env factory seeds with `seed`
+    policy, obs_fn = _W["policy"], _W["obs_fn"]
+    names, horizon = _W["metric_names"], _W["horizon"]
+
+    step_cost = buf.get("step_cost")
+    step_metrics = buf.get("step_metrics")
+    observations = buf.get("observations")
+
+    obs = env.observe()
+    total = 0.0
+    totals = np.zeros(len(names))
+    steps, terminated = 0, False
+    while steps < horizon:
+        obs, cost, terminated, truncated, info = env.step(policy(obs, rng))
+        m = info["metrics"]
+        row = [m.get(k, 0.0) for k in names]
+        total += cost
+        totals += row
+        if step_cost is not None:
+            step_cost[ep, steps] = cost
+            step_metrics[ep, steps] = row
+        if observations is not None:
+            observations[ep, steps] = obs_fn(obs)
+        steps += 1
+        if terminated or truncated:
+            break
+
+    buf["episode_cost"][ep] = total
+    buf["episode_metrics"][ep] = totals
+    buf["episode_steps"][ep] = steps
+    buf["terminated"][ep] = terminated
+    return ep
+
+
+def _close_worker() -> None:
+    _W.get("buf", {}).clear()
+    for shm in _W.get("shm", {}).values():
+        shm.close()
+    _W.clear()
+
+
+@dataclass
+class RolloutRunner:
+    """
+    Runs whole episodes across a multiprocessing pool.
+
+    Each worker builds its own Environment via `env_factory(seed)` and drives it
+    with `policy(obs, rng)`, where `rng` is a per-episode `random.Random` derived
+    from the seed. Episode `i` always uses seed `base_seed + i`, so results do not
+    depend on how episodes are scheduled. Results are written straight into
+    preallocated shared-memory arrays; only episode indices travel over pipes.
+    """
+    env_factory: EnvFactory
+    policy: Policy
+    num_workers: int = 0                 # 0 runs in-process
+    horizon: Optional[int] = None        # defaults to SimConfig.episode_horizon_steps
+    record_steps: bool = False           # per-step cost and metrics
+    obs_fn: Optional[ObsFn] = None       # flattens observations into a fixed float vector
+    obs_dim: int = 0
+    metric_names: Tuple[str, ...] = METRIC_NAMES
+    mp_context: Optional[str] = None
+    chunksize: int = 1
+
+    def _horizon(self, base_seed: int) -> int:
+        if self.horizon is not None:
+            return self.horizon
+        return self.env_factory(base_seed).config.episode_horizon_steps
+
+    def run(self, num_episodes: int, base_seed: int = 0) -> RolloutResult:
+        if self.obs_fn is not None and self.obs_dim <= 0:
+            raise ValueError("obs_dim must be set when obs_fn is given")
+        horizon = self._horizon(base_seed)
+        M = len(self.metric_names)
+
+        shapes: Dict[str, Tuple[Tuple[int, ...], Any]] = {
+            "episode_cost": ((num_episodes,), np.float64),
+            "episode_metrics": ((num_episodes, M), np.float64),
+            "episode_steps": ((num_episodes,), np.int64),
+            "terminated": ((num_episodes,), np.bool_),
+        }
+        if self.record_steps:
+            shapes["step_cost"] = ((num_episodes, horizon), np.float64)
+            shapes["step_metrics"] = ((num_episodes, horizon, M), np.float64)
+        if self.obs_fn is not None:
+            shapes["observations"] = ((num_episodes, horizon, self.obs_dim), np.float32)
+
+        segments: Dict[str, shared_memory.SharedMemory] = {}
+        arrays: Dict[str, np.ndarray] = {}
+        try:
+            for key, (shape, dtype) in shapes.items():
+                segments[key], arrays[key] = _alloc(shape, dtype)
+            specs = {k: (segments[k].name, shapes[k][0], np.dtype(shapes[k][1]).str) for k in shapes}
+            initargs = (specs, self.env_factory, self.policy, self.obs_fn, self.metric_names, horizon, base_seed)
+
+            if self.num_workers <= 0:
+                _init_worker(*initargs)
+                try:
+                    for ep in range(num_episodes):
+                        _run_episode(ep)
+                finally:
+                    _close_worker()
+            else:
+                ctx = mp.get_context(self.mp_context)
+                with ctx.Pool(self.num_workers, initializer=_init_worker, initargs=initargs) as pool:
+                    for _ in pool.imap_unordered(_run_episode, range(num_episodes), chunksize=self.chunksize):
+                        pass
+
+            out = {k: v.copy() for k, v in arrays.items()}
+        finally:
+            arrays.clear()  # drop views before closing the segments
+            for shm in segments.values():
+                shm.close()
+                shm.unlink()
+
+        return RolloutResult(
+            episode_cost=out["episode_cost"],
+            episode_metrics=out["episode_metrics"],
+            episode_steps=out["episode_steps"],
+            terminated=out["terminated"],
+            step_cost=out.get("step_cost"),
+            step_metrics=out.get("step_metrics"),
+            observations=out.get("observations"),
+            metric_names=self.metric_names,
+        )
@@ -0,0 +1,312 @@
+"""
+Declarative scenarios: Environment, SimConfig, units and fleet from a JSON or TOML file.
+
+    python -m luna_facilities.system.scenario SCENARIO.json|.toml [--no-cache] [--cache-dir DIR]
+
+The file is one tree (JSON shown; TOML tables map onto it):
+
+    {
+      "config":  {"dt_hours": 1.0, "episode_horizon_steps": 720},   SimConfig fields
+      "seed":    0,                                                 Environment RNG seed
+      "counter": {"weights": {"lateness": 1.0, "risk": 10.0}},      SystemCounter fields
+      "units": {                                                    name -> constructor fields, in step order
+        "MissionClock": {},
+        "PropellantDepot": {"tanks": {"LEO": {"LOX": 5e4}}},
+        "SurfaceTransportNetwork": {"edges": [{"src": "N0", "dst": "N1", "time": 2.0}]},
+        "DemandModel": {"streams": [{"type": "PoissonDemand", "rate_per_hour": 0.1, "seed": 3}]},
+        "VehicleFleet": {}
+      },
+      "vehicles": [                                                 added to units["VehicleFleet"]
+        {"type": "BlueMoonMK2", "id": "MK2-{i:02d}", "count": 4},
+        {"type": "CislunarTransporter", "id": "TUG-01", "location": "leo"}
+      ]
+    }
+
+A unit's class is its name unless it gives "type" (any luna_facilities.units
+export). Inside unit and vehicle fields, a mapping whose "type" is a
+luna_facilities.models export (SsPolicy, PoissonDemand, CryoTank, ...) becomes
+that object. Vehicle entries take VehicleCommonState fields ("id" for
+vehicle_id) plus the vehicle class's keyword arguments; "count" repeats an entry
+with its index formatted into the id.
+
+load_scenario caches the compiled scenario (validated, constructed units pickled
+with config, counter and seed) under the SHA-256 of the file and of the
+package's source (source_fingerprint), so a repeated worker startup is one read
+and one unpickle: no parsing, validation or construction, and only the unit
+modules the pickle names are imported. Editing any unit, model or vehicle class
+invalidates the cache; FORMAT_VERSION covers the cache entry's own layout.
+
+TOML needs Python 3.11+ (tomllib) or the tomli package; JSON needs nothing extra.
+"""
+from __future__ import annotations
+import argparse
+import dataclasses
+import functools
+import hashlib
+import importlib
+import inspect
+import os
+import pickle
+import random
+import sys
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+from luna_facilities.system.config import SimConfig
+from luna_facilities.system.counter import SystemCounter
+from luna_facilities.system.environment import Environment
+
+FORMAT_VERSION = 1
+CACHE_ENV = "LUNA_SCENARIO_CACHE"   # cache directory override; default is __pycache__ next to the file
+
+_SECTIONS = ("config", "seed", "counter", "units", "vehicles")
+
+# VehicleCommonState fields a vehicle entry may omit, per vehicle class
+_VEHICLE_DEFAULTS: Dict[str, Dict[str, Any]] = {
+    "BlueMoonMK2": {"vehicle_type": "mk2", "role": "lander", "location": "nrho"},
+    "CislunarTransporter": {"vehicle_type": "transporter", "role": "tug", "location": "leo"},
+}
+_COMMON_DEFAULTS: Dict[str, Any] = {"phase": "loiter", "ready": True, "health": 1.0, "flights": 0}
+
+
+def _edges(v: Any) -> Dict[Tuple[str, str], Dict[str, float]]:
+    # JSON/TOML keys cannot be (src, dst) tuples: edges come as a list of {src, dst, <costs>}
+    if isinstance(v, Mapping):
+        return dict(v)
+    return {(e["src"], e["dst"]): {k: x for k, x in e.items() if k not in ("src", "dst")} for e in v}
+
+
+# (unit class, field) -> conversion from the file's representation
+_FIELD_ADAPTERS: Dict[Tuple[str, str], Callable[[Any], Any]] = {
+    ("SurfaceTransportNetwork", "edges"): _edges,
+    ("RangeAndComms", "blackout_periods"): lambda v: [tuple(p) for p in v],
+}
+
+
+@dataclass
+class CompiledScenario:
+    """A validated, constructed scenario: what the cache stores. environment() hands the units over."""
+    config: SimConfig
+    units: Dict[str, Any]
+    counter: SystemCounter
+    seed: int = 0
+
+    def environment(self) -> Environment:
+        return Environment(config=self.config, units=self.units, counter=self.counter, rng=random.Random(self.seed))
+
+
+# ---- parsing ----
+
+def parse_scenario(raw: bytes, fmt: str) -> Dict[str, Any]:
+    """The scenario tree from file contents; `fmt` is "json" or "toml" (a file suffix also works)."""
+    fmt = fmt.lower().lstrip(".")
+    if fmt == "json":
+        import json
+        return json.loads(raw)
+    if fmt == "toml":
+        try:
+            import tomllib
+        except ImportError:  # Python < 3.11
+            try:
+                import tomli as tomllib
+            except ImportError:
+                raise ImportError("TOML scenarios need Python 3.11+ or the tomli package (pip install tomli); "
+                                  "JSON scenarios need neither") from None
+        return tomllib.loads(raw.decode("utf-8"))
+    raise ValueError(f"unknown scenario format {fmt!r} (expected json or toml)")
+
+
+def read_scenario(path: str) -> Dict[str, Any]:
+    with open(path, "rb") as f:
+        return parse_scenario(f.read(), os.path.splitext(path)[1])
+
+
+# ---- validation / construction ----
+
+def _init_fields(cls: type) -> List[str]:
+    if dataclasses.is_dataclass(cls):
+        return [f.name for f in dataclasses.fields(cls) if f.init]
+    return [p.name for p in inspect.signature(cls).parameters.values()
+            if p.kind not in (p.VAR_POSITIONAL, p.VAR_KEYWORD)]
+
+
+def _construct(cls: type, kwargs: Dict[str, Any], where: str) -> Any:
+    unknown = [k for k in kwargs if k not in _init_fields(cls)]
+    if unknown:
+        raise ValueError(f"{where}: unknown field(s) {', '.join(map(repr, unknown))} for {cls.__name__}")
+    try:
+        return cls(**kwargs)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"{where}: {e}") from e
+
+
+def _export(package: str, name: Any, where: str) -> type:
+    pkg = importlib.import_module(f"luna_facilities.{package}")
+    if name not in pkg.__all__:
+        raise ValueError(f"{where}: unknown type {name!r} (expected one of luna_facilities.{package}: {', '.join(pkg.__all__)})")
+    return getattr(pkg, name)
+
+
+def _value(v: Any, where: str) -> Any:
+    """Convert nested values, building {"type": <models export>, ...} mappings into objects."""
+    if isinstance(v, Mapping):
+        if isinstance(v.get("type"), str) and v["type"] in importlib.import_module("luna_facilities.models").__all__:
+            cls = _export("models", v["type"], where)
+            return _construct(cls, {k: _value(x, f"{where}.{k}") for k, x in v.items() if k != "type"}, where)
+        return {k: _value(x, f"{where}.{k}") for k, x in v.items()}
+    if isinstance(v, list):
+        return [_value(x, f"{where}[{i}]") for i, x in enumerate(v)]
+    return v
+
+
+def _unit(name: str, entry: Mapping[str, Any]) -> Any:
+    where = f"units.{name}"
+    if not isinstance(entry, Mapping):
+        raise ValueError(f"{where}: expected a table of fields, got {type(entry).__name__}")
+    kind = entry.get("type", name)
+    cls = _export("units", kind, where)
+    kwargs = {}
+    for k, v in entry.items():
+        if k == "type":
+            continue
+        v = _value(v, f"{where}.{k}")
+        adapt = _FIELD_ADAPTERS.get((kind, k))
+        kwargs[k] = adapt(v) if adapt is not None else v
+    if name != kind and "name" in _init_fields(cls):
+        kwargs.setdefault("name", name)
+    return _construct(cls, kwargs, where)
+
+
+def _vehicles(entries: List[Mapping[str, Any]]) -> Dict[str, Any]:
+    from luna_facilities.vehicles import VehicleCommonState
+    common_fields = set(_init_fields(VehicleCommonState)) - {"vehicle_id"}
+    out: Dict[str, Any] = {}
+    for j, entry in enumerate(entries):
+        where = f"vehicles[{j}]"
+        entry = dict(entry)
+        kind = entry.pop("type", None)
+        cls = _export("vehicles", kind, where)
+        if "id" not in entry:
+            raise ValueError(f"{where}: missing 'id'")
+        vid, count = str(entry.pop("id")), int(entry.pop("count", 1))
+        common = {**_COMMON_DEFAULTS, **_VEHICLE_DEFAULTS.get(kind, {})}
+        common.update({k: entry.pop(k) for k in list(entry) if k in common_fields})
+        for i in range(count):
+            v_id = vid.format(i=i)
+            if v_id in out:
+                raise ValueError(f"{where}: duplicate vehicle id {v_id!r}")
+            state = _construct(VehicleCommonState, {"vehicle_id": v_id, **common}, where)
+            # Nested objects (tanks, engines) are built per vehicle, never shared
+            kwargs = {k: _value(v, f"{where}.{k}") for k, v in entry.items()}
+            out[v_id] = _construct(cls, {"common": state, **kwargs}, where)
+    return out
+
+
+def compile_scenario(spec: Mapping[str, Any]) -> CompiledScenario:
+    """Validate a scenario tree and construct its config, units (in file order) and fleet."""
+    unknown = [k for k in spec if k not in _SECTIONS]
+    if unknown:
+        raise ValueError(f"unknown scenario section(s) {', '.join(map(repr, unknown))} (expected {', '.join(_SECTIONS)})")
+    config = _construct(SimConfig, dict(spec.get("config", {})), "config")
+    counter = _construct(SystemCounter, dict(spec.get("counter", {})), "counter")
+    units_spec = spec.get("units", {})
+    if not units_spec:
+        raise ValueError("units: a scenario needs at least one unit")
+    units = {name: _unit(name, entry) for name, entry in units_spec.items()}
+    vehicles = spec.get("vehicles", [])
+    if vehicles:
+        fleet = units.get("VehicleFleet")
+        if fleet is None:
+            raise ValueError("vehicles: the scenario has no VehicleFleet unit to hold them")
+        for vid, v in _vehicles(vehicles).items():
+            if vid in fleet.vehicles:
+                raise ValueError(f"vehicles: duplicate vehicle id {vid!r}")
+            fleet.vehicles[vid] = v
+    seed = spec.get("seed", 0)
+    if not isinstance(seed, int) or isinstance(seed, bool):
+        raise ValueError(f"seed: expected an integer, got {seed!r}")
+    return CompiledScenario(config, units, counter, seed)
+
+
+# ---- cached loading ----
+
+# Subpackages whose classes end up in a compiled scenario's pickle
+_SOURCE_PACKAGES = ("core", "models", "system", "units", "vehicles")
+
+
+@functools.lru_cache(maxsize=None)
+def source_fingerprint() -> bytes:
+    """SHA-256 over the paths and contents of the package's .py sources that compiled scenarios pickle."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    h = hashlib.sha256()
+    for pkg in _SOURCE_PACKAGES:
+        for name in sorted(os.listdir(os.path.join(root, pkg))):
+            if name.endswith(".py"):
+                with open(os.path.join(root, pkg, name), "rb") as f:
+                    h.update(f"{pkg}/{name}\0".encode() + f.read())
+    return h.digest()
+
+
+def scenario_digest(raw: bytes) -> str:
+    """Cache key: the cache format, the package source and the scenario file's bytes."""
+    return hashlib.sha256(b"luna-scenario-%d\0" % FORMAT_VERSION + source_fingerprint() + raw).hexdigest()
+
+
+def cache_path(path: str, digest: str, cache_dir: Optional[str] = None) -> str:
+    d = cache_dir or os.environ.get(CACHE_ENV) or os.path.join(os.path.dirname(os.path.abspath(path)), "__pycache__")
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(d, f"{stem}.{digest[:16]}.scenario.pickle")
+
+
+def load_compiled(path: str, cache: bool = True, cache_dir: Optional[str] = None) -> Tuple[CompiledScenario, bool]:
+    """(compiled scenario, whether it came from the cache). A torn or unreadable cache entry is recompiled."""
+    with open(path, "rb") as f:
+        raw = f.read()
+    target = cache_path(path, scenario_digest(raw), cache_dir) if cache else None
+    if target is not None:
+        try:
+            with open(target, "rb") as f:
+                return pickle.load(f), True
+        except FileNotFoundError:
+            pass
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+            pass
+    compiled = compile_scenario(parse_scenario(raw, os.path.splitext(path)[1]))
+    if target is not None:
+        # Unique temp name: concurrent workers may compile the same file; the last rename wins
+        tmp = f"{target}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(tmp, "wb") as f:
+                pickle.dump(compiled, f, pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, target)
+        except OSError:
+            pass  # read-only location: run uncached
+    return compiled, False
+
+
+def load_scenario(path: str, cache: bool = True, cache_dir: Optional[str] = None) -> Environment:
+    """Environment for a JSON/TOML scenario file, through the compiled cache unless `cache` is off."""
+    return load_compiled(path, cache, cache_dir)[0].environment()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("scenario")
+    ap.add_argument("--no-cache", action="store_true", help="always parse and validate; do not read or write the cache")
+    ap.add_argument("--cache-dir", default=None, help=f"cache directory (default ${CACHE_ENV}, else __pycache__ beside the file)")
+    args = ap.parse_args(argv)
+    t0 = time.perf_counter()
+    compiled, hit = load_compiled(args.scenario, not args.no_cache, args.cache_dir)
+    env = compiled.environment()
+    ms = 1e3 * (time.perf_counter() - t0)
+    fleet = env.units.get("VehicleFleet")
+    print(f"{args.scenario}: {len(env.units)} units, {len(fleet.vehicles) if fleet is not None else 0} vehicles, "
+          f"horizon {env.config.episode_horizon_steps} steps, seed {compiled.seed} "
+          f"({'cache hit' if hit else 'compiled'}, {ms:.1f} ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,544 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+import heapq
+import math
+import numpy as np
+
+from luna_facilities.system.actor_actions import Action
+from luna_facilities.system.counter import METRIC_NAMES, SystemCounter
+from luna_facilities.system.dispatch import ActionResult
+from luna_facilities.system.environment import Environment
+
+# Units whose state is held as struct-of-arrays; everything else stays on the per-campaign Environment.
+VECTORIZED_UNITS = ("MissionClock", "ISRUPlant", "PropellantDepot", "RefurbFacility", "VehicleFleet")
+
+
+@dataclass
+class VectorEnvironment:
+    """
+    N independent campaigns advanced together on NumPy arrays.
+
+    Build with `from_envs`; the wrapped Environments provide the initial state,
+    their RNG streams and any unit not listed in VECTORIZED_UNITS. Stepping with
+    the same actions reproduces N calls to `Environment.step` (same costs,
+    terminated/truncated flags and unit state). Call `write_back()` to copy the
+    array state into the wrapped Environments' units.
+    """
+    envs: List[Environment]
+    depot_ids: Tuple[str, ...] = ()
+    props: Tuple[str, ...] = ()
+    vehicle_ids: Tuple[str, ...] = ()
+    arrays: Dict[str, np.ndarray] = field(default_factory=dict)
+    refurb_queue: List[List[Tuple[float, int, str, float]]] = field(default_factory=list)  # per-campaign wait heaps
+    refurb_completed: List[List[Tuple[float, str]]] = field(default_factory=list)  # capped like RefurbFacility.completed
+    _refurb_limit: List[Optional[int]] = field(default_factory=list, repr=False)
+    _refurb_seq: List[int] = field(default_factory=list, repr=False)
+    _vid_codes: Dict[str, int] = field(default_factory=dict, repr=False)
+    _vid_names: List[str] = field(default_factory=list, repr=False)
+    _depot_cells: List[Tuple[List[str], Any]] = field(default_factory=list, repr=False)  # per campaign: (depot ids, shared index)
+    # Per-step flow deltas of the vectorized units (unit -> metric -> per-campaign values), reset by apply_actions
+    _flows: Dict[str, Dict[str, np.ndarray]] = field(default_factory=dict, repr=False)
+    # Per-step action outcomes per campaign, in submission order; set by apply_actions
+    _results: List[List[ActionResult]] = field(default_factory=list, repr=False)
+
+    @property
+    def num_envs(self) -> int:
+        return len(self.envs)
+
+    @classmethod
+    def from_envs(cls, envs: Sequence[Environment]) -> "VectorEnvironment":
+        if not envs:
+            raise ValueError("VectorEnvironment needs at least one Environment")
+        envs = list(envs)
+        for e in envs:
+            missing = [n for n in VECTORIZED_UNITS if n not in e.units]
+            if missing:
+                raise ValueError(f"Environment is missing units: {missing}")
+
+        depot_ids: List[str] = []
+        props: List[str] = []
+        for e in envs:
+            dep = e.units["PropellantDepot"]
+            depot_ids.extend(d for d in dep.tanks if d not in depot_ids)
+            props.extend(p for p in dep.props if p not in props)
+
+        vehicle_ids = tuple(envs[0].units["VehicleFleet"].vehicles.keys())
+        for e in envs[1:]:
+            if tuple(e.units["VehicleFleet"].vehicles.keys()) != vehicle_ids:
+                raise ValueError("All campaigns must share the same VehicleFleet vehicle ids")
+
+        venv = cls(envs=envs, depot_ids=tuple(depot_ids), props=tuple(props), vehicle_ids=vehicle_ids)
+        venv._pack()
+        return venv
+
+    # ---- packing ----
+
+    def _code(self, vid: str) -> int:
+        code = self._vid_codes.get(vid)
+        if code is None:
+            code = len(self._vid_names)
+            self._vid_codes[vid] = code
+            self._vid_names.append(vid)
+        return code
+
+    def _pack(self) -> None:
+        n, D, P, V = self.num_envs, len(self.depot_ids), len(self.props), len(self.vehicle_ids)
+        a: Dict[str, np.ndarray] = {}
+        units = [e.units for e in self.envs]
+
+        a["t"] = np.array([u["MissionClock"].t for u in units], dtype=np.float64)
+        a["step_count"] = np.array([e.step_count for e in self.envs], dtype=np.int64)
+        a["horizon"] = np.array([e.config.episode_horizon_steps for e in self.envs], dtype=np.int64)
+        a["dt"] = np.array([e.config.dt_hours for e in self.envs], dtype=np.float64)
+
+        for k in ("lox_rate", "lh2_rate", "uptime_prob", "storage_lox", "storage_lh2", "storage_cap_lox", "storage_cap_lh2", "power_need_kw"):
+            a["isru_" + k] = np.array([getattr(u["ISRUPlant"], k) for u in units], dtype=np.float64)
+
+        a["depot_mass"] = np.zeros((n, D, P))
+        a["depot_present"] = np.zeros((n, D, P), dtype=bool)
+        a["depot_frac"] = np.zeros((n, P))
+        a["depot_zbo"] = np.array([u["PropellantDepot"].zero_boiloff_enabled for u in units], dtype=bool)
+        a["depot_rate"] = np.array([u["PropellantDepot"].transfer_rate_kg_per_step for u in units], dtype=np.float64)
+        a["depot_known"] = np.zeros((n, D), dtype=bool)
+        self._depot_cells = []
+        for i, u in enumerate(units):
+            # PropellantDepot is already a depots x props matrix; map its rows/columns onto the shared layout
+            dep = u["PropellantDepot"]
+            # A transfer may create any shared prop in any campaign, so every campaign gets every column
+            depots, props, mass, present = dep.export_cells(self.props)
+            dix = [self.depot_ids.index(d) for d in depots]
+            pix = [self.props.index(p) for p in props]
+            a["depot_known"][i, dix] = True
+            a["depot_mass"][i][np.ix_(dix, pix)] = mass
+            a["depot_present"][i][np.ix_(dix, pix)] = present
+            a["depot_frac"][i, pix] = dep.boiloff_rate
+            self._depot_cells.append((depots, np.ix_(dix, pix)))
+
+        # Refurb bays hold completion times, compacted in dict insertion order so sums match the scalar path exactly.
+        # refurb_seq mirrors RefurbFacility's start sequence, which breaks ties between equal completion times.
+        B = max(max(u["RefurbFacility"].bays, len(u["RefurbFacility"].in_service)) for u in units)
+        a["refurb_bays"] = np.array([u["RefurbFacility"].bays for u in units], dtype=np.int64)
+        a["refurb_clock"] = np.array([u["RefurbFacility"].clock for u in units], dtype=np.float64)
+        a["refurb_end"] = np.zeros((n, B))
+        a["refurb_vid"] = np.full((n, B), -1, dtype=np.int64)
+        a["refurb_seq"] = np.zeros((n, B), dtype=np.int64)
+        a["refurb_count"] = np.zeros(n, dtype=np.int64)
+        self.refurb_queue, self.refurb_completed, self._refurb_seq = [], [], []
+        self._refurb_limit = [u["RefurbFacility"].completed_limit for u in units]
+        for i, u in enumerate(units):
+            state = u["RefurbFacility"].export_state()
+            for j, (vid, end, seq) in enumerate(state["bays"]):
+                a["refurb_end"][i, j] = end
+                a["refurb_vid"][i, j] = self._code(vid)
+                a["refurb_seq"][i, j] = seq
+            a["refurb_count"][i] = len(state["bays"])
+            self.refurb_queue.append(state["queue"])
+            self.refurb_completed.append(state["completed"])
+            self._refurb_seq.append(state["seq"])
+
+        a["veh_health"] = np.zeros((n, V))
+        a["veh_flights"] = np.zeros((n, V), dtype=np.int64)
+        a["veh_ready"] = np.zeros((n, V), dtype=bool)
+        a["veh_stored"] = np.zeros((n, V), dtype=bool)   # FleetStore-backed: stepped by the fleet
+        a["veh_has_cryo"] = np.zeros((n, V), dtype=bool)
+        a["veh_battery_kwh"] = np.zeros((n, V))
+        a["veh_battery_cap"] = np.zeros((n, V))
+        for k in ("lox", "lh2"):
+            a[f"veh_{k}_kg"] = np.zeros((n, V))
+            a[f"veh_{k}_cap"] = np.zeros((n, V))
+            a[f"veh_{k}_frac"] = np.zeros((n, V))
+            a[f"veh_{k}_zbo"] = np.ones((n, V), dtype=bool)
+        a["fleet_drain_kw"] = np.array([u["VehicleFleet"].battery_drain_kw for u in units], dtype=np.float64)
+        a["fleet_health_decay"] = np.array([u["VehicleFleet"].health_decay_per_day for u in units], dtype=np.float64)
+        for i, u in enumerate(units):
+            store = u["VehicleFleet"].vehicles
+            rows, c = store.rows(self.vehicle_ids), store.cols
+            for k in ("health", "flights", "ready"):
+                a[f"veh_{k}"][i] = store.column(k, self.vehicle_ids)
+            st = c["stored"][rows]
+            cryo = st & c["has_cryo"][rows]
+            a["veh_stored"][i] = st
+            a["veh_has_cryo"][i] = cryo
+            a["veh_battery_kwh"][i] = np.where(st, c["battery_kwh"][rows], 0.0)
+            a["veh_battery_cap"][i] = np.where(st, c["battery_cap_kwh"][rows], 0.0)
+            for j, k in enumerate(("lox", "lh2")):
+                a[f"veh_{k}_kg"][i] = np.where(cryo, c["tank_kg"][rows, j], 0.0)
+                a[f"veh_{k}_cap"][i] = np.where(cryo, c["tank_cap"][rows, j], 0.0)
+                a[f"veh_{k}_frac"][i] = np.where(cryo, c["tank_frac"][rows, j], 0.0)
+                a[f"veh_{k}_zbo"][i] = np.where(cryo, c["tank_zbo"][rows, j], True)
+            for vi in np.flatnonzero(~st).tolist():
+                # Plain Vehicle objects: only transfers reach their tanks
+                v = store[self.vehicle_ids[vi]]
+                if hasattr(v, "lox") and hasattr(v, "lh2"):
+                    a["veh_has_cryo"][i, vi] = True
+                    for k in ("lox", "lh2"):
+                        tank = getattr(v, k)
+                        a[f"veh_{k}_kg"][i, vi] = tank.mass_kg
+                        a[f"veh_{k}_cap"][i, vi] = tank.capacity_kg
+
+        self.arrays = a
+
+    def write_back(self, campaigns: Optional[Sequence[int]] = None) -> None:
+        """Copy the array state into the wrapped Environments' units (all campaigns, or just `campaigns`)."""
+        a = self.arrays
+        for i in range(self.num_envs) if campaigns is None else campaigns:
+            e = self.envs[i]
+            u = e.units
+            e.step_count = int(a["step_count"][i])
+            u["MissionClock"].t = float(a["t"][i])
+
+            isru = u["ISRUPlant"]
+            isru.storage_lox = float(a["isru_storage_lox"][i])
+            isru.storage_lh2 = float(a["isru_storage_lh2"][i])
+
+            depots, shared = self._depot_cells[i]
+            u["PropellantDepot"].import_cells(depots, a["depot_mass"][i][shared], a["depot_present"][i][shared])
+
+            u["RefurbFacility"].import_state({
+                "clock": float(a["refurb_clock"][i]),
+                "bays": [(self._vid_names[a["refurb_vid"][i, j]], float(a["refurb_end"][i, j]), int(a["refurb_seq"][i, j]))
+                         for j in range(int(a["refurb_count"][i]))],
+                "queue": self.refurb_queue[i],
+                "completed": self.refurb_completed[i],
+                "seq": self._refurb_seq[i],
+            })
+
+            for name in VECTORIZED_UNITS:
+                u[name].touch()
+
+            store = u["VehicleFleet"].vehicles
+            rows, c = store.rows(self.vehicle_ids), store.cols
+            st = a["veh_stored"][i]
+            r = rows[st]
+            c["health"][r] = a["veh_health"][i, st]
+            c["flights"][r] = a["veh_flights"][i, st]
+            c["ready"][r] = a["veh_ready"][i, st]
+            c["battery_kwh"][r] = a["veh_battery_kwh"][i, st]
+            c["tank_kg"][r, 0] = a["veh_lox_kg"][i, st]
+            c["tank_kg"][r, 1] = a["veh_lh2_kg"][i, st]
+            for vi in np.flatnonzero(~st).tolist():
+                v = store[self.vehicle_ids[vi]]
+                v.common.health = float(a["veh_health"][i, vi])
+                v.common.flights = int(a["veh_flights"][i, vi])
+                v.common.ready = bool(a["veh_ready"][i, vi])
+                if a["veh_has_cryo"][i, vi]:
+                    v.lox.mass_kg = float(a["veh_lox_kg"][i, vi])
+                    v.lh2.mass_kg = float(a["veh_lh2_kg"][i, vi])
+
+    # ---- observation ----
+
+    def observe(self) -> Dict[str, np.ndarray]:
+        a = self.arrays
+        return {
+            "MissionClock.t": a["t"].copy(),
+            "ISRUPlant.storage_lox": a["isru_storage_lox"].copy(),
+            "ISRUPlant.storage_lh2": a["isru_storage_lh2"].copy(),
+            "PropellantDepot.mass_kg": a["depot_mass"].copy(),
+            "RefurbFacility.remaining_hours": a["refurb_end"] - a["refurb_clock"][:, None],
+            "RefurbFacility.occupied": np.arange(a["refurb_end"].shape[1]) < a["refurb_count"][:, None],
+            "RefurbFacility.queue_len": np.array([len(q) for q in self.refurb_queue], dtype=np.int64),
+            **self._observe_shipments(),
+            "VehicleFleet.health": a["veh_health"].copy(),
+            "VehicleFleet.flights": a["veh_flights"].copy(),
+            "VehicleFleet.ready": a["veh_ready"].copy(),
+            "VehicleFleet.lox_kg": a["veh_lox_kg"].copy(),
+            "VehicleFleet.lh2_kg": a["veh_lh2_kg"].copy(),
+            "VehicleFleet.battery_kwh": a["veh_battery_kwh"].copy(),
+        }
+
+    def _observe_shipments(self) -> Dict[str, np.ndarray]:
+        # LogisticsPipeline steps per campaign (arrival heap + deliveries), so its padded view is read off the units
+        pipes = [e.units.get("LogisticsPipeline") for e in self.envs]
+        S = max([len(p.shipments) for p in pipes if p is not None], default=0)
+        eta = np.zeros((self.num_envs, S))
+        mask = np.zeros((self.num_envs, S), dtype=bool)
+        for i, p in enumerate(pipes):
+            if p is not None:
+                k = len(p.shipments)
+                eta[i, :k] = [p.eta(s) for s in p.shipments]
+                mask[i, :k] = True
+        return {"LogisticsPipeline.eta_hours": eta, "LogisticsPipeline.mask": mask}
+
+    # ---- actions ----
+
+    def _apply_transfers(self, idx: np.ndarray, acts: List[Action]) -> np.ndarray:
+        a = self.arrays
+        di = np.array([self.depot_ids.index(x.params["depot_id"]) if x.params["depot_id"] in self.depot_ids else -1 for x in acts])
+        if (di < 0).any() or not a["depot_known"][idx, di].all():
+            # Mirror PropellantDepot.transfer, which indexes tanks[depot_id] directly
+            bad = [x.params["depot_id"] for x, d in zip(acts, di) if d < 0]
+            raise KeyError(bad[0] if bad else "unknown depot")
+        pi = np.array([self.props.index(x.params["prop"]) for x in acts])
+        amount = np.array([float(x.params["amount_kg"]) for x in acts])
+
+        # Each draw is capped by the receiving tank's free room; receivers without a tank for the prop take nothing
+        vi = np.array([self.vehicle_ids.index(x.params["vehicle_id"]) if x.params["vehicle_id"] in self.vehicle_ids else -1 for x in acts])
+        room = np.zeros(len(acts))
+        tanks = []
+        for k in ("lox", "lh2"):
+            sel = (vi >= 0) & np.array([x.params["prop"] == k.upper() for x in acts])
+            sel &= a["veh_has_cryo"][idx, np.maximum(vi, 0)]
+            rows, cols = idx[sel], vi[sel]
+            room[sel] = np.maximum(0.0, a[f"veh_{k}_cap"][rows, cols] - a[f"veh_{k}_kg"][rows, cols])
+            tanks.append((k, sel, rows, cols))
+
+        avail = a["depot_mass"][idx, di, pi]
+        want = np.minimum(np.minimum(np.maximum(0.0, amount), a["depot_rate"][idx]), room)
+        moved = np.minimum(avail, want)
+        a["depot_mass"][idx, di, pi] = avail - moved
+        a["depot_present"][idx, di, pi] = True
+
+        for k, sel, rows, cols in tanks:
+            a[f"veh_{k}_kg"][rows, cols] = a[f"veh_{k}_kg"][rows, cols] + moved[sel]
+        return moved
+
+    def _apply_refurb_starts(self, idx: np.ndarray, acts: List[Action]) -> np.ndarray:
+        a = self.arrays
+        codes = np.array([self._code(x.params["vehicle_id"]) for x in acts])
+        dur = np.maximum(0.0, np.array([float(x.params["duration_hours"]) for x in acts]))
+        prio = np.array([float(x.params.get("priority", 0.0)) for x in acts])
+        self._grow_refurb(int(a["refurb_count"][idx].max()) + 1)
+
+        full = a["refurb_count"][idx] >= a["refurb_bays"][idx]
+        for i, c, d, p in zip(idx[full], codes[full], dur[full], prio[full]):
+            heapq.heappush(self.refurb_queue[i], (-p, self._next_refurb_seq(i), self._vid_names[c], d))
+
+        idx, codes, dur = idx[~full], codes[~full], dur[~full]
+        match = a["refurb_vid"][idx] == codes[:, None]
+        has = match.any(axis=1)
+        # Restarting a vehicle already in a bay replaces its completion in place (dict semantics)
+        slot = np.where(has, match.argmax(axis=1), a["refurb_count"][idx])
+        a["refurb_end"][idx, slot] = a["refurb_clock"][idx] + dur
+        a["refurb_vid"][idx, slot] = codes
+        a["refurb_seq"][idx, slot] = [self._next_refurb_seq(i) for i in idx]
+        a["refurb_count"][idx] += (~has).astype(np.int64)
+        return ~full
+
+    def _next_refurb_seq(self, i: int) -> int:
+        self._refurb_seq[i] += 1
+        return self._refurb_seq[i]
+
+    def _grow_refurb(self, width: int) -> None:
+        a = self.arrays
+        B = a["refurb_end"].shape[1]
+        if width <= B:
+            return
+        pad = ((0, 0), (0, width - B))
+        a["refurb_end"] = np.pad(a["refurb_end"], pad)
+        a["refurb_seq"] = np.pad(a["refurb_seq"], pad)
+        a["refurb_vid"] = np.pad(a["refurb_vid"], pad, constant_values=-1)
+
+    def apply_actions(self, actions: Sequence[Union[Action, Sequence[Action], None]]) -> List[List[ActionResult]]:
+        """
+        Apply one entry per campaign (an Action, a list of actions or None) as
+        Environment.apply_actions does: validate the whole batch, skip rejected
+        actions (they count as violations in the step's metrics) and run the rest
+        grouped by name in order of first appearance. Returns each campaign's
+        ActionResults in submission order, with the same values as Environment.
+        """
+        if len(actions) != self.num_envs:
+            raise ValueError(f"expected {self.num_envs} actions, got {len(actions)}")
+        n = self.num_envs
+        self._flows = {"PropellantDepot": {"propellant_used": np.zeros(n)}, "ISRUPlant": {"energy_used": np.zeros(n)},
+                       "VehicleFleet": {"propellant_used": np.zeros(n)}}
+        batches = [[] if act is None else [act] if isinstance(act, Action) else list(act) for act in actions]
+        # Strict checks read the campaign's units, so bring the vectorized ones up to date first
+        strict = [i for i, batch in enumerate(batches)
+                  if self.envs[i].config.strict_actions and any(act.name in self.envs[i].actions for act in batch)]
+        if strict:
+            self.write_back(strict)
+        checks = [[e.validate_action(act) for act in batch] for e, batch in zip(self.envs, batches)]
+
+        # Per campaign: accepted action positions grouped by name, groups in order of first appearance
+        groups: List[List[Tuple[str, List[int]]]] = []
+        for batch, chk in zip(batches, checks):
+            by_name: Dict[str, List[int]] = {}
+            for k, (act, (ok, _)) in enumerate(zip(batch, chk)):
+                if ok:
+                    by_name.setdefault(act.name, []).append(k)
+            groups.append(list(by_name.items()))
+
+        values: List[Dict[int, Any]] = [{} for _ in range(n)]
+        for g in range(max(map(len, groups), default=0)):
+            # Campaigns are independent, so their g-th groups run together; each vectorized group is applied
+            # one position at a time (at most one action per campaign per call), as the unit handlers serve them
+            rounds: Dict[str, List[Tuple[int, List[int]]]] = {}
+            for i, gs in enumerate(groups):
+                if g < len(gs):
+                    rounds.setdefault(gs[g][0], []).append((i, gs[g][1]))
+            for name, members in rounds.items():
+                if name not in ("transfer_propellant", "start_refurb"):
+                    # Scalar-only actions touch units that are not vectorized; route them per campaign
+                    for i, ks in members:
+                        out = self.envs[i].actions.dispatch(self.envs[i], [batches[i][k] for k in ks])
+                        values[i].update(zip(ks, out))
+                    continue
+                apply = self._apply_transfers if name == "transfer_propellant" else self._apply_refurb_starts
+                for r in range(max(len(ks) for _, ks in members)):
+                    part = [(i, ks[r]) for i, ks in members if r < len(ks)]
+                    out = apply(np.array([i for i, _ in part], dtype=np.int64), [batches[i][k] for i, k in part])
+                    for (i, k), v in zip(part, out.tolist()):
+                        values[i][k] = v
+                if name == "transfer_propellant":
+                    # One propellant_used delta per campaign's transfer group, as the depot's handler emits it
+                    used = self._flows["PropellantDepot"]["propellant_used"]
+                    for i, ks in members:
+                        used[i] += math.fsum(values[i][k] for k in ks)
+
+        self._results = [[ActionResult(act.name, ok, reason, values[i].get(k) if ok else None)
+                          for k, (act, (ok, reason)) in enumerate(zip(batch, chk))]
+                         for i, (batch, chk) in enumerate(zip(batches, checks))]
+        return self._results
+
+    # ---- dynamics ----
+
+    def _step_exogenous(self) -> None:
+        a = self.arrays
+        dt = a["dt"]
+
+        # Draw RNG in the same order as Environment.step: ISRU at its position, scalar units in dict order
+        u_isru = np.empty(self.num_envs)
+        for i, e in enumerate(self.envs):
+            for name, unit in e.units.items():
+                if name == "ISRUPlant":
+                    u_isru[i] = e.rng.random()
+                elif name not in VECTORIZED_UNITS:
+                    unit.step_exogenous(float(dt[i]), e.rng)
+
+        a["t"] += dt
+
+        up = u_isru < a["isru_uptime_prob"]
+        a["isru_storage_lox"] = np.where(up, np.minimum(a["isru_storage_cap_lox"], a["isru_storage_lox"] + a["isru_lox_rate"]), a["isru_storage_lox"])
+        a["isru_storage_lh2"] = np.where(up, np.minimum(a["isru_storage_cap_lh2"], a["isru_storage_lh2"] + a["isru_lh2_rate"]), a["isru_storage_lh2"])
+        self._flows["ISRUPlant"]["energy_used"] = np.where(up, a["isru_power_need_kw"] * dt, 0.0)
+
+        days = np.maximum(0.0, dt / 24.0)
+        # Python's pow per (campaign, prop): NumPy's SIMD power can differ from PropellantDepot in the last ulp
+        decay = np.array([[b ** d for b in row] for row, d in zip((1.0 - a["depot_frac"]).tolist(), days.tolist())])
+        boiled = np.maximum(0.0, a["depot_mass"] * decay[:, None, :])
+        # Boiled-off mass per campaign, summed exactly (fsum) like PropellantDepot's delta
+        lost = (a["depot_mass"] - boiled).reshape(self.num_envs, -1)
+        self._flows["PropellantDepot"]["propellant_used"] += [0.0 if z else math.fsum(row) for z, row in zip(a["depot_zbo"].tolist(), lost.tolist())]
+        a["depot_mass"] = np.where(a["depot_zbo"][:, None, None], a["depot_mass"], boiled)
+
+        self._step_refurb(dt)
+        self._step_fleet(dt)
+
+
+    def _step_refurb(self, dt: np.ndarray) -> None:
+        a = self.arrays
+        a["refurb_clock"] += dt
+        clock = a["refurb_clock"]
+        B = a["refurb_end"].shape[1]
+        occupied = np.arange(B) < a["refurb_count"][:, None]
+        done = occupied & (a["refurb_end"] <= clock[:, None])
+        keep = occupied & ~done
+
+        for i in np.flatnonzero(done.any(axis=1)):
+            # Completion log in heap order: completion time, then start sequence
+            js = np.flatnonzero(done[i])
+            for j in sorted(js, key=lambda j: (a["refurb_end"][i, j], a["refurb_seq"][i, j])):
+                self.refurb_completed[i].append((float(a["refurb_end"][i, j]), self._vid_names[a["refurb_vid"][i, j]]))
+            log, limit = self.refurb_completed[i], self._refurb_limit[i]
+            if limit is not None and len(log) > limit:
+                del log[:len(log) - limit]
+
+        # Stable compaction keeps surviving bays in insertion order
+        order = np.argsort(~keep, axis=1, kind="stable")
+        for k, fill in (("refurb_end", 0.0), ("refurb_vid", -1), ("refurb_seq", 0)):
+            a[k] = np.take_along_axis(np.where(keep, a[k], fill), order, axis=1)
+        a["refurb_count"] = keep.sum(axis=1)
+
+        for i, q in enumerate(self.refurb_queue):
+            while q and a["refurb_count"][i] < a["refurb_bays"][i]:
+                _, _, vid, duration = heapq.heappop(q)
+                code = self._code(vid)
+                hit = np.flatnonzero(a["refurb_vid"][i, :a["refurb_count"][i]] == code)
+                j = int(hit[0]) if hit.size else int(a["refurb_count"][i])
+                self._grow_refurb(j + 1)
+                a["refurb_end"][i, j] = clock[i] + duration
+                a["refurb_vid"][i, j] = code
+                a["refurb_seq"][i, j] = self._next_refurb_seq(i)
+                a["refurb_count"][i] += int(not hit.size)
+
+    def _step_fleet(self, dt: np.ndarray) -> None:
+        # Mirrors VehicleFleet.step_exogenous on the FleetStore-backed vehicles
+        a = self.arrays
+        days = np.maximum(0.0, dt / 24.0)
+        stored = a["veh_stored"]
+        mass = np.stack([a["veh_lox_kg"], a["veh_lh2_kg"]], axis=-1)
+        boil = (stored & a["veh_has_cryo"])[..., None] & ~np.stack([a["veh_lox_zbo"], a["veh_lh2_zbo"]], axis=-1)
+        if boil.any():
+            frac = np.stack([a["veh_lox_frac"], a["veh_lh2_frac"]], axis=-1)[boil]
+            camp = np.nonzero(boil)[0]
+            # Python pow once per distinct (fraction, days), as models.cryo.decay_factors does per campaign
+            pairs, inv = np.unique(np.stack([frac, days[camp]], axis=1), axis=0, return_inverse=True)
+            factor = np.array([(1.0 - f) ** d for f, d in pairs.tolist()])[inv.ravel()]
+            before = mass[boil]
+            kept = np.maximum(0.0, before * factor)
+            lost = (before - kept).tolist()
+            bounds = np.searchsorted(camp, np.arange(self.num_envs + 1)).tolist()
+            self._flows["VehicleFleet"]["propellant_used"] = np.array(
+                [math.fsum(lost[lo:hi]) for lo, hi in zip(bounds[:-1], bounds[1:])])
+            mass[boil] = kept
+            a["veh_lox_kg"], a["veh_lh2_kg"] = mass[..., 0].copy(), mass[..., 1].copy()
+
+        drain = a["fleet_drain_kw"]
+        on = stored & (a["veh_battery_cap"] > 0.0) & (drain > 0.0)[:, None]
+        a["veh_battery_kwh"] = np.where(on, np.maximum(0.0, a["veh_battery_kwh"] - (drain * np.maximum(0.0, dt))[:, None]),
+                                        a["veh_battery_kwh"])
+        decay = a["fleet_health_decay"]
+        on = stored & (decay > 0.0)[:, None]
+        a["veh_health"] = np.where(on, np.maximum(0.0, a["veh_health"] - (decay * days)[:, None]), a["veh_health"])
+
+    def compute_metrics(self) -> Dict[str, np.ndarray]:
+        a = self.arrays
+        n = self.num_envs
+        m = {k: np.zeros(n) for k in METRIC_NAMES}
+
+        # Left-to-right sum over bays, matching sum() over the in_service dict
+        occupied = np.arange(a["refurb_end"].shape[1]) < a["refurb_count"][:, None]
+        remaining = a["refurb_end"] - a["refurb_clock"][:, None]
+        total = np.zeros(n)
+        for j in range(remaining.shape[1]):
+            total = np.where(occupied[:, j], total + np.maximum(0.0, remaining[:, j]), total)
+        m["refurb_hours"] = total
+
+        # Flows: deltas from the scalar units plus the vectorized ones, combined per campaign as SystemCounter does
+        flows = self._flows
+        for i, e in enumerate(self.envs):
+            deltas = [u.drain_deltas() for name, u in e.units.items() if name not in VECTORIZED_UNITS]
+            deltas.extend({k: float(v[i]) for k, v in unit_flows.items()} for unit_flows in flows.values())
+            bad = sum(1 for r in self._results[i] if not r.ok) if i < len(self._results) else 0
+            if bad:
+                deltas.append({"violations": float(bad)})
+            for k, v in SystemCounter.sum_deltas(deltas).items():
+                if k not in m:
+                    m[k] = np.zeros(n)
+                m[k][i] = v
+        return m
+
+    def step(self, actions: Sequence[Union[Action, Sequence[Action], None]]) -> Tuple[Dict[str, np.ndarray], np.ndarray, np.ndarray, np.ndarray, Dict[str, Any]]:
+        self.apply_actions(actions)
+        self._step_exogenous()
+
+        metrics = self.compute_metrics()
+        cost = np.zeros(self.num_envs)
+        for k in self.envs[0].counter.weights.keys():
+            w = np.array([e.counter.weights.get(k, 0.0) for e in self.envs])
+            cost = cost + w * metrics.get(k, 0.0)
+
+        a = self.arrays
+        a["step_count"] += 1
+        terminated = metrics["violations"] > 0.0
+        truncated = a["step_count"] >= a["horizon"]
+
+        # Per-campaign action_ok / action_reason / action_results, as in Environment.step's info
+        # (first rejection wins; no action counts as ok)
+        bad = [next((r for r in res if not r.ok), None) for res in self._results]
+        info = {"metrics": metrics,
+                "action_ok": np.array([b is None for b in bad], dtype=bool),
+                "action_reason": ["ok" if b is None else b.reason for b in bad],
+                "action_results": self._results}
+        return self.observe(), cost, terminated, truncated, info
@@ -1,16 +1,41 @@
-from .mission_clock import MissionClock
-from .launch_schedule import LaunchSchedule
-from .range_comms import RangeAndComms
-from .orbit_catalog import OrbitCatalog
-from .landing_site import LandingSiteManager
-from .propellant_depot import PropellantDepot
-from .isru import ISRUPlant
-from .surface_power import SurfacePowerSystem
-from .surface_transport import SurfaceTransportNetwork
-from .refurb_facility import RefurbFacility
-from .inspection import InspectionAndCheckout
-from .parts_inventory import PartsInventory
-from .logistics import LogisticsPipeline
-from .demand import DemandModel
-from .risk import RiskModel
-from .vehicle_fleet import VehicleFleet
+from typing import TYPE_CHECKING
+from .._lazy import lazy_exports
+
+_EXPORTS = {
+    "MissionClock": "mission_clock",
+    "LaunchSchedule": "launch_schedule",
+    "RangeAndComms": "range_comms",
+    "OrbitCatalog": "orbit_catalog",
+    "LandingSiteManager": "landing_site",
+    "PropellantDepot": "propellant_depot",
+    "ISRUPlant": "isru",
+    "SurfacePowerSystem": "surface_power",
+    "SurfaceTransportNetwork": "surface_transport",
+    "RefurbFacility": "refurb_facility",
+    "InspectionAndCheckout": "inspection",
+    "PartsInventory": "parts_inventory",
+    "LogisticsPipeline": "logistics",
+    "DemandModel": "demand",
+    "RiskModel": "risk",
+    "VehicleFleet": "vehicle_fleet",
+}
+__all__ = list(_EXPORTS)
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
+
+if TYPE_CHECKING:
+    from .mission_clock import MissionClock
+    from .launch_schedule import LaunchSchedule
+    from .range_comms import RangeAndComms
+    from .orbit_catalog import OrbitCatalog
+    from .landing_site import LandingSiteManager
+    from .propellant_depot import PropellantDepot
+    from .isru import ISRUPlant
+    from .surface_power import SurfacePowerSystem
+    from .surface_transport import SurfaceTransportNetwork
+    from .refurb_facility import RefurbFacility
+    from .inspection import InspectionAndCheckout
+    from .parts_inventory import PartsInventory
+    from .logistics import LogisticsPipeline
+    from .demand import DemandModel
+    from .risk import RiskModel
+    from .vehicle_fleet import VehicleFleet
@@ -1,18 +1,244 @@
 from __future__ import annotations
 from dataclasses import dataclass, field
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import heapq
+import math
 import random
+import numpy as np
 from luna_facilities.core.unit import Unit
 from luna_facilities.core.snapshot import Snapshot
+from luna_facilities.core.observation import ObservationSpec, UnitLayout, list_columns, write_rows
+
+def _task_row(buf, pos, t, code) -> None:
+    buf[pos] = t.get("due_time", 0.0)
+    buf[pos + 1] = t.get("priority", 0.0)
+    buf[pos + 2] = t.get("payload_kg", 0.0)
+
+def _smallest(heap: List[Tuple], k: int, live: Callable[[Tuple], bool]) -> List[Tuple]:
+    """
+    The k smallest live entries of a heap list, in order, without popping: a
+    best-first walk over the heap array visits O(k) nodes plus any dead ones.
+    """
+    out: List[Tuple] = []
+    frontier = [(heap[0], 0)] if heap and k > 0 else []
+    n = len(heap)
+    while frontier and len(out) < k:
+        entry, i = heapq.heappop(frontier)
+        if live(entry):
+            out.append(entry)
+        for j in (2 * i + 1, 2 * i + 2):
+            if j < n:
+                heapq.heappush(frontier, (heap[j], j))
+    return out
 
 @dataclass
 class DemandModel(Unit):
+    """
+    Open tasks with due times on the unit clock, indexed so lateness queries
+    never rescan them:
+
+    * a due-time heap of tasks not yet due; once a task passes its due time it
+      moves to the overdue heap, and every step emits the task-hours of
+      lateness accrued (`lateness`);
+    * the overdue count and the sum of their due times, so total_lateness() is O(1);
+    * a (priority desc, due asc) heap for urgent_tasks(k).
+
+    Completed tasks leave through complete_task (O(1) by id; heap entries are
+    dropped lazily and compacted once they outnumber live tasks). New tasks
+    come from add_task or from `streams` (models.demand_stream: PoissonDemand,
+    ScheduledDemand), which are drawn lazily as the clock reaches them. Tasks
+    are fixed once added: to change one, complete it and add the new version.
+    """
     name: str = "DemandModel"
-    tasks: List[Dict[str, Any]] = field(default_factory=list)  # {id, due_time, priority, payload_kg,...}
+    tasks: List[Dict[str, Any]] = field(default_factory=list)  # {id, due_time, priority, payload_kg,...}; order not kept
+    clock: float = 0.0
+    streams: List[Any] = field(default_factory=list)
+
+    # Parallel to tasks: sequence number and frozen observe() row per task
+    _seqs: List[int] = field(default_factory=list, init=False, repr=False, compare=False)
+    _rows: List[Tuple] = field(default_factory=list, init=False, repr=False, compare=False)
+    _pos: Dict[int, int] = field(default_factory=dict, init=False, repr=False, compare=False)  # seq -> index in tasks
+    _ids: Dict[Any, List[int]] = field(default_factory=dict, init=False, repr=False, compare=False)
+    # (due_time, seq, task) for open tasks not yet overdue / overdue; (-priority, due_time, seq, task) for all
+    _pending: List[Tuple[float, int, Dict[str, Any]]] = field(default_factory=list, init=False, repr=False, compare=False)
+    _late: List[Tuple[float, int, Dict[str, Any]]] = field(default_factory=list, init=False, repr=False, compare=False)
+    _urgent: List[Tuple[float, float, int, Dict[str, Any]]] = field(default_factory=list, init=False, repr=False, compare=False)
+    _overdue: int = field(default=0, init=False, repr=False, compare=False)
+    _late_due: float = field(default=0.0, init=False, repr=False, compare=False)
+    _dead: int = field(default=0, init=False, repr=False, compare=False)
+    _seq: int = field(default=0, init=False, repr=False, compare=False)
+    _count: int = field(default=-1, init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self._index()
+
+    def _index(self) -> None:
+        # Direct appends to tasks are picked up by the length check; other direct edits need _rebuild()
+        if len(self.tasks) == self._count:
+            return
+        if 0 <= self._count < len(self.tasks):
+            for t in self.tasks[self._count:]:
+                self._track(t)
+        else:
+            self._rebuild()
+        self._count = len(self.tasks)
+
+    def _rebuild(self) -> None:
+        tasks = self.tasks
+        self.tasks, self._seqs, self._rows, self._pos, self._ids = [], [], [], {}, {}
+        self._pending, self._late, self._urgent = [], [], []
+        self._overdue, self._late_due, self._dead, self._seq = 0, 0.0, 0, 0
+        for t in tasks:
+            self.tasks.append(t)
+            self._track(t)
+        self._count = len(self.tasks)
+
+    def _track(self, task: Dict[str, Any]) -> None:
+        # task is already at the end of self.tasks
+        self._seq += 1
+        seq = self._seq
+        self._pos[seq] = len(self._seqs)
+        self._seqs.append(seq)
+        self._rows.append(tuple(sorted(task.items())))
+        self._ids.setdefault(task.get("id"), []).append(seq)
+        due = task.get("due_time")
+        heapq.heappush(self._urgent, (-task.get("priority", 0), math.inf if due is None else due, seq, task))
+        if due is None:
+            return
+        if due < self.clock:
+            heapq.heappush(self._late, (due, seq, task))
+            self._overdue += 1
+            self._late_due += due
+        else:
+            heapq.heappush(self._pending, (due, seq, task))
+
+    def _live(self, entry: Tuple) -> bool:
+        return entry[-2] in self._pos
+
+    def _compact(self) -> None:
+        # Rebuild the heaps from the open tasks once dead entries dominate
+        pending, late, urgent = [], [], []
+        for t, seq in zip(self.tasks, self._seqs):
+            due = t.get("due_time")
+            urgent.append((-t.get("priority", 0), math.inf if due is None else due, seq, t))
+            if due is not None:
+                (late if due < self.clock else pending).append((due, seq, t))
+        for h in (pending, late, urgent):
+            heapq.heapify(h)
+        self._pending, self._late, self._urgent, self._dead = pending, late, urgent, 0
 
     def observe(self) -> Snapshot:
-        return Snapshot({"tasks": tuple(tuple(sorted(t.items())) for t in self.tasks)})
+        self._index()
+        return Snapshot({"tasks": tuple(self._rows)})
+
+    def obs_layout(self, spec: ObservationSpec) -> Tuple[List[str], Dict[str, Any]]:
+        cap = spec.capacity("tasks")
+        return list_columns("tasks", cap, ("due_time", "priority", "payload_kg")), {"cap": cap}
+
+    def observe_into(self, buf: np.ndarray, layout: UnitLayout) -> None:
+        # The `cap` most urgent tasks; the count column still holds every open task
+        cap = layout.index["cap"]
+        write_rows(buf, 0, cap, 3, self.urgent_tasks(cap), _task_row)
+        buf[0] = len(self.tasks)
+
+    def add_task(self, task: Dict[str, Any]) -> None:
+        self._index()
+        self.tasks.append(task)
+        self._track(task)
+        self._count = len(self.tasks)
+        self.touch()
+
+    def complete_task(self, task_id: Any) -> Optional[Dict[str, Any]]:
+        """Remove the earliest-added open task with this id; returns it, or None if there is none."""
+        self._index()
+        seqs = self._ids.get(task_id)
+        if not seqs:
+            return None
+        seq = seqs.pop(0)
+        if not seqs:
+            del self._ids[task_id]
+        # Swap-remove from the parallel lists
+        i = self._pos.pop(seq)
+        t = self.tasks[i]
+        last = len(self.tasks) - 1
+        if i != last:
+            self.tasks[i], self._seqs[i], self._rows[i] = self.tasks[last], self._seqs[last], self._rows[last]
+            self._pos[self._seqs[i]] = i
+        self.tasks.pop()
+        self._seqs.pop()
+        self._rows.pop()
+        self._count = len(self.tasks)
+        due = t.get("due_time")
+        if due is not None and due < self.clock:
+            self._overdue -= 1
+            self._late_due = self._late_due - due if self._overdue else 0.0
+        self._dead += 1
+        if self._dead > 64 and self._dead > len(self.tasks):
+            self._compact()
+        self.touch()
+        return t
+
+    # ---- queries ----
+
+    def overdue_count(self) -> int:
+        self._index()
+        return self._overdue
+
+    def total_lateness(self) -> float:
+        """Hours past due summed over open overdue tasks, at the current clock."""
+        self._index()
+        return self._overdue * self.clock - self._late_due if self._overdue else 0.0
+
+    def overdue_tasks(self, k: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Open overdue tasks, most overdue first (the first k, or all)."""
+        self._index()
+        return [e[-1] for e in _smallest(self._late, self._overdue if k is None else k, self._live)]
+
+    def urgent_tasks(self, k: int) -> List[Dict[str, Any]]:
+        """The k most urgent open tasks: highest priority first, then earliest due."""
+        self._index()
+        return [e[-1] for e in _smallest(self._urgent, k, self._live)]
+
+    def next_due(self) -> Optional[float]:
+        """Earliest due time among open tasks not yet overdue."""
+        self._index()
+        top = _smallest(self._pending, 1, self._live)
+        return top[0][0] if top else None
+
+    # ---- dynamics ----
+
+    def next_event_time(self, t: float) -> Optional[float]:
+        # Arrivals are events; due times only change the lateness rate, which spans handle exactly
+        times = [a for a in (s.next_time() for s in self.streams) if a is not None and a > self.clock]
+        return t + (min(times) - self.clock) if times else None
 
     def step_exogenous(self, dt: float, rng: random.Random) -> None:
-        # optional: stochastic new demand
-        pass
+        self._index()
+        c0, c1 = self.clock, self.clock + dt
+        arrived = False
+        for s in self.streams:
+            for task in s.take_until(c1):
+                self.tasks.append(task)
+                self._track(task)
+                arrived = True
+        self._count = len(self.tasks)
+        late = self._overdue * dt
+        heap = self._pending
+        while heap and heap[0][0] < c1:
+            entry = heapq.heappop(heap)
+            if not self._live(entry):
+                continue
+            due = entry[0]
+            late += c1 - max(c0, due)
+            heapq.heappush(self._late, entry)
+            self._overdue += 1
+            self._late_due += due
+        self.clock = c1
+        if late:
+            self.emit("lateness", late)
+        if arrived:
+            self.touch()
+
+    def step_exogenous_span(self, dt: float, steps: int, rng: random.Random) -> None:
+        # Lateness accrues linearly between due times, so the span is one long step
+        self.step_exogenous(dt * steps, rng)
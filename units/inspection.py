@@ -1,13 +1,16 @@
 from __future__ import annotations
 from dataclasses import dataclass, field
-from typing import Dict
+from typing import Dict, Any, List, Tuple
 import random
+import numpy as np
 from luna_facilities.core.unit import Unit
 from luna_facilities.core.snapshot import Snapshot
+from luna_facilities.core.observation import ObservationSpec, UnitLayout
 
 @dataclass
 class InspectionAndCheckout(Unit):
     name: str = "InspectionAndCheckout"
+    handles_actions = ("run_check",)
 
     completeness: Dict[str, bool] = field(default_factory=dict)
     functional: Dict[str, bool] = field(default_factory=dict)
@@ -20,17 +23,49 @@ class InspectionAndCheckout(Unit):
             "post_refurb": self.post_refurb.copy(),
         })
 
+    def obs_layout(self, spec: ObservationSpec) -> Tuple[List[str], Dict[str, Any]]:
+        vids = spec.vehicle_ids or tuple(dict.fromkeys([*self.completeness, *self.functional, *self.post_refurb]))
+        cols = [f"{v}.{g}" for v in vids for g in ("completeness", "functional", "post_refurb")]
+        return cols, {"vehicles": vids}
+
+    def observe_into(self, buf: np.ndarray, layout: UnitLayout) -> None:
+        # +1 passed, -1 failed, 0 not run
+        i = 0
+        for v in layout.index["vehicles"]:
+            for gate in (self.completeness, self.functional, self.post_refurb):
+                ok = gate.get(v)
+                buf[i] = 0.0 if ok is None else (1.0 if ok else -1.0)
+                i += 1
+
+    def on_run_check(self, env: Any, actions: List[Any]) -> List[Any]:
+        # Result: pass/fail, or None for an unknown check_type (nothing is run)
+        runs = {"completeness": self.run_completeness, "functional": self.run_functional, "post_refurb": self.run_post_refurb}
+        out = []
+        for a in actions:
+            run = runs.get(a.params["check_type"])
+            out.append(None if run is None else run(a.params["vehicle_id"], env.rng))
+        return out
+
     def run_completeness(self, vehicle_id: str, rng: random.Random) -> bool:
         ok = rng.random() > 0.02
         self.completeness[vehicle_id] = ok
+        self.touch()
+        if not ok:
+            self.emit("risk", 1.0)
         return ok
 
     def run_functional(self, vehicle_id: str, rng: random.Random) -> bool:
         ok = rng.random() > 0.03
         self.functional[vehicle_id] = ok
+        self.touch()
+        if not ok:
+            self.emit("risk", 1.0)
         return ok
 
     def run_post_refurb(self, vehicle_id: str, rng: random.Random) -> bool:
         ok = rng.random() > 0.01
         self.post_refurb[vehicle_id] = ok
+        self.touch()
+        if not ok:
+            self.emit("risk", 1.0)
         return ok
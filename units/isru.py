@@ -1,5 +1,5 @@
 from __future__ import annotations
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
 import random
 from luna_facilities.core.unit import Unit
 from luna_facilities.core.snapshot import Snapshot
@@ -21,10 +21,24 @@ class ISRUPlant(Unit):
 
     power_need_kw: float = 200.0
 
+    obs_scalars = ("lox_rate", "lh2_rate", "uptime_prob", "storage_lox", "storage_lh2",
+                   "storage_cap_lox", "storage_cap_lh2", "power_need_kw")
+
     def observe(self) -> Snapshot:
-        return Snapshot(self.__dict__.copy())
+        return Snapshot(asdict(self))
 
     def step_exogenous(self, dt: float, rng: random.Random) -> None:
         if rng.random() < self.uptime_prob:
             self.storage_lox = min(self.storage_cap_lox, self.storage_lox + self.lox_rate)
             self.storage_lh2 = min(self.storage_cap_lh2, self.storage_lh2 + self.lh2_rate)
+            self.touch()
+            self.emit("energy_used", self.power_need_kw * dt)
+
+    def step_exogenous_span(self, dt: float, steps: int, rng: random.Random) -> None:
+        # One uptime draw per step, as step_exogenous, then a single capped accumulation
+        up = sum(1 for _ in range(steps) if rng.random() < self.uptime_prob)
+        if up:
+            self.storage_lox = min(self.storage_cap_lox, self.storage_lox + up * self.lox_rate)
+            self.storage_lh2 = min(self.storage_cap_lh2, self.storage_lh2 + up * self.lh2_rate)
+            self.touch()
+            self.emit("energy_used", up * self.power_need_kw * dt)
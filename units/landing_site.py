@@ -1,17 +1,214 @@
 from __future__ import annotations
+from bisect import bisect_left, bisect_right
 from dataclasses import dataclass, field
-from typing import Any, Dict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import math
+import random
+import numpy as np
 from luna_facilities.core.unit import Unit
 from luna_facilities.core.snapshot import Snapshot
+from luna_facilities.core.observation import ObservationSpec, UnitLayout, list_columns, write_rows
+
+def _reservation_row(buf, pos, r, code) -> None:
+    buf[pos] = r["t0"]
+    buf[pos + 1] = r["t1"]
+    buf[pos + 2] = code("vehicle", r["vehicle_id"])
+
+
+class PadCalendar:
+    """
+    Reservations on one pad as half-open [t0, t1) intervals.
+
+    Accepted reservations never overlap, so a start-sorted array is a complete
+    interval index: conflicts, inserts and removals are a bisection plus a
+    neighbour check (list inserts are a memmove).
+    """
+    __slots__ = ("starts", "ends", "items")
+
+    def __init__(self) -> None:
+        self.starts: List[float] = []
+        self.ends: List[float] = []
+        self.items: List[Dict[str, Any]] = []
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def overlapping(self, t0: float, t1: float) -> List[Dict[str, Any]]:
+        # Non-overlapping and start-sorted means ends are sorted too
+        i = bisect_right(self.ends, t0)
+        j = bisect_left(self.starts, t1)
+        return self.items[i:j]
+
+    def is_free(self, t0: float, t1: float) -> bool:
+        return bisect_right(self.ends, t0) >= bisect_left(self.starts, t1)
+
+    def insert(self, item: Dict[str, Any]) -> bool:
+        t0, t1 = item["t0"], item["t1"]
+        if not self.is_free(t0, t1):
+            return False
+        i = bisect_left(self.starts, t0)
+        self.starts.insert(i, t0)
+        self.ends.insert(i, t1)
+        self.items.insert(i, item)
+        return True
+
+    def remove(self, item: Dict[str, Any]) -> bool:
+        i = bisect_left(self.starts, item["t0"])
+        while i < len(self.items) and self.starts[i] == item["t0"]:
+            if self.items[i] is item:
+                del self.starts[i], self.ends[i], self.items[i]
+                return True
+            i += 1
+        return False
+
+    def upcoming(self, t: float) -> Iterator[Dict[str, Any]]:
+        """Reservations still open at t (ongoing or future), in start order."""
+        return iter(self.items[bisect_right(self.ends, t):])
+
+    def next_change(self, t: float, duration: float) -> float:
+        """u > t such that is_free(s, s + duration) is the same for every s in [t, u) (inf: never changes)."""
+        out = float("inf")
+        i = bisect_right(self.ends, t)
+        if i < len(self.ends):
+            out = self.ends[i]
+        j = bisect_left(self.starts, t + duration)
+        if j < len(self.starts):
+            # the start only counts once s + duration passes it
+            out = min(out, math.nextafter(self.starts[j] - duration, math.inf))
+        return out
+
+    def first_free(self, t: float, duration: float) -> float:
+        """Earliest s >= t with [s, s + duration) free on this pad."""
+        i = bisect_right(self.ends, t)
+        s = t
+        while i < len(self.items):
+            if self.starts[i] >= s + duration:
+                return s
+            s = max(s, self.ends[i])
+            i += 1
+        return s
+
 
 @dataclass
 class LandingSiteManager(Unit):
+    """
+    Lunar pads and traffic control. Each pad has a PadCalendar of
+    non-overlapping reservations; observe() reports only the next
+    `observe_window` open reservations per pad relative to the unit clock.
+    """
     name: str = "LandingSiteManager"
-    pads: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    pads: Dict[str, Dict[str, Any]] = field(default_factory=dict)  # pad_id -> static pad attributes
+    observe_window: int = 4
+    clock: float = 0.0
+
+    calendars: Dict[str, PadCalendar] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _by_id: Dict[int, Tuple[str, Dict[str, Any]]] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _next_id: int = field(default=0, init=False, repr=False, compare=False)
+    _next_change: float = field(default=float("inf"), init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        # Own copies of the pad dicts: the caller's (e.g. a shared scenario template) keep their reservations
+        self.pads = {pad_id: dict(pad) for pad_id, pad in self.pads.items()}
+        for pad_id, pad in self.pads.items():
+            self.calendars[pad_id] = PadCalendar()
+            # Older single-reservation form
+            r = pad.pop("reservation", None)
+            if r is not None:
+                self.reserve_pad(pad_id, r["vehicle_id"], r["t0"], r["t1"])
 
     def observe(self) -> Snapshot:
-        return Snapshot({"pads": self.pads})
+        return Snapshot({"pads": {
+            p: {**{k: (dict(v) if isinstance(v, dict) else v) for k, v in pad.items()},
+                "upcoming": tuple(dict(r) for r in self._window(p))}
+            for p, pad in self.pads.items()
+        }})
+
+    def _window(self, pad_id: str) -> List[Dict[str, Any]]:
+        out = []
+        for r in self.calendars[pad_id].upcoming(self.clock):
+            if len(out) >= self.observe_window:
+                break
+            out.append(r)
+        return out
+
+    def obs_layout(self, spec: ObservationSpec) -> Tuple[List[str], Dict[str, Any]]:
+        pads = tuple(self.pads.keys())
+        cols = [c for p in pads for c in list_columns(f"pads.{p}.upcoming", self.observe_window, ("t0", "t1", "vehicle"))]
+        return cols, {"pads": pads, "stride": 1 + 4 * self.observe_window, "code": spec.code}
+
+    def observe_into(self, buf: np.ndarray, layout: UnitLayout) -> None:
+        ix = layout.index
+        for i, p in enumerate(ix["pads"]):
+            rows = self._window(p) if p in self.calendars else ()
+            write_rows(buf, i * ix["stride"], self.observe_window, 3, rows, _reservation_row, ix["code"])
+
+    def _calendar(self, pad_id: str) -> PadCalendar:
+        cal = self.calendars.get(pad_id)
+        if cal is None:
+            self.pads.setdefault(pad_id, {})
+            cal = self.calendars[pad_id] = PadCalendar()
+        return cal
+
+    def reserve_pad(self, pad_id: str, vehicle_id: str, t0: float, t1: float) -> Optional[int]:
+        """Book [t0, t1) on a pad; returns the reservation id, or None if it conflicts."""
+        if t1 <= t0:
+            return None
+        item = {"reservation_id": self._next_id + 1, "vehicle_id": vehicle_id, "t0": t0, "t1": t1}
+        if not self._calendar(pad_id).insert(item):
+            return None
+        self._next_id += 1
+        self._by_id[item["reservation_id"]] = (pad_id, item)
+        self._next_change = min(self._next_change, t1)
+        self.touch()
+        return item["reservation_id"]
+
+    def cancel(self, reservation_id: int) -> bool:
+        hit = self._by_id.pop(reservation_id, None)
+        if hit is None:
+            return False
+        pad_id, item = hit
+        self.calendars[pad_id].remove(item)
+        self.touch()
+        return True
+
+    def conflicts(self, pad_id: str, t0: float, t1: float) -> List[Dict[str, Any]]:
+        cal = self.calendars.get(pad_id)
+        return cal.overlapping(t0, t1) if cal is not None else []
+
+    def is_free(self, pad_id: str, t0: float, t1: float) -> bool:
+        cal = self.calendars.get(pad_id)
+        return cal is None or cal.is_free(t0, t1)
+
+    def next_pad_change(self, pad_id: str, t: float, duration: float) -> float:
+        cal = self.calendars.get(pad_id)
+        return cal.next_change(t, duration) if cal is not None else float("inf")
+
+    def reservations_overlapping(self, t0: float, t1: float, pad_id: Optional[str] = None) -> List[Tuple[str, Dict[str, Any]]]:
+        pads = [pad_id] if pad_id is not None else list(self.calendars)
+        return [(p, r) for p in pads if p in self.calendars for r in self.calendars[p].overlapping(t0, t1)]
+
+    def first_free_window(self, duration: float, after: float, pads: Optional[List[str]] = None) -> Optional[Tuple[str, float]]:
+        """(pad_id, start) of the earliest [start, start + duration) free on any pad, ties going to pad order."""
+        best: Optional[Tuple[str, float]] = None
+        for p in (pads if pads is not None else self.calendars):
+            cal = self.calendars.get(p)
+            if cal is None:
+                continue
+            s = cal.first_free(after, duration)
+            if best is None or s < best[1]:
+                best = (p, s)
+                if s == after:
+                    break
+        return best
+
+    def step_exogenous_span(self, dt: float, steps: int, rng: random.Random) -> None:
+        self.step_exogenous(dt * steps, rng)
 
-    def reserve_pad(self, pad_id: str, vehicle_id: str, t0: float, t1: float) -> None:
-        self.pads.setdefault(pad_id, {})
-        self.pads[pad_id]["reservation"] = {"vehicle_id": vehicle_id, "t0": t0, "t1": t1}
+    def step_exogenous(self, dt: float, rng: random.Random) -> None:
+        self.clock += dt
+        # The observed window only changes when an open reservation closes
+        if self.clock >= self._next_change:
+            ends = [cal.ends[i] for cal in self.calendars.values()
+                    for i in (bisect_right(cal.ends, self.clock),) if i < len(cal.ends)]
+            self._next_change = min(ends, default=float("inf"))
+            self.touch()
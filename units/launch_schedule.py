@@ -1,28 +1,196 @@
 from __future__ import annotations
+from bisect import bisect_left, bisect_right
 from dataclasses import dataclass, field
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import heapq
+import math
+import numpy as np
 from luna_facilities.core.unit import Unit
 from luna_facilities.core.snapshot import Snapshot
+from luna_facilities.core.observation import ObservationSpec, UnitLayout, list_columns, write_rows
+
+# Statuses that no longer hold a pad
+INACTIVE_STATUSES = frozenset({"scrubbed", "cancelled"})
+
+def _launch_row(buf, pos, m, code) -> None:
+    buf[pos] = m["planned_time"]
+    buf[pos + 1] = code("vehicle", m["vehicle_id"])
+    buf[pos + 2] = code("pad", m["pad_id"])
+    buf[pos + 3] = code("launch_status", m["status"])
+
+def _row(m: Dict[str, Any]) -> Tuple[Tuple[str, Any], ...]:
+    return tuple(sorted(m.items()))
+
+class _TimeIndex:
+    """Launch entries sorted by planned_time (ties in insertion order)."""
+    __slots__ = ("times", "items")
+
+    def __init__(self) -> None:
+        self.times: List[float] = []
+        self.items: List[Dict[str, Any]] = []
+
+    def add(self, m: Dict[str, Any]) -> None:
+        i = bisect_right(self.times, m["planned_time"])
+        self.times.insert(i, m["planned_time"])
+        self.items.insert(i, m)
+
+    def between(self, t0: float, t1: float) -> List[Dict[str, Any]]:
+        return self.items[bisect_left(self.times, t0):bisect_left(self.times, t1)]
+
 
 @dataclass
 class LaunchSchedule(Unit):
+    """
+    Launch manifest with a mission_id index, a global and per-pad planned_time
+    index and a heap of planned launches (stale entries are dropped lazily).
+    `manifest` keeps insertion order; call _rebuild() after editing it directly.
+    """
     name: str = "LaunchSchedule"
+    handles_actions = ("schedule_launch",)
     manifest: List[Dict[str, Any]] = field(default_factory=list)
+    pad_turnaround_hours: float = 24.0  # launches on one pad closer than this conflict
+
+    _pos: Dict[str, int] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _rows: List[Tuple[Tuple[str, Any], ...]] = field(default_factory=list, init=False, repr=False, compare=False)
+    _by_time: _TimeIndex = field(default_factory=_TimeIndex, init=False, repr=False, compare=False)
+    _by_pad: Dict[str, _TimeIndex] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _planned: List[Tuple[float, int, Dict[str, Any]]] = field(default_factory=list, init=False, repr=False, compare=False)
+    _seq: int = field(default=0, init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self._rebuild()
+
+    def _rebuild(self) -> None:
+        entries, self.manifest = self.manifest, []
+        self._pos, self._rows, self._by_time, self._by_pad, self._planned = {}, [], _TimeIndex(), {}, []
+        for m in entries:
+            self._index(m)
+        self.touch()
+
+    def _index(self, m: Dict[str, Any]) -> None:
+        # Duplicate mission ids resolve to the first entry, as the old linear scan did
+        self._pos.setdefault(m["mission_id"], len(self.manifest))
+        self.manifest.append(m)
+        self._rows.append(_row(m))
+        self._by_time.add(m)
+        pad = self._by_pad.get(m["pad_id"])
+        if pad is None:
+            pad = self._by_pad[m["pad_id"]] = _TimeIndex()
+        pad.add(m)
+        if m["status"] == "planned":
+            self._push(m)
+
+    def _push(self, m: Dict[str, Any]) -> None:
+        self._seq += 1
+        heapq.heappush(self._planned, (m["planned_time"], self._seq, m))
 
     def observe(self) -> Snapshot:
-        return Snapshot({"manifest": tuple(tuple(sorted(m.items())) for m in self.manifest)})
+        return Snapshot({"manifest": tuple(self._rows)})
 
-    def add_launch(self, mission_id: str, planned_time: float, vehicle_id: str, pad_id: str) -> None:
-        self.manifest.append({
+    def obs_layout(self, spec: ObservationSpec) -> Tuple[List[str], Dict[str, Any]]:
+        cap = spec.capacity("manifest")
+        cols = list_columns("manifest", cap, ("planned_time", "vehicle", "pad", "status"))
+        return cols, {"cap": cap, "code": spec.code}
+
+    def observe_into(self, buf: np.ndarray, layout: UnitLayout) -> None:
+        write_rows(buf, 0, layout.index["cap"], 4, self.manifest, _launch_row, layout.index["code"])
+
+    def get(self, mission_id: str) -> Optional[Dict[str, Any]]:
+        i = self._pos.get(mission_id)
+        return self.manifest[i] if i is not None else None
+
+    def next_launch(self) -> Optional[Dict[str, Any]]:
+        """Earliest launch still planned (including overdue ones), or None."""
+        heap = self._planned
+        while heap and heap[0][2]["status"] != "planned":
+            heapq.heappop(heap)
+        return heap[0][2] if heap else None
+
+    def launches_between(self, t0: float, t1: float, pad_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Entries with t0 <= planned_time < t1, in time order."""
+        if pad_id is None:
+            return self._by_time.between(t0, t1)
+        pad = self._by_pad.get(pad_id)
+        return pad.between(t0, t1) if pad is not None else []
+
+    def pad_conflicts(self, pad_id: str, planned_time: float) -> List[Dict[str, Any]]:
+        """Active launches on pad_id within the turnaround of planned_time."""
+        pad = self._by_pad.get(pad_id)
+        if pad is None:
+            return []
+        w = self.pad_turnaround_hours
+        lo = bisect_right(pad.times, planned_time - w)
+        hi = bisect_left(pad.times, planned_time + w)
+        return [m for m in pad.items[lo:hi] if m["status"] not in INACTIVE_STATUSES]
+
+    def next_conflict_change(self, pad_id: str, t: float) -> float:
+        """u > t such that pad_conflicts(pad_id, s) is the same for every s in [t, u) (inf: never changes)."""
+        pad = self._by_pad.get(pad_id)
+        if pad is None:
+            return float("inf")
+        w, times, out = self.pad_turnaround_hours, pad.times, float("inf")
+        i = bisect_right(times, t - w)
+        if i < len(times):
+            out = times[i] + w
+        j = bisect_left(times, t + w)
+        if j < len(times):
+            out = min(out, math.nextafter(times[j] - w, math.inf))
+        return out
+
+    def conflicts(self, pad_id: Optional[str] = None) -> Iterator[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """Pairs of active launches on the same pad closer than pad_turnaround_hours, in time order per pad."""
+        w = self.pad_turnaround_hours
+        pads = [pad_id] if pad_id is not None else list(self._by_pad)
+        for p in pads:
+            idx = self._by_pad.get(p)
+            if idx is None:
+                continue
+            times, items = idx.times, idx.items
+            for i, a in enumerate(items):
+                if a["status"] in INACTIVE_STATUSES:
+                    continue
+                j = i + 1
+                while j < len(items) and times[j] - times[i] < w:
+                    if items[j]["status"] not in INACTIVE_STATUSES:
+                        yield a, items[j]
+                    j += 1
+
+    def next_event_time(self, t: float) -> Optional[float]:
+        idx = self._by_time
+        for i in range(bisect_right(idx.times, t), len(idx.times)):
+            if idx.items[i]["status"] == "planned":
+                return idx.times[i]
+        return None
+
+    @staticmethod
+    def _entry(mission_id: str, planned_time: float, vehicle_id: str, pad_id: str) -> Dict[str, Any]:
+        return {
             "mission_id": mission_id,
-            "planned_time": planned_time,
+            "planned_time": float(planned_time),
             "vehicle_id": vehicle_id,
             "pad_id": pad_id,
             "status": "planned",
-        })
+        }
+
+    def add_launch(self, mission_id: str, planned_time: float, vehicle_id: str, pad_id: str) -> None:
+        self._index(self._entry(mission_id, planned_time, vehicle_id, pad_id))
+        self.touch()
+
+    def on_schedule_launch(self, env: Any, actions: List[Any]) -> List[None]:
+        for a in actions:
+            p = a.params
+            self._index(self._entry(p["mission_id"], p["planned_time"], p["vehicle_id"], p["pad_id"]))
+        self.touch()
+        return [None] * len(actions)
 
     def set_status(self, mission_id: str, status: str) -> None:
-        for m in self.manifest:
-            if m["mission_id"] == mission_id:
-                m["status"] = status
-                return
+        i = self._pos.get(mission_id)
+        if i is None:
+            return
+        m = self.manifest[i]
+        if m["status"] != status:
+            m["status"] = status
+            self._rows[i] = _row(m)
+            if status == "planned":
+                self._push(m)
+        self.touch()
@@ -1,19 +1,100 @@
 from __future__ import annotations
 from dataclasses import dataclass, field
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+import heapq
 import random
+import numpy as np
 from luna_facilities.core.unit import Unit
 from luna_facilities.core.snapshot import Snapshot
+from luna_facilities.core.observation import ObservationSpec, UnitLayout, list_columns, write_rows
+
+def _shipment_row(buf, pos, s, code) -> None:
+    buf[pos] = code("part", s[0])
+    buf[pos + 1] = s[1]
+    buf[pos + 2] = s[2]
 
 @dataclass
 class LogisticsPipeline(Unit):
+    """
+    Shipments in transit, keyed by absolute arrival time on an arrival heap, so a
+    step only pops what has arrived instead of counting down every shipment.
+    Arrivals are delivered into the `deliver_to` unit (PartsInventory.receive).
+
+    Shipments given with a relative `eta_hours` are converted to `arrival_hours`
+    on construction; add new ones with add_shipment.
+    """
     name: str = "LogisticsPipeline"
-    shipments: List[Dict[str, Any]] = field(default_factory=list)  # {eta_hours, payload, qty,...}
+    shipments: List[Dict[str, Any]] = field(default_factory=list)  # {arrival_hours, part_id, qty, order_id,...}
+    clock: float = 0.0
+    deliver_to: str = "PartsInventory"
+
+    _heap: List[Tuple[float, int, Dict[str, Any]]] = field(default_factory=list, init=False, repr=False, compare=False)
+    _seq: int = field(default=0, init=False, repr=False, compare=False)
+    _sink: Any = field(default=None, init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        pending, self.shipments = self.shipments, []
+        for s in pending:
+            s = dict(s)
+            if "arrival_hours" not in s:
+                s["arrival_hours"] = self.clock + max(0.0, s.pop("eta_hours", 0.0))
+            self._push(s)
+
+    def bind(self, units: Mapping[str, Unit]) -> None:
+        self._sink = units.get(self.deliver_to)
+
+    def _push(self, s: Dict[str, Any]) -> None:
+        self.shipments.append(s)
+        heapq.heappush(self._heap, (s["arrival_hours"], self._seq, s))
+        self._seq += 1
+
+    def add_shipment(self, part_id: str, qty: int, eta_hours: float, order_id: Optional[str] = None, **extra: Any) -> Dict[str, Any]:
+        s = {"part_id": part_id, "qty": qty, "arrival_hours": self.clock + max(0.0, eta_hours), **extra}
+        if order_id is not None:
+            s["order_id"] = order_id
+        self._push(s)
+        self.touch()
+        return s
+
+    def eta(self, s: Dict[str, Any]) -> float:
+        return max(0.0, s["arrival_hours"] - self.clock)
 
     def observe(self) -> Snapshot:
-        return Snapshot({"shipments": tuple(tuple(sorted(s.items())) for s in self.shipments)})
+        return Snapshot({"shipments": tuple(
+            tuple(sorted({**s, "eta_hours": self.eta(s)}.items())) for s in self.shipments
+        )})
+
+    def obs_layout(self, spec: ObservationSpec) -> Tuple[List[str], Dict[str, Any]]:
+        cap = spec.capacity("shipments")
+        return list_columns("shipments", cap, ("part", "qty", "eta_hours")), {"cap": cap, "code": spec.code}
+
+    def observe_into(self, buf: np.ndarray, layout: UnitLayout) -> None:
+        rows = [(s.get("part_id"), s.get("qty", 0), self.eta(s)) for s in self.shipments]
+        write_rows(buf, 0, layout.index["cap"], 3, rows, _shipment_row, layout.index["code"])
+
+    def next_event_time(self, t: float) -> Optional[float]:
+        if not self._heap:
+            return None
+        wait = self._heap[0][0] - self.clock
+        return t + wait if wait > 0.0 else None
+
+    def step_exogenous_span(self, dt: float, steps: int, rng: random.Random) -> None:
+        self.step_exogenous(dt * steps, rng)
 
     def step_exogenous(self, dt: float, rng: random.Random) -> None:
-        # decrement ETAs, add random delay noise if desired
-        for s in self.shipments:
-            s["eta_hours"] = max(0.0, s.get("eta_hours", 0.0) - dt)
+        self.clock += dt
+        heap = self._heap
+        if not heap:
+            return
+        # ETAs move with the clock
+        self.touch()
+        if heap[0][0] > self.clock:
+            return
+        arrived = []
+        while heap and heap[0][0] <= self.clock:
+            arrived.append(heapq.heappop(heap)[2])
+        gone = set(map(id, arrived))
+        self.shipments = [s for s in self.shipments if id(s) not in gone]
+        if self._sink is not None:
+            for s in arrived:
+                self._sink.receive(s["part_id"], s.get("qty", 0), s.get("order_id"))
@@ -1,9 +1,12 @@
 from __future__ import annotations
 from dataclasses import dataclass
+from typing import Any, Dict, List, Tuple
 import random
 
+import numpy as np
 from luna_facilities.core.unit import Unit
 from luna_facilities.core.snapshot import Snapshot
+from luna_facilities.core.observation import ObservationSpec, UnitLayout
 
 
 @dataclass
@@ -18,6 +21,18 @@ class MissionClock(Unit):
             "lunar_phase_tag": self.lunar_phase_tag,
         })
 
+    def obs_layout(self, spec: ObservationSpec) -> Tuple[List[str], Dict[str, Any]]:
+        return ["t", "lunar_phase_tag"], {"code": spec.code}
+
+    def observe_into(self, buf: np.ndarray, layout: UnitLayout) -> None:
+        buf[0] = self.t
+        buf[1] = layout.index["code"]("lunar_phase", self.lunar_phase_tag)
+
     def step_exogenous(self, dt: float, rng: random.Random) -> None:
         self.t += dt
+        self.touch()
         # Optional: update lunar_phase_tag based on t
+
+    def step_exogenous_span(self, dt: float, steps: int, rng: random.Random) -> None:
+        self.t += dt * steps
+        self.touch()
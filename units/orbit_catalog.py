@@ -1,18 +1,38 @@
 from __future__ import annotations
 from dataclasses import dataclass, field
-from typing import Dict
+from typing import Dict, Any, List, Tuple
 import random
+import numpy as np
 from luna_facilities.core.unit import Unit
 from luna_facilities.core.snapshot import Snapshot
+from luna_facilities.core.observation import ObservationSpec, UnitLayout
 
 @dataclass
 class OrbitCatalog(Unit):
     name: str = "OrbitCatalog"
+    handles_actions = ("command_maneuver",)
     orbit_state: Dict[str, Dict[str, float]] = field(default_factory=dict)  # asset_id -> state dict
     dv_remaining: Dict[str, float] = field(default_factory=dict)
 
     def observe(self) -> Snapshot:
-        return Snapshot({"orbit_state": self.orbit_state, "dv_remaining": self.dv_remaining})
+        return Snapshot({
+            "orbit_state": {k: dict(v) for k, v in self.orbit_state.items()},
+            "dv_remaining": self.dv_remaining.copy(),
+        })
+
+    def obs_layout(self, spec: ObservationSpec) -> Tuple[List[str], Dict[str, Any]]:
+        assets = tuple(dict.fromkeys([*self.dv_remaining, *self.orbit_state]))
+        state_keys = tuple((a, k) for a in assets for k in self.orbit_state.get(a, {}))
+        cols = [f"dv_remaining.{a}" for a in assets] + [f"orbit_state.{a}.{k}" for a, k in state_keys]
+        return cols, {"assets": assets, "state_keys": state_keys}
+
+    def observe_into(self, buf: np.ndarray, layout: UnitLayout) -> None:
+        assets = layout.index["assets"]
+        for i, a in enumerate(assets):
+            buf[i] = self.dv_remaining.get(a, 0.0)
+        n = len(assets)
+        for i, (a, k) in enumerate(layout.index["state_keys"]):
+            buf[n + i] = self.orbit_state.get(a, {}).get(k, 0.0)
 
     def step_exogenous(self, dt: float, rng: random.Random) -> None:
         # placeholder: propagate orbit states
@@ -20,3 +40,14 @@ class OrbitCatalog(Unit):
 
     def apply_maneuver(self, asset_id: str, dv: float) -> None:
         self.dv_remaining[asset_id] = max(0.0, self.dv_remaining.get(asset_id, 0.0) - max(0.0, dv))
+        self.touch()
+
+    def on_command_maneuver(self, env: Any, actions: List[Any]) -> List[float]:
+        # Result: dv remaining for the asset after the burn
+        out = []
+        for a in actions:
+            asset = a.params["asset_id"]
+            self.dv_remaining[asset] = max(0.0, self.dv_remaining.get(asset, 0.0) - max(0.0, float(a.params["dv"])))
+            out.append(self.dv_remaining[asset])
+        self.touch()
+        return out
@@ -1,16 +1,46 @@
 from __future__ import annotations
 from dataclasses import dataclass, field
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+import random
+import numpy as np
 from luna_facilities.core.unit import Unit
 from luna_facilities.core.snapshot import Snapshot
+from luna_facilities.core.observation import ObservationSpec, UnitLayout, list_columns, write_rows
+from luna_facilities.models.inventory_policy import ReorderPolicy, WhatIfResult, part_price, simulate_inventory
+from luna_facilities.models.parts_catalog import PartSpec, default_part_catalog
+
+def _order_row(buf, pos, o, code) -> None:
+    buf[pos] = code("part", o[0])
+    buf[pos + 1] = o[1]
+    buf[pos + 2] = o[2]
 
 @dataclass
 class PartsInventory(Unit):
+    """
+    Spares stock with reorder policies. `policies` maps part -> SsPolicy or
+    BaseStockPolicy (see models.inventory_policy); after stock changes the next
+    step reviews them against the inventory position (stock + inbound) and
+    ships orders through the bound LogisticsPipeline, which delivers back into
+    `stock`. Orders emit `parts_cost` (fixed order cost plus catalog price).
+    """
     name: str = "PartsInventory"
     stock: Dict[str, int] = field(default_factory=dict)
-    unit_cost: Dict[str, float] = field(default_factory=dict)
+    unit_cost: Dict[str, float] = field(default_factory=dict)       # overrides catalog prices
     lead_time_hours: Dict[str, float] = field(default_factory=dict)
-    on_order: List[Dict[str, Any]] = field(default_factory=list)
+    on_order: List[Dict[str, Any]] = field(default_factory=list)    # {order_id, part_id, qty, due_hours}
+    policies: Dict[str, ReorderPolicy] = field(default_factory=dict)
+    default_lead_time_hours: float = 24.0 * 14
+    order_cost: float = 1000.0
+    clock: float = 0.0
+    catalog: Dict[str, PartSpec] = field(default_factory=default_part_catalog, repr=False)
+    pipeline_unit: str = "LogisticsPipeline"
+
+    _pipeline: Any = field(default=None, init=False, repr=False, compare=False)
+    _review: bool = field(default=True, init=False, repr=False, compare=False)
+    _seq: int = field(default=0, init=False, repr=False, compare=False)
+
+    def bind(self, units: Mapping[str, Unit]) -> None:
+        self._pipeline = units.get(self.pipeline_unit)
 
     def observe(self) -> Snapshot:
         return Snapshot({
@@ -20,11 +50,113 @@ class PartsInventory(Unit):
             "on_order": tuple(tuple(sorted(x.items())) for x in self.on_order),
         })
 
+    def obs_layout(self, spec: ObservationSpec) -> Tuple[List[str], Dict[str, Any]]:
+        parts = tuple(dict.fromkeys([*self.stock, *self.unit_cost, *self.lead_time_hours, *self.policies]))
+        cap = spec.capacity("on_order")
+        cols = [f"stock.{p}" for p in parts] + list_columns("on_order", cap, ("part", "qty", "eta_hours"))
+        return cols, {"parts": parts, "on_order": cap, "code": spec.code}
+
+    def observe_into(self, buf: np.ndarray, layout: UnitLayout) -> None:
+        ix = layout.index
+        parts = ix["parts"]
+        for i, p in enumerate(parts):
+            buf[i] = self.stock.get(p, 0)
+        rows = [(o.get("part_id"), o.get("qty", 0), max(0.0, o.get("due_hours", self.clock) - self.clock)) for o in self.on_order]
+        write_rows(buf, len(parts), ix["on_order"], 3, rows, _order_row, ix["code"])
+
     def consume(self, part_id: str, qty: int) -> bool:
         if self.stock.get(part_id, 0) >= qty:
             self.stock[part_id] -= qty
+            self._review = True
+            self.touch()
             return True
         return False
 
     def add_stock(self, part_id: str, qty: int) -> None:
         self.stock[part_id] = self.stock.get(part_id, 0) + max(0, qty)
+        self._review = True
+        self.touch()
+
+    # ---- ordering ----
+
+    def price(self, part_id: str) -> float:
+        return part_price(part_id, self.unit_cost, self.catalog)
+
+    def lead_time(self, part_id: str) -> float:
+        return self.lead_time_hours.get(part_id, self.default_lead_time_hours)
+
+    def inbound(self) -> List[Tuple[str, int, float]]:
+        """(part, qty, eta_hours) headed here: every pipeline shipment when bound, else the open orders."""
+        if self._pipeline is not None:
+            return [(s["part_id"], s.get("qty", 0), self._pipeline.eta(s)) for s in self._pipeline.shipments]
+        return [(o["part_id"], o["qty"], max(0.0, o.get("due_hours", self.clock) - self.clock)) for o in self.on_order]
+
+    def position(self, part_id: str) -> int:
+        """Stock plus quantity inbound."""
+        return self.stock.get(part_id, 0) + sum(q for p, q, _ in self.inbound() if p == part_id)
+
+    def order(self, part_id: str, qty: int) -> Dict[str, Any]:
+        """Ship `qty` through the bound LogisticsPipeline; it arrives after the part's lead time."""
+        if self._pipeline is None:
+            raise RuntimeError(f"PartsInventory has no {self.pipeline_unit!r} unit to order through")
+        self._seq += 1
+        lead = self.lead_time(part_id)
+        o = {"order_id": f"{self.name}-{self._seq}", "part_id": part_id, "qty": int(qty), "due_hours": self.clock + lead}
+        self.on_order.append(o)
+        # Relative to the pipeline's clock, which lags ours within a step when it steps later
+        self._pipeline.add_shipment(part_id, int(qty), o["due_hours"] - self._pipeline.clock, order_id=o["order_id"])
+        self.emit("parts_cost", self.order_cost + qty * self.price(part_id))
+        self.touch()
+        return o
+
+    def receive(self, part_id: str, qty: int, order_id: Optional[str] = None) -> None:
+        """Delivery from the pipeline: add to stock and close the matching order."""
+        if order_id is not None:
+            self.on_order = [o for o in self.on_order if o.get("order_id") != order_id]
+        self.add_stock(part_id, qty)
+
+    def review(self) -> List[Dict[str, Any]]:
+        """Apply every policy once against the current positions; returns the orders placed."""
+        self._review = False
+        placed = []
+        inbound: Dict[str, int] = {}
+        for p, q, _ in self.inbound():
+            inbound[p] = inbound.get(p, 0) + q
+        for part, policy in self.policies.items():
+            q = policy.order_qty(self.stock.get(part, 0) + inbound.get(part, 0))
+            if q > 0:
+                placed.append(self.order(part, q))
+        return placed
+
+    def step_exogenous(self, dt: float, rng: random.Random) -> None:
+        self.clock += dt
+        if self.on_order:
+            self.touch()
+        # Positions only move when stock or orders do, so policies are reviewed only then
+        if self._review and self.policies and self._pipeline is not None:
+            self.review()
+
+    # ---- what-if ----
+
+    def what_if(self, demand_per_hour: Mapping[str, float], horizon_hours: float = 24.0 * 180,
+                candidates: Optional[Sequence[Mapping[str, ReorderPolicy]]] = None, replicas: int = 200,
+                dt_hours: float = 24.0, holding_rate_per_year: float = 0.25, stockout_cost_per_unit: float = 50000.0,
+                rng: Any = None) -> WhatIfResult:
+        """
+        Months of stochastic consumption and reordering for each candidate policy set
+        (default: the current `policies`), starting from the current stock and
+        inbound shipments, in one vectorized pass (models.inventory_policy.simulate_inventory)
+        instead of Environment episodes. Parts without a policy never reorder.
+        """
+        parts = tuple(demand_per_hour)
+        candidates = [self.policies] if candidates is None else list(candidates)
+        levels = np.array([[c[p].levels if p in c else (-1, 0) for p in parts] for c in candidates], dtype=np.int64)
+        pix = {p: i for i, p in enumerate(parts)}
+        in_transit = [(pix[p], int(q), eta) for p, q, eta in self.inbound() if p in pix]
+        return simulate_inventory(
+            levels.reshape(len(candidates), len(parts), 2),
+            [demand_per_hour[p] for p in parts], [self.lead_time(p) for p in parts], [self.price(p) for p in parts],
+            horizon_hours, dt_hours, replicas, initial_stock=[self.stock.get(p, 0) for p in parts],
+            in_transit=in_transit, order_cost=self.order_cost, holding_rate_per_year=holding_rate_per_year,
+            stockout_cost_per_unit=stockout_cost_per_unit, parts=parts, rng=rng,
+        )
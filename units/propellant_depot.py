@@ -1,13 +1,103 @@
 from __future__ import annotations
+from collections.abc import MutableMapping
 from dataclasses import dataclass, field
-from typing import Dict
+from typing import Dict, Any, Iterator, List, Sequence, Tuple
+import math
 import random
+import numpy as np
 from luna_facilities.core.unit import Unit
 from luna_facilities.core.snapshot import Snapshot
+from luna_facilities.core.observation import ObservationSpec, UnitLayout
+from luna_facilities.vehicles.fleet_store import StoredVehicle
+
+# (depot_id, prop, amount_kg) or (depot_id, prop, amount_kg, room_kg) where room_kg is the receiver's free capacity
+TransferRequest = Tuple[Any, ...]
+
+
+class _DepotTanks(MutableMapping):
+    """prop -> mass_kg view of one row of PropellantDepot.mass; only props present in the depot are keys."""
+    __slots__ = ("_dep", "_row")
+
+    def __init__(self, dep: "PropellantDepot", row: int) -> None:
+        self._dep, self._row = dep, row
+
+    def __getitem__(self, prop: str) -> float:
+        j = self._dep._prop_ix.get(prop)
+        if j is None or not self._dep.present[self._row, j]:
+            raise KeyError(prop)
+        return float(self._dep.mass[self._row, j])
+
+    def __setitem__(self, prop: str, mass: float) -> None:
+        j = self._dep._prop(prop)
+        self._dep.mass[self._row, j] = mass
+        self._dep.present[self._row, j] = True
+        self._dep.touch()
+
+    def __delitem__(self, prop: str) -> None:
+        self[prop]
+        j = self._dep._prop_ix[prop]
+        self._dep.mass[self._row, j] = 0.0
+        self._dep.present[self._row, j] = False
+        self._dep.touch()
+
+    def __iter__(self) -> Iterator[str]:
+        present = self._dep.present[self._row]
+        return iter([p for j, p in enumerate(self._dep.props) if present[j]])
+
+    def __len__(self) -> int:
+        return int(self._dep.present[self._row].sum())
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+class _TankView(MutableMapping):
+    """depot_id -> _DepotTanks view, so `tanks` keeps its nested-dict interface over the arrays."""
+    __slots__ = ("_dep",)
+
+    def __init__(self, dep: "PropellantDepot") -> None:
+        self._dep = dep
+
+    def __getitem__(self, depot_id: str) -> _DepotTanks:
+        return _DepotTanks(self._dep, self._dep._depot_ix[depot_id])
+
+    def __setitem__(self, depot_id: str, props: Dict[str, float]) -> None:
+        i = self._dep._depot(depot_id)
+        self._dep.mass[i] = 0.0
+        self._dep.present[i] = False
+        row = _DepotTanks(self._dep, i)
+        for p, m in props.items():
+            row[p] = m
+        self._dep.touch()
+
+    def __delitem__(self, depot_id: str) -> None:
+        # The row stays allocated (depot_ids labels rows); the depot just stops being reported
+        i = self._dep._depot_ix.pop(depot_id)
+        self._dep.mass[i] = 0.0
+        self._dep.present[i] = False
+        self._dep.touch()
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._dep._depot_ix))
+
+    def __len__(self) -> int:
+        return len(self._dep._depot_ix)
+
+    def __repr__(self) -> str:
+        return repr({d: dict(t) for d, t in self.items()})
+
 
 @dataclass
 class PropellantDepot(Unit):
+    """
+    Depot inventory as a dense depots x props mass matrix (`mass`, with a
+    `present` mask for props a depot actually stocks) plus per-cell capacity
+    and a per-prop boiloff-rate vector. `tanks` is a nested-mapping view over
+    the arrays; pass a plain dict at construction. Change boiloff rates with
+    set_boiloff so the rate vector stays in sync.
+    """
     name: str = "PropellantDepot"
+    handles_actions = ("transfer_propellant",)
 
     # depot_id -> prop_name -> mass_kg
     tanks: Dict[str, Dict[str, float]] = field(default_factory=dict)
@@ -15,31 +105,240 @@ class PropellantDepot(Unit):
     transfer_rate_kg_per_step: float = 1000.0
     boiloff_frac_per_day: Dict[str, float] = field(default_factory=lambda: {"LOX": 0.0002, "LH2": 0.0015})
     zero_boiloff_enabled: bool = False
+    capacity_kg: Dict[str, Dict[str, float]] = field(default_factory=dict)  # depot_id -> prop -> max mass; unlisted is unbounded
+
+    depot_ids: List[str] = field(default_factory=list, init=False, repr=False, compare=False)
+    props: List[str] = field(default_factory=list, init=False, repr=False, compare=False)
+    mass: np.ndarray = field(default=None, init=False, repr=False, compare=False)
+    present: np.ndarray = field(default=None, init=False, repr=False, compare=False)
+    capacity: np.ndarray = field(default=None, init=False, repr=False, compare=False)
+    boiloff_rate: np.ndarray = field(default=None, init=False, repr=False, compare=False)
+    _depot_ix: Dict[str, int] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _prop_ix: Dict[str, int] = field(default_factory=dict, init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        src, self.tanks = self.tanks, _TankView(self)
+        self.mass = np.zeros((0, 0))
+        self.present = np.zeros((0, 0), dtype=bool)
+        self.capacity = np.zeros((0, 0))
+        self.boiloff_rate = np.zeros(0)
+        for p in self.boiloff_frac_per_day:
+            self._prop(p)
+        for d, props in src.items():
+            self.tanks[d] = props
+        for d, props in self.capacity_kg.items():
+            for p, cap in props.items():
+                self.capacity[self._depot(d), self._prop(p)] = cap
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # The tanks view points back at this object; rebuild it instead of pickling it
+        state = self.__dict__.copy()
+        del state["tanks"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.clear()
+        self.__dict__.update(state)
+        self.tanks = _TankView(self)
+
+    # ---- layout ----
+
+    def _depot(self, depot_id: str) -> int:
+        i = self._depot_ix.get(depot_id)
+        if i is None and depot_id in self.depot_ids:
+            # A removed depot gets its old row back
+            i = self._depot_ix[depot_id] = self.depot_ids.index(depot_id)
+        if i is None:
+            i = self._depot_ix[depot_id] = self.mass.shape[0]
+            P = self.mass.shape[1]
+            self.depot_ids.append(depot_id)
+            self.mass = np.vstack([self.mass, np.zeros((1, P))])
+            self.present = np.vstack([self.present, np.zeros((1, P), dtype=bool)])
+            self.capacity = np.vstack([self.capacity, np.full((1, P), np.inf)])
+        return i
+
+    def _prop(self, prop: str) -> int:
+        j = self._prop_ix.get(prop)
+        if j is None:
+            j = self._prop_ix[prop] = self.mass.shape[1]
+            D = self.mass.shape[0]
+            self.props.append(prop)
+            self.mass = np.hstack([self.mass, np.zeros((D, 1))])
+            self.present = np.hstack([self.present, np.zeros((D, 1), dtype=bool)])
+            self.capacity = np.hstack([self.capacity, np.full((D, 1), np.inf)])
+            self.boiloff_rate = np.append(self.boiloff_rate, self.boiloff_frac_per_day.get(prop, 0.0))
+        return j
+
+    def set_boiloff(self, prop: str, frac_per_day: float) -> None:
+        self.boiloff_frac_per_day[prop] = frac_per_day
+        self.boiloff_rate[self._prop(prop)] = frac_per_day
+        self.touch()
+
+    def export_cells(self, props: Sequence[str] = ()) -> Tuple[List[str], List[str], np.ndarray, np.ndarray]:
+        """
+        (depot ids, props, mass, present) for the reported depots, one matrix row per
+        depot id and one column per prop. Any of `props` the depot lacks is added
+        first. import_cells writes the same layout back.
+        """
+        for p in props:
+            self._prop(p)
+        rows = list(self._depot_ix.values())
+        return list(self._depot_ix), list(self.props), self.mass[rows], self.present[rows]
+
+    def import_cells(self, depot_ids: Sequence[str], mass: np.ndarray, present: np.ndarray) -> None:
+        """Overwrite the rows of `depot_ids`; columns follow `props` from the left, as export_cells returned them."""
+        rows = [self._depot_ix[d] for d in depot_ids]
+        P = mass.shape[1]
+        self.mass[rows, :P] = mass
+        self.present[rows, :P] = present
+        self.touch()
+
+    # ---- observation ----
 
     def observe(self) -> Snapshot:
+        props, mass, present = self.props, self.mass.tolist(), self.present.tolist()
         return Snapshot({
-            "tanks": self.tanks,
+            "tanks": {d: {p: mass[i][j] for j, p in enumerate(props) if present[i][j]} for d, i in self._depot_ix.items()},
             "transfer_rate_kg_per_step": self.transfer_rate_kg_per_step,
             "zero_boiloff_enabled": self.zero_boiloff_enabled,
         })
 
+    def obs_layout(self, spec: ObservationSpec) -> Tuple[List[str], Dict[str, Any]]:
+        depots = tuple(self._depot_ix)
+        props = tuple(self.props)
+        cols = [f"tanks.{d}.{p}" for d in depots for p in props] + ["zero_boiloff_enabled"]
+        return cols, {"rows": np.array([self._depot_ix[d] for d in depots], dtype=np.int64), "props": len(props)}
+
+    def observe_into(self, buf: np.ndarray, layout: UnitLayout) -> None:
+        # Rows and prop columns only ever get appended, so the compiled block is a fixed sub-matrix
+        rows, P = layout.index["rows"], layout.index["props"]
+        n = len(rows) * P
+        buf[:n] = self.mass[rows, :P].ravel()
+        buf[n] = self.zero_boiloff_enabled
+
+    # ---- dynamics ----
+
     def step_exogenous(self, dt: float, rng: random.Random) -> None:
         # dt is in hours unless you choose otherwise; convert to days
         days = dt / 24.0
-        if self.zero_boiloff_enabled:
+        if self.zero_boiloff_enabled or not self._depot_ix:
             return
-        for depot_id, props in self.tanks.items():
-            for prop, mass in list(props.items()):
-                frac = self.boiloff_frac_per_day.get(prop, 0.0)
-                props[prop] = max(0.0, mass * (1.0 - frac) ** max(0.0, days))
+        self.touch()
+        # Per-prop factors use Python's pow: NumPy's SIMD power can differ in the last ulp
+        days = max(0.0, days)
+        decay = np.array([(1.0 - f) ** days for f in self.boiloff_rate.tolist()])
+        kept = np.maximum(0.0, self.mass * decay)
+        # Boiled-off mass counts as propellant used
+        self.emit("propellant_used", math.fsum((self.mass - kept).ravel().tolist()))
+        self.mass[...] = kept
+
+    def step_exogenous_span(self, dt: float, steps: int, rng: random.Random) -> None:
+        # Geometric boiloff composes, so `steps` steps are one step of length dt * steps
+        self.step_exogenous(dt * steps, rng)
 
     def add(self, depot_id: str, prop: str, amount_kg: float) -> float:
-        self.tanks.setdefault(depot_id, {})
-        self.tanks[depot_id][prop] = self.tanks[depot_id].get(prop, 0.0) + max(0.0, amount_kg)
-        return max(0.0, amount_kg)
+        i, j = self._depot(depot_id), self._prop(prop)
+        have = self.mass[i, j] if self.present[i, j] else 0.0
+        added = min(max(0.0, amount_kg), max(0.0, self.capacity[i, j] - have))
+        self.mass[i, j] = have + added
+        self.present[i, j] = True
+        self.touch()
+        return float(added)
 
     def transfer(self, depot_id: str, prop: str, amount_kg: float) -> float:
-        avail = self.tanks.get(depot_id, {}).get(prop, 0.0)
+        i, j = self._depot_ix[depot_id], self._prop(prop)
+        avail = float(self.mass[i, j])
         moved = min(avail, max(0.0, amount_kg), self.transfer_rate_kg_per_step)
-        self.tanks[depot_id][prop] = avail - moved
+        self.mass[i, j] = avail - moved
+        self.present[i, j] = True
+        self.touch()
+        self.emit("propellant_used", moved)
+        return moved
+
+    def transfer_many(self, requests: Sequence[TransferRequest]) -> np.ndarray:
+        """
+        Apply many depot-to-receiver transfers at once; returns kg moved per request.
+
+        Each request is capped by transfer_rate_kg_per_step and its optional
+        room_kg, and requests drawing on the same tank are served in order, so
+        the result equals calling transfer() on each (bit for bit). Unknown
+        depots raise KeyError before anything is moved.
+        """
+        moved = self._draw_many(requests)
+        if len(moved):
+            self.emit("propellant_used", math.fsum(moved.tolist()))
+        return moved
+
+    def _draw_many(self, requests: Sequence[TransferRequest]) -> np.ndarray:
+        # transfer_many without the propellant_used delta
+        n = len(requests)
+        if n == 0:
+            return np.zeros(0)
+        di = np.array([self._depot_ix[r[0]] for r in requests], dtype=np.int64)
+        pj = np.array([self._prop(r[1]) for r in requests], dtype=np.int64)
+        want = np.maximum(0.0, np.array([float(r[2]) for r in requests]))
+        room = np.array([float(r[3]) if len(r) > 3 else np.inf for r in requests])
+        want = np.minimum(np.minimum(want, self.transfer_rate_kg_per_step), np.maximum(0.0, room))
+
+        cell = di * self.mass.shape[1] + pj
+        order = np.argsort(cell, kind="stable")
+        cell_s, want_s = cell[order], want[order]
+        starts = np.flatnonzero(np.r_[True, cell_s[1:] != cell_s[:-1]])
+        bounds = np.r_[starts, n]
+        flat = self.mass.reshape(-1)
+        moved_s = np.empty(n)
+        for a, b in zip(bounds[:-1], bounds[1:]):
+            # Left fold avail - w0 - w1 - ...: exact while requests are met, and the first shortfall drains the tank to 0
+            rem = np.subtract.accumulate(np.r_[flat[cell_s[a]], want_s[a:b]])
+            moved_s[a:b] = np.minimum(np.maximum(rem[:-1], 0.0), want_s[a:b])
+            flat[cell_s[a]] = max(rem[-1], 0.0)
+        self.present.reshape(-1)[cell] = True
+        self.touch()
+        moved = np.empty(n)
+        moved[order] = moved_s
+        return moved
+
+    def on_transfer_propellant(self, env: Any, actions: List[Any]) -> List[float]:
+        # Result: kg moved. Each draw is capped by the receiving tank's free room (receivers without a tank for the
+        # prop take nothing), so the depot only gives up what the vehicle accepts. Draws come off the depot in one
+        # transfer_many and LOX/LH2 go into the cryo tanks in one FleetStore.fill_tanks; a batch that fills the same
+        # tank twice is split where the tank repeats, so each draw sees the room left by the earlier ones.
+        fleet_unit = env.units.get("VehicleFleet")
+        if fleet_unit is None:
+            return self.transfer_many([(a.params["depot_id"], a.params["prop"], a.params["amount_kg"]) for a in actions]).tolist()
+        fleet = fleet_unit.vehicles
+        vids = [a.params["vehicle_id"] for a in actions]
+        props = [a.params["prop"] for a in actions]
+        moved: List[float] = []
+        start = 0
+        while start < len(actions):
+            seen, end = set(), start
+            while end < len(actions) and (vids[end], props[end]) not in seen:
+                seen.add((vids[end], props[end]))
+                end += 1
+            moved.extend(self._transfer_into(fleet, actions[start:end], vids[start:end], props[start:end]))
+            start = end
+        if moved:
+            self.emit("propellant_used", math.fsum(moved))
+        if any(vid in fleet for vid in vids):
+            fleet_unit.touch()
+        return moved
+
+    def _transfer_into(self, fleet: Any, actions: List[Any], vids: List[Any], props: List[str]) -> List[float]:
+        # One draw per action into distinct receiving tanks: clamp to each tank's room, draw, then fill
+        room = fleet.tank_room(vids, props)
+        plain = []
+        for k, (vid, p) in enumerate(zip(vids, props)):
+            # Plain Vehicle objects (not store-backed) with cryo tanks are filled one by one
+            v = fleet.get(vid)
+            if v is None or isinstance(v, StoredVehicle) or p not in ("LOX", "LH2") or "propellant" not in v.observe():
+                continue
+            tank = v.lox if p == "LOX" else v.lh2
+            room[k] = max(0.0, tank.capacity_kg - tank.mass_kg)
+            plain.append((k, tank))
+        moved = self._draw_many([(a.params["depot_id"], p, a.params["amount_kg"], r)
+                                 for a, p, r in zip(actions, props, room.tolist())]).tolist()
+        fleet.fill_tanks(vids, props, moved)
+        for k, tank in plain:
+            tank.add(moved[k])
         return moved
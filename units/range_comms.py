@@ -1,15 +1,55 @@
 from __future__ import annotations
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Tuple
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, List, Optional, Tuple
+import math
+import numpy as np
 from luna_facilities.core.unit import Unit
 from luna_facilities.core.snapshot import Snapshot
+from luna_facilities.core.observation import ObservationSpec, UnitLayout, list_columns, write_rows
+
+def _window_row(buf, pos, w, code) -> None:
+    buf[pos] = w[0]
+    buf[pos + 1] = w[1]
+
+def _reservation_row(buf, pos, r, code) -> None:
+    buf[pos] = r.get("t0", 0.0)
+    buf[pos + 1] = r.get("t1", 0.0)
+    buf[pos + 2] = r.get("channels", 1)
 
 @dataclass
 class RangeAndComms(Unit):
+    """
+    Comm/range constraints: blackout windows (closed intervals) and a channel
+    reservation calendar capped at `capacity_channels`.
+
+    Blackouts are kept as a sorted, merged interval index and channel use as a
+    step function over sorted breakpoints, so lookups are bisections plus a
+    scan of the breakpoints inside the queried window.
+    """
     name: str = "RangeAndComms"
     capacity_channels: int = 10
     blackout_periods: List[Tuple[float, float]] = field(default_factory=list)
-    reservations: List[Dict[str, Any]] = field(default_factory=list)
+    reservations: List[Dict[str, Any]] = field(default_factory=list)  # {reservation_id, t0, t1, channels, ...}
+
+    # merged blackout index, rebuilt lazily when blackout_periods changes
+    _b_starts: List[float] = field(default_factory=list, init=False, repr=False, compare=False)
+    _b_ends: List[float] = field(default_factory=list, init=False, repr=False, compare=False)
+    _b_count: int = field(default=-1, init=False, repr=False, compare=False)
+
+    # channel occupancy: _levels[i] channels in use on [_times[i], _times[i + 1])
+    _times: List[float] = field(default_factory=list, init=False, repr=False, compare=False)
+    _levels: List[int] = field(default_factory=list, init=False, repr=False, compare=False)
+    _next_id: int = field(default=0, init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        for r in self.reservations:
+            r.setdefault("reservation_id", self._new_id())
+            self._occupy(float(r["t0"]), float(r["t1"]), int(r.get("channels", 1)))
+
+    def _new_id(self) -> int:
+        self._next_id += 1
+        return self._next_id
 
     def observe(self) -> Snapshot:
         return Snapshot({
@@ -18,5 +58,163 @@ class RangeAndComms(Unit):
             "reservations": tuple(tuple(sorted(r.items())) for r in self.reservations),
         })
 
+    def obs_layout(self, spec: ObservationSpec) -> Tuple[List[str], Dict[str, Any]]:
+        bcap, rcap = spec.capacity("blackouts"), spec.capacity("reservations")
+        cols = ["capacity_channels"] + list_columns("blackouts", bcap, ("t0", "t1")) \
+            + list_columns("reservations", rcap, ("t0", "t1", "channels"))
+        return cols, {"blackouts": bcap, "reservations": rcap}
+
+    def observe_into(self, buf: np.ndarray, layout: UnitLayout) -> None:
+        ix = layout.index
+        self._index()
+        buf[0] = self.capacity_channels
+        write_rows(buf, 1, ix["blackouts"], 2, zip(self._b_starts, self._b_ends), _window_row)
+        write_rows(buf, 2 + 3 * ix["blackouts"], ix["reservations"], 3, self.reservations, _reservation_row)
+
+    # ---- blackouts ----
+
+    def add_blackout(self, t0: float, t1: float) -> None:
+        self.blackout_periods.append((t0, t1))
+        self._b_count = -1
+        self.touch()
+
+    def set_blackouts(self, periods: List[Tuple[float, float]]) -> None:
+        self.blackout_periods = list(periods)
+        self._b_count = -1
+        self.touch()
+
+    def _index(self) -> None:
+        # Direct appends to blackout_periods are picked up by the length check; use set_blackouts() for other edits
+        if len(self.blackout_periods) == self._b_count:
+            return
+        starts: List[float] = []
+        ends: List[float] = []
+        for a, b in sorted(self.blackout_periods):
+            if starts and a <= ends[-1]:
+                ends[-1] = max(ends[-1], b)
+            else:
+                starts.append(a)
+                ends.append(b)
+        self._b_starts, self._b_ends, self._b_count = starts, ends, len(self.blackout_periods)
+
+    def _blackout_at(self, t: float) -> int:
+        """Index of the merged window containing t, or -1."""
+        self._index()
+        i = bisect_right(self._b_starts, t) - 1
+        return i if i >= 0 and t <= self._b_ends[i] else -1
+
     def is_blackout(self, t: float) -> bool:
-        return any(a <= t <= b for a, b in self.blackout_periods)
+        return self._blackout_at(t) >= 0
+
+    def next_clear_time(self, t: float) -> float:
+        """t itself when clear, otherwise the first clear instant after the (merged) blackout covering t."""
+        i = self._blackout_at(t)
+        # Windows are closed, so their end point is still dark
+        return t if i < 0 else math.nextafter(self._b_ends[i], math.inf)
+
+    def next_event_time(self, t: float) -> Optional[float]:
+        # Blackouts begin at a and end at b
+        self._index()
+        i = bisect_right(self._b_starts, t)
+        if i > 0 and self._b_ends[i - 1] > t:
+            return self._b_ends[i - 1]
+        return self._b_starts[i] if i < len(self._b_starts) else None
+
+    # ---- channel reservations ----
+
+    def _split(self, t: float) -> int:
+        """Ensure a breakpoint at t and return its index."""
+        i = bisect_left(self._times, t)
+        if i < len(self._times) and self._times[i] == t:
+            return i
+        self._times.insert(i, t)
+        self._levels.insert(i, self._levels[i - 1] if i > 0 else 0)
+        return i
+
+    def _occupy(self, t0: float, t1: float, channels: int) -> None:
+        i0 = self._split(t0)
+        i1 = self._split(t1)
+        levels = self._levels
+        for i in range(i0, i1):
+            levels[i] += channels
+
+    def channels_in_use(self, t0: float, t1: float) -> int:
+        """Peak number of reserved channels over [t0, t1)."""
+        if t1 <= t0 or not self._times:
+            return 0
+        i0 = max(0, bisect_right(self._times, t0) - 1)
+        i1 = bisect_left(self._times, t1)
+        return max(self._levels[i0:i1], default=0)
+
+    def can_reserve(self, t0: float, t1: float, channels: int = 1) -> bool:
+        return self.channels_in_use(t0, t1) + channels <= self.capacity_channels
+
+    def reserve(self, t0: float, t1: float, channels: int = 1, **meta: Any) -> Optional[int]:
+        """
+        Book `channels` (at least 1) over [t0, t1); returns the reservation id, or
+        None if the booking is empty or capacity would be exceeded.
+        """
+        if channels < 1 or t1 <= t0 or not self.can_reserve(t0, t1, channels):
+            return None
+        rid = self._new_id()
+        self.reservations.append({**meta, "reservation_id": rid, "t0": t0, "t1": t1, "channels": channels})
+        self._occupy(t0, t1, channels)
+        self.touch()
+        return rid
+
+    def release(self, reservation_id: int) -> bool:
+        for k, r in enumerate(self.reservations):
+            if r["reservation_id"] == reservation_id:
+                del self.reservations[k]
+                self._occupy(float(r["t0"]), float(r["t1"]), -int(r.get("channels", 1)))
+                self.touch()
+                return True
+        return False
+
+    def earliest_slot(self, t: float, duration: float, channels: int = 1, avoid_blackouts: bool = True) -> float:
+        """
+        Earliest start s >= t such that [s, s + duration) has `channels` free
+        channels (and, by default, does not touch a blackout).
+        """
+        free = self.capacity_channels - channels
+        if free < 0:
+            return float("inf")
+        times, levels = self._times, self._levels
+        s = t
+        while True:
+            if avoid_blackouts:
+                s = self._clear_window(s, duration)
+            # Sweep the breakpoints overlapping [s, s + duration)
+            i = max(0, bisect_right(times, s) - 1)
+            blocked = None
+            while i < len(times) and times[i] < s + duration:
+                if levels[i] > free and (i + 1 == len(times) or times[i + 1] > s):
+                    blocked = i
+                    break
+                i += 1
+            if blocked is None:
+                return s
+            # Restart after the first run of overfull segments
+            while blocked < len(times) and levels[blocked] > free:
+                blocked += 1
+            if blocked == len(times):
+                return float("inf")
+            s = max(s, times[blocked])
+
+    def _clear_window(self, s: float, duration: float) -> float:
+        """Earliest s' >= s with [s', s' + duration] outside every blackout."""
+        self._index()
+        starts, ends = self._b_starts, self._b_ends
+        while True:
+            i = self._blackout_at(s)
+            if i >= 0:
+                s = ends[i]
+                # the closed window still covers its end point; nudge past it
+                s = math.nextafter(s, math.inf)
+                continue
+            j = bisect_right(starts, s)
+            # Blackouts are closed, so a window ending exactly at a blackout start touches it
+            if j < len(starts) and starts[j] <= s + duration:
+                s = math.nextafter(ends[j], math.inf)
+                continue
+            return s
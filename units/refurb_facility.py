@@ -1,39 +1,186 @@
 from __future__ import annotations
+from bisect import bisect_left
 from dataclasses import dataclass, field
-from typing import Dict, List
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import heapq
 import random
+import numpy as np
 from luna_facilities.core.unit import Unit
 from luna_facilities.core.snapshot import Snapshot
+from luna_facilities.core.observation import ObservationSpec, UnitLayout, list_columns, write_rows
+
+# Wait-queue entry: (-priority, arrival seq, vehicle_id, duration_hours); heap order = priority, then FIFO
+QueueEntry = Tuple[float, int, str, float]
+
+def _bay_row(buf, pos, item, code) -> None:
+    buf[pos] = code("vehicle", item[0])
+    buf[pos + 1] = item[1]
+
+def _queue_row(buf, pos, entry, code) -> None:
+    buf[pos] = code("vehicle", entry[2])
 
 @dataclass
 class RefurbFacility(Unit):
+    """
+    Refurb bays with a completion-time min-heap and a priority wait queue.
+
+    Times are on the facility clock, which advances with step_exogenous and
+    starts at 0 like MissionClock. Snapshots still report remaining hours.
+    The completion log keeps the newest `completed_limit` entries (None keeps
+    all), so long campaigns and their checkpoints stay bounded.
+    """
     name: str = "RefurbFacility"
+    handles_actions = ("start_refurb",)
     bays: int = 4
-    queue: List[str] = field(default_factory=list)
-    in_service: Dict[str, float] = field(default_factory=dict)  # vehicle_id -> remaining_hours
+    queue: List[QueueEntry] = field(default_factory=list)       # heap; plain vehicle ids are accepted at init
+    in_service: Dict[str, float] = field(default_factory=dict)  # vehicle_id -> completion time (facility clock)
+    clock: float = 0.0
+    default_duration_hours: float = 24.0                        # for vehicles queued without a duration
+    completed: List[Tuple[float, str]] = field(default_factory=list)  # (completion time, vehicle_id), time-ordered
+    completed_limit: Optional[int] = 1000                       # newest entries kept in `completed`; None is unbounded
+
+    _done: List[Tuple[float, int, str]] = field(default_factory=list, init=False, repr=False, compare=False)
+    _seq: int = field(default=0, init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        entries = []
+        for e in self.queue:
+            if isinstance(e, str):
+                e = (0.0, 0, e, self.default_duration_hours)
+            entries.append(e)
+        self.queue = [(e[0], i, e[2], e[3]) for i, e in enumerate(entries)]
+        self._seq = len(self.queue)
+        self._rebuild()
+
+    def _rebuild(self) -> None:
+        """Re-derive the heaps after in_service/queue were assigned directly."""
+        heapq.heapify(self.queue)
+        self._seq = max(self._seq, max((e[1] for e in self.queue), default=-1) + 1)
+        self._done = [(end, i, vid) for i, (vid, end) in enumerate(self.in_service.items())]
+        heapq.heapify(self._done)
+        self._seq = max(self._seq, len(self._done))
+
+    def _next_seq(self) -> int:
+        self._seq += 1
+        return self._seq
+
+    def remaining(self) -> Dict[str, float]:
+        return {vid: end - self.clock for vid, end in self.in_service.items()}
 
     def observe(self) -> Snapshot:
         return Snapshot({
             "bays": self.bays,
-            "queue": tuple(self.queue),
-            "in_service": self.in_service.copy(),
+            "queue": tuple(e[2] for e in sorted(self.queue)),
+            "in_service": self.remaining(),
         })
 
-    def start(self, vehicle_id: str, duration_hours: float) -> bool:
+    def obs_layout(self, spec: ObservationSpec) -> Tuple[List[str], Dict[str, Any]]:
+        slots, qcap = self.bays, spec.capacity("queue")
+        cols = ["bays"] + list_columns("in_service", slots, ("vehicle", "remaining_hours")) + list_columns("queue", qcap, ("vehicle",))
+        return cols, {"slots": slots, "queue": qcap, "code": spec.code}
+
+    def observe_into(self, buf: np.ndarray, layout: UnitLayout) -> None:
+        ix = layout.index
+        buf[0] = self.bays
+        write_rows(buf, 1, ix["slots"], 2, self.remaining().items(), _bay_row, ix["code"])
+        write_rows(buf, 2 + 3 * ix["slots"], ix["queue"], 1, sorted(self.queue), _queue_row, ix["code"])
+
+    def start(self, vehicle_id: str, duration_hours: float, priority: float = 0.0) -> bool:
+        """Occupy a bay now, or wait (keeping the requested duration) when all bays are busy."""
+        self.touch()
+        duration = max(0.0, duration_hours)
         if len(self.in_service) >= self.bays:
-            self.queue.append(vehicle_id)
+            heapq.heappush(self.queue, (-priority, self._next_seq(), vehicle_id, duration))
             return False
-        self.in_service[vehicle_id] = max(0.0, duration_hours)
+        self._begin(vehicle_id, duration)
         return True
 
-    def step_exogenous(self, dt: float, rng: random.Random) -> None:
+    def on_start_refurb(self, env: Any, actions: List[Any]) -> List[bool]:
+        # Result: True if a bay was free, False if the vehicle was queued
+        return [self.start(a.params["vehicle_id"], float(a.params["duration_hours"]), float(a.params.get("priority", 0.0)))
+                for a in actions]
+
+    def _begin(self, vehicle_id: str, duration: float) -> None:
+        # Restarting a vehicle already in a bay replaces its completion; the old heap entry goes stale
+        end = self.clock + duration
+        self.in_service[vehicle_id] = end
+        heapq.heappush(self._done, (end, self._next_seq(), vehicle_id))
+
+    def _prune(self) -> None:
+        done = self._done
+        while done and self.in_service.get(done[0][2]) != done[0][0]:
+            heapq.heappop(done)
+
+    def export_state(self) -> Dict[str, Any]:
+        """
+        Bay, queue and log state as plain values: clock, bays as (vehicle_id,
+        completion time, start sequence) in in_service order, the queue heap, the
+        completion log and the start-sequence counter. import_state takes it back.
+        """
+        self._prune()
+        seqs = {vid: s for end, s, vid in self._done if self.in_service.get(vid) == end}
+        return {
+            "clock": self.clock,
+            "bays": [(vid, end, seqs.get(vid, 0)) for vid, end in self.in_service.items()],
+            "queue": list(self.queue),
+            "completed": list(self.completed),
+            "seq": self._seq,
+        }
+
+    def import_state(self, state: Dict[str, Any]) -> None:
+        """Replace the facility state with one from export_state (start sequences keep their tie-breaking)."""
+        self.clock = float(state["clock"])
+        self.in_service.clear()
         done = []
-        for vid in list(self.in_service.keys()):
-            self.in_service[vid] -= dt
-            if self.in_service[vid] <= 0:
-                done.append(vid)
+        for vid, end, seq in state["bays"]:
+            self.in_service[vid] = end
+            done.append((end, seq, vid))
+        heapq.heapify(done)
+        self._done = done
+        self.queue[:] = state["queue"]
+        heapq.heapify(self.queue)
+        self.completed[:] = state["completed"]
+        self._seq = int(state["seq"])
+        self.touch()
+
+    def trim_completed(self) -> None:
+        """Drop the oldest completion-log entries beyond completed_limit."""
+        if self.completed_limit is not None and len(self.completed) > self.completed_limit:
+            del self.completed[:len(self.completed) - self.completed_limit]
+
+    def next_completion_time(self) -> Optional[float]:
+        """Facility-clock time of the next bay to finish, or None when all bays are idle."""
+        self._prune()
+        return self._done[0][0] if self._done else None
+
+    def completed_since(self, t: float) -> Iterator[Tuple[float, str]]:
+        """(completion time, vehicle_id) for every logged refurb finished at or after facility time t (see completed_limit)."""
+        return iter(self.completed[bisect_left(self.completed, (t, "")):])
+
+    def next_event_time(self, t: float) -> Optional[float]:
+        end = self.next_completion_time()
+        if end is None:
+            return None
+        return t + max(0.0, end - self.clock)
+
+    def step_exogenous_span(self, dt: float, steps: int, rng: random.Random) -> None:
+        # No completion happens before the last step of an event-free span
+        self.step_exogenous(dt * steps, rng)
+
+    def step_exogenous(self, dt: float, rng: random.Random) -> None:
+        self.clock += dt
+        if not self.in_service and not self.queue:
+            return
+        self.touch()
+
+        done = self._done
+        while done and done[0][0] <= self.clock:
+            end, _, vid = heapq.heappop(done)
+            if self.in_service.get(vid) == end:
                 del self.in_service[vid]
+                self.completed.append((end, vid))
+        self.trim_completed()
 
         while self.queue and len(self.in_service) < self.bays:
-            next_vid = self.queue.pop(0)
-            self.in_service[next_vid] = 24.0  # placeholder default
+            _, _, vid, duration = heapq.heappop(self.queue)
+            self._begin(vid, duration)
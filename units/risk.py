@@ -1,8 +1,10 @@
 from __future__ import annotations
 from dataclasses import dataclass, field
-from typing import Any, Dict
+from typing import Any, Dict, List, Tuple
+import numpy as np
 from luna_facilities.core.unit import Unit
 from luna_facilities.core.snapshot import Snapshot
+from luna_facilities.core.observation import ObservationSpec, UnitLayout
 
 @dataclass
 class RiskModel(Unit):
@@ -11,7 +13,15 @@ class RiskModel(Unit):
     weights: Dict[str, float] = field(default_factory=lambda: {"health_low": 10.0, "cert_fail": 50.0})
 
     def observe(self) -> Snapshot:
-        return Snapshot({"constraints": self.constraints, "weights": self.weights})
+        return Snapshot({"constraints": dict(self.constraints), "weights": self.weights.copy()})
+
+    def obs_layout(self, spec: ObservationSpec) -> Tuple[List[str], Dict[str, Any]]:
+        keys = tuple(self.weights.keys())
+        return [f"weights.{k}" for k in keys], {"keys": keys}
+
+    def observe_into(self, buf: np.ndarray, layout: UnitLayout) -> None:
+        for i, k in enumerate(layout.index["keys"]):
+            buf[i] = self.weights.get(k, 0.0)
 
     def risk_score(self, obs: Dict[str, Any]) -> float:
         # lightweight example
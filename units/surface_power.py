@@ -1,5 +1,5 @@
 from __future__ import annotations
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
 from luna_facilities.core.unit import Unit
 from luna_facilities.core.snapshot import Snapshot
 
@@ -11,10 +11,15 @@ class SurfacePowerSystem(Unit):
     battery_kwh: float = 2000.0
     battery_cap_kwh: float = 4000.0
 
+    obs_scalars = ("available_kw", "battery_kwh", "battery_cap_kwh")
+
     def observe(self) -> Snapshot:
-        return Snapshot(self.__dict__.copy())
+        return Snapshot(asdict(self))
 
-    def allocate_kw(self, kw: float) -> float:
+    def allocate_kw(self, kw: float, hours: float = 1.0) -> float:
+        """Reserve up to `kw` of the available power for `hours`; the kWh drawn count towards energy_used."""
         used = min(self.available_kw, max(0.0, kw))
         self.available_kw -= used
+        self.touch()
+        self.emit("energy_used", used * max(0.0, hours))
         return used
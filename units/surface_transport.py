@@ -1,17 +1,181 @@
 from __future__ import annotations
 from dataclasses import dataclass, field
-from typing import Dict, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
 from luna_facilities.core.unit import Unit
 from luna_facilities.core.snapshot import Snapshot
 
+ROUTE_METRICS = ("time", "fuel", "power")
+
+class _Routes:
+    """All-pairs shortest paths for one weighting: scalar cost, per-metric totals along the chosen path, next hop."""
+    __slots__ = ("w", "dist", "comp", "nxt")
+
+    def __init__(self, w: np.ndarray, comp_edges: np.ndarray) -> None:
+        n = comp_edges.shape[1]
+        self.w = w
+        self.comp = comp_edges.copy()                        # (M, n, n), inf where no edge
+        self.dist = np.tensordot(w, np.where(np.isfinite(self.comp), self.comp, 0.0), axes=1)
+        self.dist[~np.isfinite(self.comp[0])] = np.inf
+        idx = np.arange(n)
+        self.comp[:, idx, idx] = 0.0
+        self.dist[idx, idx] = 0.0
+        self.nxt = np.where(np.isfinite(self.dist), idx[None, :], -1)
+        for k in range(n):
+            self._relax(self.dist[:, k], self.comp[:, :, k], self.nxt[:, k], self.dist[k, :], self.comp[:, k, :])
+
+    def _relax(self, d_in, c_in, first, d_out, c_out) -> None:
+        # Paths i -> (via) -> j as d_in[i] + d_out[j]; first[i] is the first hop out of i
+        cand = d_in[:, None] + d_out[None, :]
+        better = cand < self.dist
+        if better.any():
+            self.dist = np.where(better, cand, self.dist)
+            self.comp = np.where(better[None], c_in[:, :, None] + c_out[:, None, :], self.comp)
+            self.nxt = np.where(better, first[:, None], self.nxt)
+
+    def add_edge(self, u: int, v: int, c: np.ndarray) -> None:
+        """Insert (or cheapen) edge u->v; exact while costs only go down."""
+        d = float(self.w @ c)
+        first = self.nxt[:, u].copy()
+        first[u] = v
+        d_in = self.dist[:, u] + d
+        c_in = self.comp[:, :, u] + c[:, None]
+        self._relax(d_in, c_in, first, self.dist[v, :], self.comp[:, v, :])
+
+    def uses(self, u: int, v: int, c: np.ndarray) -> bool:
+        """Whether edge u->v (with metric costs c) lies on any shortest path; tolerant of summation order."""
+        if not np.isfinite(c).all():
+            return False
+        cand = self.dist[:, u, None] + float(self.w @ c) + self.dist[None, v, :]
+        return bool((cand <= self.dist * (1.0 + 1e-12) + 1e-12).any())
+
+
 @dataclass
 class SurfaceTransportNetwork(Unit):
+    """
+    Surface route graph. route_cost/route_costs answer multi-hop queries from
+    all-pairs shortest paths (vectorized Floyd-Warshall), memoized per metric
+    weighting. set_edge/remove_edge relax cached solutions in place when that
+    is exact (new or unused edge, or one that got strictly cheaper) and
+    otherwise drop only the weightings whose shortest paths ran over it.
+    Edits made directly to
+    `edges` are picked up only if they change its length; call
+    invalidate_routes() otherwise.
+    """
     name: str = "SurfaceTransportNetwork"
     edges: Dict[Tuple[str, str], Dict[str, float]] = field(default_factory=dict)  # (src,dst)->{time,fuel,power}
     vehicles_available: int = 10
+    route_weights: Dict[str, float] = field(default_factory=lambda: {"time": 1.0})  # default scalarization
+
+    _nodes: Dict[str, int] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _comp: Optional[np.ndarray] = field(default=None, init=False, repr=False, compare=False)
+    _routes: Dict[Tuple[float, ...], _Routes] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _edge_count: int = field(default=-1, init=False, repr=False, compare=False)
+
+    obs_scalars = ("vehicles_available",)
 
     def observe(self) -> Snapshot:
-        return Snapshot({"edges": self.edges, "vehicles_available": self.vehicles_available})
+        return Snapshot({"edges": {k: dict(v) for k, v in self.edges.items()}, "vehicles_available": self.vehicles_available})
+
+    # ---- graph maintenance ----
+
+    @staticmethod
+    def _vec(e: Dict[str, float]) -> np.ndarray:
+        return np.array([float(e.get(m, 0.0)) for m in ROUTE_METRICS])
+
+    def invalidate_routes(self) -> None:
+        self._comp = None
+        self._routes.clear()
+
+    def _graph(self) -> np.ndarray:
+        if self._comp is None or self._edge_count != len(self.edges):
+            nodes: Dict[str, int] = {}
+            for s, d in self.edges:
+                nodes.setdefault(s, len(nodes))
+                nodes.setdefault(d, len(nodes))
+            comp = np.full((len(ROUTE_METRICS), len(nodes), len(nodes)), np.inf)
+            for (s, d), e in self.edges.items():
+                comp[:, nodes[s], nodes[d]] = self._vec(e)
+            self._nodes, self._comp, self._edge_count = nodes, comp, len(self.edges)
+            self._routes.clear()
+        return self._comp
+
+    def set_edge(self, src: str, dst: str, **costs: float) -> None:
+        """Add or replace edge src->dst; omitted metrics keep their old value (0 for a new edge)."""
+        old = self.edges.get((src, dst))
+        e = {**(old or {}), **{k: float(v) for k, v in costs.items()}}
+        self.edges[(src, dst)] = e
+        self.touch()
+        comp = self._comp
+        if comp is None or src not in self._nodes or dst not in self._nodes:
+            self.invalidate_routes()
+            return
+        u, v = self._nodes[src], self._nodes[dst]
+        c, c_old = self._vec(e), comp[:, u, v].copy()
+        comp[:, u, v] = c
+        self._edge_count = len(self.edges)
+        changed = c != c_old
+        cheaper = bool((c <= c_old).all())
+        for key, r in list(self._routes.items()):
+            # Relaxing is exact if no stored route used the old edge, or if every route through it strictly improves
+            if not r.uses(u, v, c_old) or (cheaper and (r.w[changed] > 0).all()):
+                r.add_edge(u, v, c)
+            else:
+                del self._routes[key]
+
+    def remove_edge(self, src: str, dst: str) -> None:
+        if self.edges.pop((src, dst), None) is None:
+            return
+        self.touch()
+        comp = self._comp
+        if comp is None:
+            return
+        u, v = self._nodes[src], self._nodes[dst]
+        c_old = comp[:, u, v].copy()
+        comp[:, u, v] = np.inf
+        self._edge_count = len(self.edges)
+        for key, r in list(self._routes.items()):
+            if r.uses(u, v, c_old):
+                del self._routes[key]
+
+    # ---- routing ----
+
+    def _solve(self, weights: Optional[Dict[str, float]]) -> _Routes:
+        comp = self._graph()
+        w = weights if weights is not None else self.route_weights
+        key = tuple(float(w.get(m, 0.0)) for m in ROUTE_METRICS)
+        r = self._routes.get(key)
+        if r is None:
+            r = self._routes[key] = _Routes(np.array(key), comp)
+        return r
+
+    def route_cost(self, src: str, dst: str, weights: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+        """Per-metric totals along the path minimizing the weighted cost (inf when unreachable)."""
+        return dict(zip(ROUTE_METRICS, self.route_costs([(src, dst)], weights)[0].tolist()))
+
+    def route_costs(self, pairs: Sequence[Tuple[str, str]], weights: Optional[Dict[str, float]] = None) -> np.ndarray:
+        """(len(pairs), len(ROUTE_METRICS)) array of route totals, one row per (src, dst)."""
+        r = self._solve(weights)
+        nodes = self._nodes
+        si = np.array([nodes.get(s, -1) for s, _ in pairs], dtype=np.int64)
+        di = np.array([nodes.get(d, -1) for _, d in pairs], dtype=np.int64)
+        out = np.full((len(pairs), len(ROUTE_METRICS)), np.inf)
+        ok = (si >= 0) & (di >= 0)
+        out[ok] = r.comp[:, si[ok], di[ok]].T
+        return out
 
-    def route_cost(self, src: str, dst: str) -> Dict[str, float]:
-        return self.edges.get((src, dst), {"time": float("inf"), "fuel": float("inf"), "power": float("inf")})
+    def route(self, src: str, dst: str, weights: Optional[Dict[str, float]] = None) -> List[str]:
+        """Node sequence of the chosen path, or [] when unreachable."""
+        r = self._solve(weights)
+        nodes = self._nodes
+        if src not in nodes or dst not in nodes:
+            return []
+        names = list(nodes)
+        i, j = nodes[src], nodes[dst]
+        if r.nxt[i, j] < 0:
+            return []
+        path = [src]
+        while i != j:
+            i = int(r.nxt[i, j])
+            path.append(names[i])
+        return path
@@ -1,20 +1,152 @@
 from __future__ import annotations
 from dataclasses import dataclass, field
-from typing import Dict
+from typing import Any, Dict, List, Tuple
+import math
 import random
+import numpy as np
 
 from luna_facilities.core.unit import Unit
 from luna_facilities.core.snapshot import Snapshot
-from luna_facilities.vehicles.base_vehicle import Vehicle
+from luna_facilities.core.observation import ObservationSpec, UnitLayout, list_columns
+from luna_facilities.models.cryo import decay_factors
+from luna_facilities.vehicles.base_vehicle import ENGINE_OBS_COLUMNS, VEHICLE_OBS_COLUMNS
+from luna_facilities.vehicles.fleet_store import FleetStore
+
+# VEHICLE_OBS_COLUMNS position -> store column, for the columnar observation fill
+_OBS_SCALARS = ((0, "ready"), (1, "health"), (2, "flights"), (7, "propellant_kg"), (8, "battery_kwh"),
+                (9, "dv_remaining_mps"), (10, "completeness_ok"), (11, "functional_ok"), (12, "post_refurb_ok"))
+
 
 @dataclass
 class VehicleFleet(Unit):
+    """
+    All vehicles, held column-wise in a FleetStore (`vehicles`, a vehicle_id ->
+    Vehicle mapping). BlueMoonMK2 and CislunarTransporter are views over its rows,
+    so boiloff, battery drain and health decay run fleet-wide on arrays.
+
+    `version` also moves with the store's `writes`, so changes made through
+    stored vehicles (or by adding and removing vehicles) need no touch(); only
+    plain Vehicle objects kept in the store still do.
+    """
     name: str = "VehicleFleet"
-    vehicles: Dict[str, Vehicle] = field(default_factory=dict)
+    vehicles: FleetStore = field(default_factory=FleetStore)
+    battery_drain_kw: float = 0.0        # idle draw on every vehicle battery
+    health_decay_per_day: float = 0.0    # wear while idle; 0 keeps health to explicit events
+
+    _version: int = field(default=0, init=False, repr=False, compare=False)
+    # (store, store.writes) when version was last read
+    _seen: Tuple[Any, int] = field(default=(None, 0), init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        if not isinstance(self.vehicles, FleetStore):
+            self.vehicles = FleetStore(self.vehicles)
+
+    @property
+    def version(self) -> int:
+        s = self.vehicles
+        if self._seen[0] is not s or self._seen[1] != s.writes:
+            self._seen = (s, s.writes)
+            self._version += 1
+        return self._version
+
+    @version.setter
+    def version(self, value: int) -> None:
+        s = self.vehicles
+        self._seen = (s, s.writes)
+        self._version = value
 
     def observe(self) -> Snapshot:
-        return Snapshot({"vehicles": {vid: v.observe() for vid, v in self.vehicles.items()}})
+        # "vehicles" maps vehicle_id -> observe() dict; "columns" is the same stored state column-wise
+        fleet = self.vehicles.snapshot()
+        return Snapshot({"vehicles": fleet, "columns": fleet.columns})
+
+    def obs_layout(self, spec: ObservationSpec) -> Tuple[List[str], Dict[str, Any]]:
+        vids = tuple(self.vehicles.keys())
+        ecap = spec.capacity("engines")
+        per = list(VEHICLE_OBS_COLUMNS) + list_columns("engines", ecap, ENGINE_OBS_COLUMNS)
+        cols = [f"{v}.{c}" for v in vids for c in per]
+        return cols, {"vehicles": vids, "engines": ecap, "stride": len(per), "code": spec.code}
+
+    def observe_into(self, buf: np.ndarray, layout: UnitLayout) -> None:
+        ix = layout.index
+        store = self.vehicles
+        if ix.get("buf") is not buf:
+            # (vehicles, stride) view of the slice, cut once per bound buffer
+            ix["buf"] = buf
+            ix["grid"] = buf.reshape(len(ix["vehicles"]), ix["stride"])
+        if ix.get("store") is not store or ix.get("generation") != store.generation:
+            ix["store"], ix["generation"] = store, store.generation
+            ix["rows"] = store.rows(ix["vehicles"])
+        grid, rows, code, ecap = ix["grid"], ix["rows"], ix["code"], ix["engines"]
+        c = store.cols
+        present = rows >= 0
+        stored = present.copy()
+        stored[present] = c["stored"][rows[present]]
+        grid[~stored] = 0.0
+        i, r = np.flatnonzero(stored), rows[stored]
+        if len(r):
+            for pos, name in _OBS_SCALARS:
+                grid[i, pos] = c[name][r]
+            for pos, name in ((3, "location"), (4, "phase")):
+                grid[i, pos] = self._codes(code, name, c[name][r])
+            grid[i, 5] = c["tank_kg"][r, 0]
+            grid[i, 6] = c["tank_kg"][r, 1]
+            base = len(VEHICLE_OBS_COLUMNS)
+            n = c["n_engines"][r]
+            grid[i, base] = n
+            width = c["eng_health"].shape[1]
+            for k in range(ecap):
+                pos = base + 1 + k * (len(ENGINE_OBS_COLUMNS) + 1)
+                on = n > k
+                if k < width:
+                    grid[i, pos] = np.where(on, c["eng_health"][r, k], 0.0)
+                    grid[i, pos + 1] = on & c["eng_operable"][r, k]
+                else:
+                    grid[i, pos:pos + 2] = 0.0
+                grid[i, pos + 2] = on
+        for j in np.flatnonzero(present & ~stored).tolist():
+            store.views[rows[j]].observe_into(grid[j], code, ecap)
+
+    def _codes(self, code: Any, vocab: str, local: np.ndarray) -> np.ndarray:
+        # Store-local codes -> spec codes, registering new strings in first-seen vehicle order
+        names = self.vehicles.vocab[vocab]
+        lut = np.zeros(len(names))
+        for k in dict.fromkeys(local.tolist()):
+            lut[k] = code(vocab, names[k])
+        return lut[local]
 
     def step_exogenous(self, dt: float, rng: random.Random) -> None:
-        # Optionally: fleet-wide degradation/noise here
-        pass
+        s = self.vehicles
+        n, c = s.n, s.cols
+        days = max(0.0, dt / 24.0)
+        stored = c["stored"][:n]
+        changed = False
+
+        boil = (stored & c["has_cryo"][:n])[:, None] & ~c["tank_zbo"][:n]
+        if boil.any():
+            mass = c["tank_kg"][:n]
+            before = mass[boil]
+            kept = np.maximum(0.0, before * decay_factors(c["tank_frac"][:n][boil], days))
+            # Boiled-off mass counts as propellant used, as in PropellantDepot
+            self.emit("propellant_used", math.fsum((before - kept).tolist()))
+            mass[boil] = kept
+            changed = True
+
+        if self.battery_drain_kw > 0.0:
+            has = stored & (c["battery_cap_kwh"][:n] > 0.0)
+            if has.any():
+                b = c["battery_kwh"][:n]
+                b[has] = np.maximum(0.0, b[has] - self.battery_drain_kw * max(0.0, dt))
+                changed = True
+
+        if self.health_decay_per_day > 0.0 and stored.any():
+            h = c["health"][:n]
+            h[stored] = np.maximum(0.0, h[stored] - self.health_decay_per_day * days)
+            changed = True
+
+        if changed:
+            self.touch()
+
+    def step_exogenous_span(self, dt: float, steps: int, rng: random.Random) -> None:
+        # Boiloff is geometric and drain/decay are linear with a floor, so `steps` steps are one step of dt * steps
+        self.step_exogenous(dt * steps, rng)
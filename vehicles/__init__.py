@@ -1,3 +1,17 @@
-from .base_vehicle import Vehicle, VehicleCommonState
-from .blue_moon_mk2 import BlueMoonMK2
-from .cislunar_transporter import CislunarTransporter
+from typing import TYPE_CHECKING
+from .._lazy import lazy_exports
+
+_EXPORTS = {
+    "Vehicle": "base_vehicle", "VehicleCommonState": "base_vehicle",
+    "BlueMoonMK2": "blue_moon_mk2",
+    "CislunarTransporter": "cislunar_transporter",
+    "FleetStore": "fleet_store", "StoredVehicle": "fleet_store",
+}
+__all__ = list(_EXPORTS)
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
+
+if TYPE_CHECKING:
+    from .base_vehicle import Vehicle, VehicleCommonState
+    from .blue_moon_mk2 import BlueMoonMK2
+    from .cislunar_transporter import CislunarTransporter
+    from .fleet_store import FleetStore, StoredVehicle
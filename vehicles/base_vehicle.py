@@ -14,9 +14,32 @@ class VehicleCommonState:
     flights: int
     assigned_mission: Optional[str] = None
 
+# Per-vehicle columns in VehicleFleet's flat observation; fields a vehicle type lacks stay 0
+VEHICLE_OBS_COLUMNS = (
+    "ready", "health", "flights", "location", "phase",
+    "lox_kg", "lh2_kg", "propellant_kg", "battery_kwh", "dv_remaining_mps",
+    "completeness_ok", "functional_ok", "post_refurb_ok",
+)
+ENGINE_OBS_COLUMNS = ("health", "operable")
+
 class Vehicle:
     """
     Base interface for vehicles within VehicleFleet.
     """
+    __slots__ = ()
+
     def observe(self) -> Dict[str, Any]:
         raise NotImplementedError
+
+    def observe_into(self, buf: Any, code: Any, engine_cap: int) -> None:
+        """
+        Write VEHICLE_OBS_COLUMNS followed by `engine_cap` padded engine rows
+        (see core.observation.list_columns). `code` encodes categorical strings.
+        """
+        c = self.common
+        buf[0] = c.ready
+        buf[1] = c.health
+        buf[2] = c.flights
+        buf[3] = code("location", c.location)
+        buf[4] = code("phase", c.phase)
+        buf[5:] = 0.0
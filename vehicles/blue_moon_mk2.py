@@ -1,26 +1,18 @@
 from __future__ import annotations
 from dataclasses import dataclass, field
-from typing import Dict, Any, List
+from typing import Any, Dict, List, Mapping, Optional, Sequence
 import random
 
 from luna_facilities.models.reliability import EngineFailureModel, BetaBernoulli
 from luna_facilities.models.cryo import CryoTank
-from .base_vehicle import Vehicle, VehicleCommonState
+from luna_facilities.core.observation import write_rows
+from .base_vehicle import ENGINE_OBS_COLUMNS, VEHICLE_OBS_COLUMNS, VehicleCommonState
+from .fleet_store import ENGINE_COLUMNS, StoredVehicle, TankView, slot_column, vehicle_column
 
 
-@dataclass
-class BE7Engine:
-    engine_id: str
-    health: float = 1.0
-    operable: bool = True
-    starts: int = 0
-    burn_minutes: float = 0.0
-
-    # Priors are placeholders and should be tuned/learned with real data
-    failure_model: EngineFailureModel = field(default_factory=lambda: EngineFailureModel(
-        start_fail=BetaBernoulli(1.0, 2000.0),
-        burn_fail_per_min=BetaBernoulli(1.0, 20000.0),
-    ))
+class EngineOps:
+    """attempt_burn over health, operable, starts, burn_minutes and failure_model."""
+    __slots__ = ()
 
     def attempt_burn(self, minutes: float, rng: random.Random) -> Dict[str, str]:
         if not self.operable:
@@ -44,54 +36,158 @@ class BE7Engine:
         return {"status": "ok", "mode": "none"}
 
 
+def _default_failure_model() -> EngineFailureModel:
+    # Priors are placeholders and should be tuned/learned with real data
+    return EngineFailureModel(
+        start_fail=BetaBernoulli(1.0, 2000.0),
+        burn_fail_per_min=BetaBernoulli(1.0, 20000.0),
+    )
+
+
 @dataclass
-class BlueMoonMK2(Vehicle):
-    """
-    MK2 lander vehicle model.
-    - Propellants: LOX/LH2
-    - Engines: BE-7 family
-    Engine count is configurable due to inconsistent public reporting.
-    """
-    common: VehicleCommonState
+class BE7Engine(EngineOps):
+    engine_id: str
+    health: float = 1.0
+    operable: bool = True
+    starts: int = 0
+    burn_minutes: float = 0.0
+    failure_model: EngineFailureModel = field(default_factory=_default_failure_model)
+
+
+class EngineView(EngineOps):
+    """BE7Engine interface over engine slot `k` of a stored vehicle."""
+    __slots__ = ("_v", "_k")
+
+    def __init__(self, v: "BlueMoonMK2", k: int) -> None:
+        self._v, self._k = v, k
 
-    main_engine_count: int = 3
+    health = slot_column("eng_health", float)
+    operable = slot_column("eng_operable", bool)
+    starts = slot_column("eng_starts", int)
+    burn_minutes = slot_column("eng_burn_minutes", float)
 
-    lox: CryoTank = field(default_factory=lambda: CryoTank("LOX", 0.0, 200000.0, 0.0005, True))
-    lh2: CryoTank = field(default_factory=lambda: CryoTank("LH2", 0.0, 40000.0, 0.0020, True))
+    @property
+    def engine_id(self) -> str:
+        return self._v._store.objs["engine_ids"][self._v._row][self._k]
 
-    battery_kwh: float = 500.0
-    battery_cap_kwh: float = 800.0
+    @property
+    def failure_model(self) -> EngineFailureModel:
+        return self._v._store.objs["failure_models"][self._v._row][self._k]
 
-    # Certification gates
-    completeness_ok: bool = False
-    functional_ok: bool = False
-    post_refurb_ok: bool = False
+    def __repr__(self) -> str:
+        return f"EngineView({self.engine_id!r}, health={self.health!r}, operable={self.operable!r})"
 
-    engines: List[BE7Engine] = field(default_factory=list)
 
-    def __post_init__(self) -> None:
-        if not self.engines:
-            self.engines = [BE7Engine(f"BE7-{i+1}") for i in range(self.main_engine_count)]
+def _engine_row(buf, pos, e, code) -> None:
+    buf[pos] = e.health
+    buf[pos + 1] = e.operable
 
-    def observe(self) -> Dict[str, Any]:
+
+class BlueMoonMK2(StoredVehicle):
+    """
+    MK2 lander vehicle model.
+    - Propellants: LOX/LH2
+    - Engines: BE-7 family
+    Engine count is configurable due to inconsistent public reporting.
+
+    State lives in a FleetStore row (see vehicles.fleet_store); `lox`, `lh2`,
+    `common` and `engines` are views over it, so assign through them.
+    """
+    __slots__ = ()
+
+    def __init__(self, common: VehicleCommonState, main_engine_count: int = 3,
+                 lox: Optional[CryoTank] = None, lh2: Optional[CryoTank] = None,
+                 battery_kwh: float = 500.0, battery_cap_kwh: float = 800.0,
+                 completeness_ok: bool = False, functional_ok: bool = False, post_refurb_ok: bool = False,
+                 engines: Optional[List[BE7Engine]] = None) -> None:
+        self._bind_private()
+        self.common = common
+        self.lox = lox if lox is not None else CryoTank("LOX", 0.0, 200000.0, 0.0005, True)
+        self.lh2 = lh2 if lh2 is not None else CryoTank("LH2", 0.0, 40000.0, 0.0020, True)
+        self.battery_kwh = battery_kwh
+        self.battery_cap_kwh = battery_cap_kwh
+        self.completeness_ok = completeness_ok
+        self.functional_ok = functional_ok
+        self.post_refurb_ok = post_refurb_ok
+        self.engines = engines or [BE7Engine(f"BE7-{i+1}") for i in range(main_engine_count)]
+
+    @property
+    def lox(self) -> TankView:
+        return TankView(self, 0)
+
+    @lox.setter
+    def lox(self, tank: CryoTank) -> None:
+        self._set_tank(0, tank)
+
+    @property
+    def lh2(self) -> TankView:
+        return TankView(self, 1)
+
+    @lh2.setter
+    def lh2(self, tank: CryoTank) -> None:
+        self._set_tank(1, tank)
+
+    battery_kwh = vehicle_column("battery_kwh", float)
+    battery_cap_kwh = vehicle_column("battery_cap_kwh", float)
+    completeness_ok = vehicle_column("completeness_ok", bool)
+    functional_ok = vehicle_column("functional_ok", bool)
+    post_refurb_ok = vehicle_column("post_refurb_ok", bool)
+
+    @property
+    def main_engine_count(self) -> int:
+        return int(self._store.cols["n_engines"][self._row])
+
+    @property
+    def engines(self) -> List[EngineView]:
+        return [EngineView(self, k) for k in range(self.main_engine_count)]
+
+    @engines.setter
+    def engines(self, engines: Sequence[Any]) -> None:
+        s, r = self._store, self._row
+        s.engine_width(len(engines))
+        s.cols["n_engines"][r] = len(engines)
+        for k in ENGINE_COLUMNS:
+            s.cols[k][r] = 0
+        for k, e in enumerate(engines):
+            s.cols["eng_health"][r, k] = e.health
+            s.cols["eng_operable"][r, k] = e.operable
+            s.cols["eng_starts"][r, k] = e.starts
+            s.cols["eng_burn_minutes"][r, k] = e.burn_minutes
+        s.objs["engine_ids"][r] = [e.engine_id for e in engines]
+        s.objs["failure_models"][r] = [e.failure_model for e in engines]
+        s.writes += 1
+
+    @staticmethod
+    def observe_row(row: Mapping[str, Any]) -> Dict[str, Any]:
         return {
-            "common": self.common.__dict__,
-            "propellant": {"lox_kg": self.lox.mass_kg, "lh2_kg": self.lh2.mass_kg},
-            "battery": {"kwh": self.battery_kwh, "cap_kwh": self.battery_cap_kwh},
+            "common": StoredVehicle.common_row(row),
+            "propellant": {"lox_kg": row["lox_kg"], "lh2_kg": row["lh2_kg"]},
+            "battery": {"kwh": row["battery_kwh"], "cap_kwh": row["battery_cap_kwh"]},
             "cert": {
-                "completeness_ok": self.completeness_ok,
-                "functional_ok": self.functional_ok,
-                "post_refurb_ok": self.post_refurb_ok,
+                "completeness_ok": row["completeness_ok"],
+                "functional_ok": row["functional_ok"],
+                "post_refurb_ok": row["post_refurb_ok"],
             },
             "engines": [{
-                "id": e.engine_id,
-                "health": e.health,
-                "operable": e.operable,
-                "starts": e.starts,
-                "burn_minutes": e.burn_minutes
-            } for e in self.engines]
+                "id": i,
+                "health": h,
+                "operable": o,
+                "starts": n,
+                "burn_minutes": m
+            } for i, h, o, n, m in zip(row["engine_ids"], row["engine_health"], row["engine_operable"],
+                                       row["engine_starts"], row["engine_burn_minutes"])]
         }
 
+    def observe_into(self, buf: Any, code: Any, engine_cap: int) -> None:
+        super().observe_into(buf, code, engine_cap)
+        buf[5] = self.lox.mass_kg
+        buf[6] = self.lh2.mass_kg
+        buf[8] = self.battery_kwh
+        buf[10] = self.completeness_ok
+        buf[11] = self.functional_ok
+        buf[12] = self.post_refurb_ok
+        write_rows(buf, len(VEHICLE_OBS_COLUMNS), engine_cap, len(ENGINE_OBS_COLUMNS), self.engines, _engine_row)
+
     def step_cryo(self, days: float) -> Dict[str, float]:
         lost_lox = self.lox.step_boiloff(days)
         lost_lh2 = self.lh2.step_boiloff(days)
@@ -1,27 +1,41 @@
 from __future__ import annotations
-from dataclasses import dataclass
-from typing import Dict, Any
+from typing import Any, Dict, Mapping
 
-from .base_vehicle import Vehicle, VehicleCommonState
+from .base_vehicle import VehicleCommonState
+from .fleet_store import StoredVehicle, vehicle_column
 
-@dataclass
-class CislunarTransporter(Vehicle):
+class CislunarTransporter(StoredVehicle):
     """
     Generic tug/transporter (architecture element).
     This can represent tankers/tugs moving cargo/propellant between orbits.
+    State lives in a FleetStore row (see vehicles.fleet_store).
     """
-    common: VehicleCommonState
+    __slots__ = ()
 
-    propellant_kg: float = 0.0
-    propellant_cap_kg: float = 150000.0
+    def __init__(self, common: VehicleCommonState, propellant_kg: float = 0.0, propellant_cap_kg: float = 150000.0,
+                 dv_budget_mps: float = 2000.0, dv_remaining_mps: float = 2000.0) -> None:
+        self._bind_private()
+        self.common = common
+        self.propellant_kg = propellant_kg
+        self.propellant_cap_kg = propellant_cap_kg
+        self.dv_budget_mps = dv_budget_mps
+        self.dv_remaining_mps = dv_remaining_mps
 
-    dv_budget_mps: float = 2000.0
-    dv_remaining_mps: float = 2000.0
+    propellant_kg = vehicle_column("propellant_kg", float)
+    propellant_cap_kg = vehicle_column("propellant_cap_kg", float)
+    dv_budget_mps = vehicle_column("dv_budget_mps", float)
+    dv_remaining_mps = vehicle_column("dv_remaining_mps", float)
 
-    def observe(self) -> Dict[str, Any]:
+    @staticmethod
+    def observe_row(row: Mapping[str, Any]) -> Dict[str, Any]:
         return {
-            "common": self.common.__dict__,
-            "propellant_kg": self.propellant_kg,
-            "propellant_cap_kg": self.propellant_cap_kg,
-            "dv_remaining_mps": self.dv_remaining_mps,
+            "common": StoredVehicle.common_row(row),
+            "propellant_kg": row["propellant_kg"],
+            "propellant_cap_kg": row["propellant_cap_kg"],
+            "dv_remaining_mps": row["dv_remaining_mps"],
         }
+
+    def observe_into(self, buf: Any, code: Any, engine_cap: int) -> None:
+        super().observe_into(buf, code, engine_cap)
+        buf[7] = self.propellant_kg
+        buf[9] = self.dv_remaining_mps
@@ -0,0 +1,495 @@
+from __future__ import annotations
+from collections.abc import Mapping as MappingABC, MutableMapping
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence, Type
+import numpy as np
+
+from luna_facilities.models.cryo import CryoTank, TankOps
+from .base_vehicle import Vehicle, VehicleCommonState
+
+TANKS = ("LOX", "LH2")
+
+# One value per vehicle row
+SCALAR_COLUMNS: Dict[str, Any] = {
+    "stored": bool,               # row backs a StoredVehicle view (False: a plain Vehicle object kept as-is)
+    "ready": bool,
+    "health": np.float64,
+    "flights": np.int64,
+    "location": np.int64,         # index into vocab["location"]
+    "phase": np.int64,            # index into vocab["phase"]
+    "has_cryo": bool,
+    "battery_kwh": np.float64,
+    "battery_cap_kwh": np.float64,
+    "completeness_ok": bool,
+    "functional_ok": bool,
+    "post_refurb_ok": bool,
+    "propellant_kg": np.float64,
+    "propellant_cap_kg": np.float64,
+    "dv_budget_mps": np.float64,
+    "dv_remaining_mps": np.float64,
+    "n_engines": np.int64,
+}
+# (rows, len(TANKS))
+TANK_COLUMNS: Dict[str, Any] = {"tank_kg": np.float64, "tank_cap": np.float64, "tank_frac": np.float64, "tank_zbo": bool}
+# (rows, engine width)
+ENGINE_COLUMNS: Dict[str, Any] = {"eng_health": np.float64, "eng_operable": bool, "eng_starts": np.int64, "eng_burn_minutes": np.float64}
+# Python objects per row
+OBJECT_COLUMNS = ("vehicle_id", "vehicle_type", "role", "assigned_mission", "engine_ids", "failure_models")
+
+_CODED = ("location", "phase")
+
+
+class FleetStore(MutableMapping):
+    """
+    vehicle_id -> Vehicle mapping whose vehicles keep their state in columns.
+
+    BlueMoonMK2 and CislunarTransporter are StoredVehicle views: `vehicles[vid] = v`
+    copies the view's row in and rebinds it here, and a deleted or replaced view
+    gets a private one-row store, so it stays usable. Other Vehicle objects are
+    kept as they are (`stored` is False on their rows). Rows are compacted on
+    delete; iteration follows insertion order like a dict.
+
+    `writes` counts every change made through the mapping or a view, so the
+    owning VehicleFleet's version moves without anyone calling touch().
+    """
+
+    def __init__(self, vehicles: Optional[Mapping[str, Vehicle]] = None) -> None:
+        self.n = 0
+        self.cols: Dict[str, np.ndarray] = {}
+        for k, dt in SCALAR_COLUMNS.items():
+            self.cols[k] = np.zeros(4, dtype=dt)
+        for k, dt in TANK_COLUMNS.items():
+            self.cols[k] = np.zeros((4, len(TANKS)), dtype=dt)
+        for k, dt in ENGINE_COLUMNS.items():
+            self.cols[k] = np.zeros((4, 0), dtype=dt)
+        self.objs: Dict[str, List[Any]] = {k: [] for k in OBJECT_COLUMNS}
+        self.views: List[Any] = []
+        self._keys: List[Any] = []
+        self.vocab: Dict[str, List[str]] = {k: [] for k in _CODED}
+        self._vocab_ix: Dict[str, Dict[str, int]] = {k: {} for k in _CODED}
+        self._index: Dict[Any, int] = {}
+        # Bumped when rows move or keys change, so callers can cache row lookups
+        self.generation = 0
+        # Bumped on every state change (including generation bumps); see VehicleFleet.version
+        self.writes = 0
+        for vid, v in (vehicles or {}).items():
+            self[vid] = v
+
+    # ---- mapping ----
+
+    def __getitem__(self, vid: Any) -> Vehicle:
+        return self.views[self._index[vid]]
+
+    def __setitem__(self, vid: Any, v: Vehicle) -> None:
+        row = self._index.get(vid)
+        if row is not None and self.views[row] is v:
+            return
+        if isinstance(v, StoredVehicle) and v._store is self:
+            raise ValueError(f"vehicle is already in this fleet as {self._keys[v._row]!r}")
+        if row is None:
+            row = self._alloc()
+            self._index[vid] = row
+            self._keys[row] = vid
+        else:
+            self._detach(row)
+        if isinstance(v, StoredVehicle):
+            src, sr = v._store, v._row
+            self._copy_row(src, sr, row)
+            src._release(sr)
+            v._store, v._row = self, row
+        else:
+            self._clear_row(row)
+        self.views[row] = v
+        self.generation += 1
+        self.writes += 1
+
+    def __delitem__(self, vid: Any) -> None:
+        row = self._index.pop(vid)
+        self._detach(row)
+        self._remove_row(row)
+        self.generation += 1
+        self.writes += 1
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, vid: object) -> bool:
+        return vid in self._index
+
+    def __repr__(self) -> str:
+        return f"FleetStore({list(self._index)!r})"
+
+    def rows(self, vids: Sequence[Any]) -> np.ndarray:
+        """Row of each vehicle id (-1 if absent)."""
+        ix = self._index
+        return np.array([ix.get(v, -1) for v in vids], dtype=np.int64)
+
+    def column(self, name: str, vids: Sequence[Any]) -> np.ndarray:
+        """Common-state column (ready, health, flights) for `vids`; absent vehicles read 0."""
+        rows = self.rows(vids)
+        out = np.zeros(len(rows), dtype=self.cols[name].dtype)
+        ok = rows >= 0
+        out[ok] = self.cols[name][rows[ok]]
+        for i in np.flatnonzero(ok & ~self.cols["stored"][np.maximum(rows, 0)]).tolist():
+            out[i] = getattr(self.views[rows[i]].common, name)
+        return out
+
+    def code(self, vocab: str, value: str) -> int:
+        ix = self._vocab_ix[vocab]
+        c = ix.get(value)
+        if c is None:
+            c = ix[value] = len(self.vocab[vocab])
+            self.vocab[vocab].append(value)
+        return c
+
+    # ---- bulk operations ----
+
+    def tank_room(self, vids: Sequence[Any], props: Sequence[str]) -> np.ndarray:
+        """Free capacity (kg) of each (vehicle, prop) cryo tank; 0 wherever fill_tanks would accept nothing."""
+        rows = self.rows(vids)
+        k = np.array([TANKS.index(p) if p in TANKS else -1 for p in props], dtype=np.int64)
+        ok = (rows >= 0) & (k >= 0)
+        ok[ok] = self.cols["stored"][rows[ok]] & self.cols["has_cryo"][rows[ok]]
+        out = np.zeros(len(rows))
+        r, c = rows[ok], k[ok]
+        out[ok] = np.maximum(0.0, self.cols["tank_cap"][r, c] - self.cols["tank_kg"][r, c])
+        return out
+
+    def fill_tanks(self, vids: Sequence[Any], props: Sequence[str], amounts: Sequence[float]) -> np.ndarray:
+        """
+        CryoTank.add for each (vehicle, prop, kg), in order; returns kg accepted.
+        Vehicles without cryo tanks (or unknown props) accept nothing.
+        """
+        rows = self.rows(vids)
+        k = np.array([TANKS.index(p) if p in TANKS else -1 for p in props], dtype=np.int64)
+        kg = np.asarray(amounts, dtype=np.float64)
+        ok = (rows >= 0) & (k >= 0)
+        ok[ok] = self.cols["stored"][rows[ok]] & self.cols["has_cryo"][rows[ok]]
+        out = np.zeros(len(rows))
+        r, c, a = rows[ok], k[ok], kg[ok]
+        mass, cap = self.cols["tank_kg"], self.cols["tank_cap"]
+        cells = r * len(TANKS) + c
+        if len(np.unique(cells)) == len(cells):
+            acc = np.minimum(a, cap[r, c] - mass[r, c])
+            mass[r, c] = mass[r, c] + np.maximum(0.0, acc)
+            out[ok] = np.maximum(0.0, acc)
+        else:
+            # Repeated tanks fill one after another
+            got = []
+            for ri, ci, ai in zip(r.tolist(), c.tolist(), a.tolist()):
+                acc = min(ai, float(cap[ri, ci]) - float(mass[ri, ci]))
+                mass[ri, ci] = float(mass[ri, ci]) + max(0.0, acc)
+                got.append(max(0.0, acc))
+            out[ok] = got
+        self.writes += 1
+        return out
+
+    def snapshot(self) -> "FleetSnapshot":
+        """Plain-Python copy of the fleet: vehicle_id -> observe() dict, with the columns kept alongside."""
+        rows = np.fromiter(self._index.values(), dtype=np.int64, count=len(self._index))
+        stored = self.cols["stored"][rows]
+        r = rows[stored]
+        other = {self._keys[i]: self.views[i].observe() for i in rows[~stored].tolist()}
+        return FleetSnapshot(self._columns(r), [type(self.views[i]) for i in r.tolist()], other, list(self._index))
+
+    def _columns(self, r: np.ndarray) -> Dict[str, List[Any]]:
+        # Column name -> plain-Python values for stored rows `r`
+        ix = r.tolist()
+        cols: Dict[str, Any] = {"key": [self._keys[i] for i in ix]}
+        for k in ("vehicle_id", "vehicle_type", "role", "assigned_mission"):
+            cols[k] = [self.objs[k][i] for i in ix]
+        for k in SCALAR_COLUMNS:
+            if k != "stored":
+                cols[k] = self.cols[k][r].tolist()
+        for k in _CODED:
+            cols[k] = [self.vocab[k][c] for c in cols[k]]
+        for j, t in enumerate(TANKS):
+            cols[t.lower() + "_kg"] = self.cols["tank_kg"][r, j].tolist()
+        n = cols["n_engines"]
+        for k, name in (("eng_health", "engine_health"), ("eng_operable", "engine_operable"),
+                        ("eng_starts", "engine_starts"), ("eng_burn_minutes", "engine_burn_minutes")):
+            cols[name] = [row[:m] for row, m in zip(self.cols[k][r].tolist(), n)]
+        cols["engine_ids"] = [list(self.objs["engine_ids"][i] or ()) for i in ix]
+        return cols
+
+    # ---- rows ----
+
+    def _alloc(self) -> int:
+        row = self.n
+        if row == len(self.cols["stored"]):
+            for k, a in self.cols.items():
+                grown = np.zeros((2 * len(a),) + a.shape[1:], dtype=a.dtype)
+                grown[:len(a)] = a
+                self.cols[k] = grown
+        self.n += 1
+        for lst in self.objs.values():
+            lst.append(None)
+        self.views.append(None)
+        self._keys.append(None)
+        return row
+
+    def engine_width(self, width: int) -> None:
+        """Make room for `width` engines per vehicle."""
+        E = self.cols["eng_health"].shape[1]
+        if width <= E:
+            return
+        for k in ENGINE_COLUMNS:
+            a = self.cols[k]
+            grown = np.zeros((a.shape[0], max(width, 2 * E)), dtype=a.dtype)
+            grown[:, :E] = a
+            self.cols[k] = grown
+
+    def _clear_row(self, row: int) -> None:
+        for a in self.cols.values():
+            a[row] = 0
+        for k, lst in self.objs.items():
+            lst[row] = None
+
+    def _copy_row(self, src: "FleetStore", sr: int, row: int) -> None:
+        ne = int(src.cols["n_engines"][sr])
+        self.engine_width(ne)
+        for k, a in self.cols.items():
+            if k in ENGINE_COLUMNS:
+                a[row] = 0
+                a[row, :ne] = src.cols[k][sr, :ne]
+            elif k in _CODED:
+                a[row] = self.code(k, src.vocab[k][src.cols[k][sr]])
+            else:
+                a[row] = src.cols[k][sr]
+        for k, lst in self.objs.items():
+            v = src.objs[k][sr]
+            lst[row] = list(v) if isinstance(v, list) else v
+
+    def _remove_row(self, row: int) -> None:
+        """Compact `row` away by moving the last row into it."""
+        last = self.n - 1
+        if row != last:
+            for a in self.cols.values():
+                a[row] = a[last]
+            for lst in self.objs.values():
+                lst[row] = lst[last]
+            moved = self.views[last]
+            self.views[row] = moved
+            self._keys[row] = self._keys[last]
+            if isinstance(moved, StoredVehicle):
+                moved._row = row
+            if self._keys[row] in self._index:
+                self._index[self._keys[row]] = row
+        for a in self.cols.values():
+            a[last] = 0
+        for lst in self.objs.values():
+            lst.pop()
+        self.views.pop()
+        self._keys.pop()
+        self.n -= 1
+
+    def _release(self, row: int) -> None:
+        # A view moving to another store: drop its key here (if it is in this fleet) and its row
+        key = self._keys[row]
+        if self._index.get(key) == row:
+            del self._index[key]
+            self.generation += 1
+            self.writes += 1
+        self._remove_row(row)
+
+    def _detach(self, row: int) -> None:
+        # A view leaving the fleet takes a private copy of its row
+        v = self.views[row]
+        if isinstance(v, StoredVehicle):
+            private = FleetStore()
+            r = private._alloc()
+            private._copy_row(self, row, r)
+            private.views[r] = v
+            v._store, v._row = private, r
+        self.views[row] = None
+
+
+class FleetSnapshot(MappingABC):
+    """
+    Read-only vehicle_id -> observe() dict over a columnar copy of the fleet.
+    Per-vehicle dicts are built on first access; `columns` holds the stored
+    vehicles column-wise (in `columns["key"]` order) for array consumers, and
+    plain Vehicles appear only in the mapping.
+    """
+
+    def __init__(self, columns: Dict[str, List[Any]], kinds: List[Type["StoredVehicle"]],
+                 other: Dict[Any, Dict[str, Any]], keys: List[Any]) -> None:
+        self.columns = columns
+        self._kinds = kinds
+        self._rows = {k: i for i, k in enumerate(columns["key"])}
+        self._keys = keys
+        self._built = dict(other)
+
+    def __getitem__(self, vid: Any) -> Dict[str, Any]:
+        d = self._built.get(vid)
+        if d is None:
+            i = self._rows[vid]
+            d = self._built[vid] = self._kinds[i].observe_row({k: c[i] for k, c in self.columns.items()})
+        return d
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, vid: object) -> bool:
+        return vid in self._rows or vid in self._built
+
+    def __repr__(self) -> str:
+        return f"FleetSnapshot({self._keys!r})"
+
+
+def _column(name: str, cast: Any) -> property:
+    def get(self: Any) -> Any:
+        v = self._v
+        return cast(v._store.cols[name][v._row])
+
+    def put(self: Any, value: Any) -> None:
+        v = self._v
+        v._store.cols[name][v._row] = value
+        v._store.writes += 1
+    return property(get, put)
+
+
+def _coded(name: str) -> property:
+    def get(self: Any) -> str:
+        v = self._v
+        return v._store.vocab[name][v._store.cols[name][v._row]]
+
+    def put(self: Any, value: str) -> None:
+        v = self._v
+        v._store.cols[name][v._row] = v._store.code(name, value)
+        v._store.writes += 1
+    return property(get, put)
+
+
+def _object(name: str) -> property:
+    def get(self: Any) -> Any:
+        v = self._v
+        return v._store.objs[name][v._row]
+
+    def put(self: Any, value: Any) -> None:
+        v = self._v
+        v._store.objs[name][v._row] = value
+        v._store.writes += 1
+    return property(get, put)
+
+
+class CommonView:
+    """VehicleCommonState fields of a stored vehicle."""
+    __slots__ = ("_v",)
+
+    def __init__(self, v: "StoredVehicle") -> None:
+        self._v = v
+
+    vehicle_id = _object("vehicle_id")
+    vehicle_type = _object("vehicle_type")
+    role = _object("role")
+    location = _coded("location")
+    phase = _coded("phase")
+    ready = _column("ready", bool)
+    health = _column("health", float)
+    flights = _column("flights", int)
+    assigned_mission = _object("assigned_mission")
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {k: getattr(self, k) for k in VehicleCommonState.__dataclass_fields__}
+
+    def __repr__(self) -> str:
+        return f"CommonView({self.as_dict()!r})"
+
+
+def vehicle_column(name: str, cast: Any) -> property:
+    """Property reading/writing a StoredVehicle's value in scalar column `name`."""
+    def get(self: Any) -> Any:
+        return cast(self._store.cols[name][self._row])
+
+    def put(self: Any, value: Any) -> None:
+        self._store.cols[name][self._row] = value
+        self._store.writes += 1
+    return property(get, put)
+
+
+def slot_column(name: str, cast: Any) -> property:
+    """Property for per-slot views (tanks, engines) holding the vehicle `_v` and slot `_k`."""
+    def get(self: Any) -> Any:
+        v = self._v
+        return cast(v._store.cols[name][v._row, self._k])
+
+    def put(self: Any, value: Any) -> None:
+        v = self._v
+        v._store.cols[name][v._row, self._k] = value
+        v._store.writes += 1
+    return property(get, put)
+
+
+class TankView(TankOps):
+    """CryoTank interface over one tank column of a stored vehicle."""
+    __slots__ = ("_v", "_k")
+
+    def __init__(self, v: "StoredVehicle", k: int) -> None:
+        self._v, self._k = v, k
+
+    @property
+    def prop_name(self) -> str:
+        return TANKS[self._k]
+
+    mass_kg = slot_column("tank_kg", float)
+    capacity_kg = slot_column("tank_cap", float)
+    boiloff_frac_per_day = slot_column("tank_frac", float)
+    zero_boiloff_enabled = slot_column("tank_zbo", bool)
+
+    def __repr__(self) -> str:
+        return (f"TankView({self.prop_name!r}, mass_kg={self.mass_kg!r}, capacity_kg={self.capacity_kg!r}, "
+                f"boiloff_frac_per_day={self.boiloff_frac_per_day!r}, zero_boiloff_enabled={self.zero_boiloff_enabled!r})")
+
+
+class StoredVehicle(Vehicle):
+    """
+    Vehicle whose state is one row of a FleetStore. A freshly built vehicle has
+    a private one-row store until it is added to a fleet's `vehicles`.
+    """
+    __slots__ = ("_store", "_row")
+
+    def _bind_private(self) -> None:
+        store = FleetStore()
+        row = store._alloc()
+        store.views[row] = self
+        store.cols["stored"][row] = True
+        self._store, self._row = store, row
+
+    @property
+    def common(self) -> CommonView:
+        return CommonView(self)
+
+    def observe(self) -> Dict[str, Any]:
+        return self.observe_row({k: c[0] for k, c in self._store._columns(np.array([self._row])).items()})
+
+    @staticmethod
+    def observe_row(row: Mapping[str, Any]) -> Dict[str, Any]:
+        """observe() dict from one row of FleetStore columns (shared by observe and FleetSnapshot)."""
+        raise NotImplementedError
+
+    @staticmethod
+    def common_row(row: Mapping[str, Any]) -> Dict[str, Any]:
+        return {k: row[k] for k in VehicleCommonState.__dataclass_fields__}
+
+    @common.setter
+    def common(self, c: VehicleCommonState) -> None:
+        view = CommonView(self)
+        for k in VehicleCommonState.__dataclass_fields__:
+            setattr(view, k, getattr(c, k))
+
+    def _set_tank(self, k: int, tank: CryoTank) -> None:
+        if tank.prop_name != TANKS[k]:
+            raise ValueError(f"tank {k} holds {TANKS[k]}, got {tank.prop_name!r}")
+        view = TankView(self, k)
+        view.mass_kg, view.capacity_kg = tank.mass_kg, tank.capacity_kg
+        view.boiloff_frac_per_day, view.zero_boiloff_enabled = tank.boiloff_frac_per_day, tank.zero_boiloff_enabled
+        self._store.cols["has_cryo"][self._row] = True
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self._store.objs['vehicle_id'][self._row]!r})"